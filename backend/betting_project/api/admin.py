@@ -1,4 +1,10 @@
-from django.contrib import admin
+from collections import Counter
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from betting_project.admin import LargeTableAdmin
+from . import settlement
+from .forms import SettleEventsForm
 from .models import Group, Event, Member, Bet, Participant
 
 import logging
@@ -12,33 +18,119 @@ class GroupAdmin(admin.ModelAdmin):
     # Without the list they will be listed in defult order also needed if you don't wnat to add all fields
     fields = ["name", "location", "description", "banner_image"]
     list_display = ["name", "location", "description", ]
+    search_fields = ["^name"]
 
     def save_model(self, request, obj, form, change):
-        logger.debug("Logged-in admin user:", request.user)
+        logger.debug("Logged-in admin user: %s", request.user)
         if not change:
             obj.creator = request.user
         super().save_model(request, obj, form, change)
 
+# The changelists below show their foreign keys through select_related and
+# edit them with raw id inputs: each row's __str__ would otherwise load the
+# user, group or event (several queries per row), and each form a <select>
+# of every user. Searches are prefix matches on indexed columns.
+
 @admin.register(Member)
-class MemberAdmin(admin.ModelAdmin):
+class MemberAdmin(LargeTableAdmin):
     fields = [
         field.name
         for field in Member._meta.fields
         if field.name not in ["id", "joined_at"]
     ]
-    list_display = [field.name for field in Member._meta.fields]
+    list_display = ["id", "user", "group", "admin", "joined_at"]
+    list_select_related = ["user", "group"]
+    raw_id_fields = ["user", "group"]
+    search_fields = ["^user__username", "^group__name"]
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
-    fields = ["team1", "team2", "time", "group"]
-    list_display = [field.name for field in Event._meta.fields]
+class EventAdmin(LargeTableAdmin):
+    fields = ["team1", "team2", "start_time", "end_time", "group", "organizer", "state", "is_complete"]
+    list_display = ["id", "team1", "team2", "start_time", "end_time", "state", "is_complete", "organizer", "group"]
+    list_select_related = ["organizer", "group"]
+    list_filter = ["state"]
+    raw_id_fields = ["group", "organizer"]
+    search_fields = ["^team1", "^team2"]
+    actions = ["settle_events", "void_events", "archive_events"]
+
+    # Batch actions: each asks for confirmation (and winners) on an
+    # intermediate page, then runs one job over all the selected events
+    # (see api/settlement.py) and shows every event's result.
+
+    @admin.action(description="Settle selected events", permissions=["change"])
+    def settle_events(self, request, queryset):
+        events = list(queryset.order_by("start_time", "id"))
+        form = SettleEventsForm(events, request.POST if "apply" in request.POST else None)
+        if form.is_bound and form.is_valid():
+            return self._run_batch(request, "Settle events", settlement.settle_events, form.winners())
+        return self._confirm_batch(
+            request, queryset, "settle_events", "Settle events",
+            "Pick the winner of each event to settle; events left blank are skipped.", form,
+        )
+
+    @admin.action(description="Void selected events and refund their bets", permissions=["change"])
+    def void_events(self, request, queryset):
+        if "apply" in request.POST:
+            return self._run_batch(request, "Void events", settlement.void_events, queryset.values_list("id", flat=True))
+        return self._confirm_batch(
+            request, queryset, "void_events", "Void events",
+            "Every bet on these events will be refunded and the events closed without a winner.",
+        )
+
+    @admin.action(description="Archive selected settled events", permissions=["delete"])
+    def archive_events(self, request, queryset):
+        if "apply" in request.POST:
+            return self._run_batch(
+                request, "Archive events", settlement.archive_events, queryset.values_list("id", flat=True)
+            )
+        return self._confirm_batch(
+            request, queryset, "archive_events", "Archive events",
+            "These events and their bets will move to the archive tables; unsettled events are skipped.",
+        )
+
+    def _confirm_batch(self, request, queryset, action, title, description, form=None):
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": title,
+            "description": description,
+            "queryset": queryset,
+            "form": form,
+            "action": action,
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, "admin/api/event/batch_action.html", context)
+
+    def _run_batch(self, request, title, job, arguments):
+        results = job(arguments)
+        summary = Counter(result["result"] for result in results)
+        self.message_user(
+            request,
+            f"{title}: " + ", ".join(f"{result} {count}" for result, count in summary.items()),
+            messages.WARNING if summary.get(settlement.SKIPPED) else messages.SUCCESS,
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": title,
+            "results": results,
+            "summary": dict(summary),
+        }
+        return TemplateResponse(request, "admin/api/event/batch_results.html", context)
 
 @admin.register(Participant)
-class ParticipantAdmin(admin.ModelAdmin):
-    list_display = [field.name for field in Participant._meta.fields]
+class ParticipantAdmin(LargeTableAdmin):
+    list_display = ["id", "user", "event", "bet_id"]
+    list_select_related = ["user", "event"]
+    raw_id_fields = ["event", "user", "bet"]
+    search_fields = ["^user__username"]
     
 @admin.register(Bet)
-class BetAdmin(admin.ModelAdmin):
-    fields = ["user", "event", "points", "status"]
+class BetAdmin(LargeTableAdmin):
+    fields = ["user", "event", "team_choice", "bet_type", "bet_amount", "status"]
     list_display = [
-        field.name for field in Bet._meta.fields ]
+        "id", "user", "event", "team_choice", "bet_type", "bet_amount", "status", "created_at"]
+    list_select_related = ["user", "event"]
+    list_filter = ["status"]
+    raw_id_fields = ["user", "event"]
+    search_fields = ["^user__username"]
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from django.core import checks
+        from betting_project.db import replicas
+        from . import streaming
+
+        checks.register(replicas.check_pin_cache, checks.Tags.caches)
+        checks.register(streaming.check_pool_cache, checks.Tags.caches)
@@ -0,0 +1,79 @@
+"""
+Moving settled events out of the hot tables (`manage.py archive_events`).
+
+Each chunk of events is archived in one transaction:
+
+1. The events are flagged is_archived, which hides them from Event.objects.
+2. The events, their bets and their participants are copied to the archive
+   tables (ArchivedEvent, ArchivedBet, ArchivedParticipant), keeping their ids.
+3. Ledger entries of the bets are pointed at the archived bets.
+4. The rows are deleted from the hot tables.
+
+Reads of archived bets go through ArchivedBet (see BetViewset.archived_history).
+"""
+from django.db import transaction
+from django.db.models import F
+
+from users.models import LedgerEntry
+from .models import ArchivedBet, ArchivedEvent, ArchivedParticipant, Bet, Event, Participant
+
+BATCH_SIZE = 2000
+
+
+def archivable_events(cutoff):
+    """
+    Settled events that ended before `cutoff`, including any left flagged
+    by an interrupted run.
+    """
+    return Event.all_objects.filter(is_complete=True, end_time__lt=cutoff)
+
+
+def _copy(source_queryset, archive_model):
+    # Archive models have the hot model's columns (by attname) plus, for events, archived_at
+    columns = [
+        field.attname for field in archive_model._meta.concrete_fields if field.attname != "archived_at"
+    ]
+    rows = [archive_model(**row) for row in source_queryset.order_by().values(*columns)]
+    archive_model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+@transaction.atomic
+def archive_chunk(event_ids):
+    """
+    Archive the given events with their bets and participants. Returns the
+    number of rows moved per table.
+    """
+    Event.all_objects.filter(id__in=event_ids).update(is_archived=True, state=Event.ARCHIVED)
+
+    events = Event.all_objects.filter(id__in=event_ids)
+    bets = Bet.objects.filter(event_id__in=event_ids)
+    participants = Participant.objects.filter(event_id__in=event_ids)
+    counts = {
+        "events": _copy(events, ArchivedEvent),
+        "bets": _copy(bets, ArchivedBet),
+        "participants": _copy(participants, ArchivedParticipant),
+    }
+
+    LedgerEntry.objects.filter(bet__event_id__in=event_ids).update(archived_bet_id=F("bet_id"), bet=None)
+
+    participants.delete()
+    bets.delete()
+    events.delete()
+    return counts
+
+
+def archive_events(cutoff, chunk_size=500, limit=None):
+    """
+    Archive settled events that ended before `cutoff`, `chunk_size` events
+    per transaction, at most `limit` events in total. Yields the counts of
+    every chunk.
+    """
+    archived = 0
+    while limit is None or archived < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - archived)
+        event_ids = list(archivable_events(cutoff).order_by("id").values_list("id", flat=True)[:size])
+        if not event_ids:
+            return
+        yield archive_chunk(event_ids)
+        archived += len(event_ids)
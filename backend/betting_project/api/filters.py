@@ -0,0 +1,30 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date_bound(query_params, param, end_of_day=False):
+    """
+    Read an optional from/to style query param as an aware datetime.
+
+    Accepts an ISO datetime, or an ISO date which is taken as the start of
+    that day (or its end when `end_of_day` is set, for inclusive upper bounds).
+    Raises a 400 ValidationError for anything else.
+    """
+    value = query_params.get(param)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        parsed = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if parsed is None:
+        raise ValidationError({param: "Use an ISO date (YYYY-MM-DD) or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,30 @@
+from django import forms
+
+
+class SettleEventsForm(forms.Form):
+    """
+    The winning team of each event selected for the admin's "Settle" action.
+
+    One field per event, named winner_<event id>, with the event's two teams
+    as choices. Events left blank are not settled.
+    """
+
+    def __init__(self, events, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = events
+        for event in events:
+            self.fields[f"winner_{event.id}"] = forms.ChoiceField(
+                label=str(event),
+                choices=[("", "---------"), (event.team1, event.team1), (event.team2, event.team2)],
+                required=False,
+            )
+
+    def winners(self):
+        """
+        {event_id: winning team name} of the events given a winner.
+        """
+        return {
+            event.id: self.cleaned_data[f"winner_{event.id}"]
+            for event in self.events
+            if self.cleaned_data.get(f"winner_{event.id}")
+        }
@@ -0,0 +1,187 @@
+"""
+Bulk import of event schedules (fixtures), from `manage.py import_events`
+and POST /api/events/bulk/.
+
+Rows come as CSV (with a header line) or JSON Lines, with the columns
+
+    group_id, team1, team2, start_time, end_time
+
+(datetimes in ISO 8601; naive ones are in the current time zone). An import
+is all or nothing: every row is validated first, without a query per row
+(groups are checked with one query for the whole file), and nothing is
+written if any row is invalid. Valid rows are then upserted with
+bulk_create, BATCH_SIZE rows per INSERT, on the (group, team1, team2,
+start_time) fixture constraint: a fixture that already exists gets its
+end time updated instead of a duplicate. Its organizer is left alone: only
+the organizer can complete an event, so an import can't hand that over.
+"""
+import csv
+import io
+import json
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Event, Group, market_state
+
+BATCH_SIZE = 500
+MAX_ERRORS = 50
+
+CSV = "csv"
+JSON_LINES = "jsonl"
+FORMATS = (CSV, JSON_LINES)
+
+
+class InvalidScheduleError(Exception):
+    """
+    The rows that failed validation: [{"line": n, "errors": {...}}, ...].
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+class EventRowSerializer(serializers.Serializer):
+    """
+    One row of a schedule. Plain fields only: the group is checked in bulk.
+    """
+
+    group_id = serializers.IntegerField()
+    team1 = serializers.CharField(max_length=32)
+    team2 = serializers.CharField(max_length=32)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data["end_time"] <= data["start_time"]:
+            raise serializers.ValidationError({"end_time": "Must be after the start time."})
+        if data["team1"].title() == data["team2"].title():
+            raise serializers.ValidationError({"team2": "A team can't play itself."})
+        return data
+
+
+def format_for(name):
+    """
+    The format of a file, from its extension (.csv, .jsonl or .ndjson).
+    """
+    if name.lower().endswith(".csv"):
+        return CSV
+    if name.lower().endswith((".jsonl", ".ndjson")):
+        return JSON_LINES
+    return None
+
+
+def parse_rows(text, format):
+    """
+    Yield (line number, row dict) of CSV or JSON Lines text; a line that
+    isn't valid JSON yields its error string instead of a dict.
+    """
+    if format == CSV:
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            yield reader.line_num, row
+    elif format == JSON_LINES:
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object."
+    else:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(FORMATS)}")
+
+
+def validate_rows(rows):
+    """
+    Validate (line number, row) pairs. Returns the Events to write (team
+    names title-cased like Event.save does, duplicates within the file
+    merged, last one wins); raises InvalidScheduleError with the invalid rows.
+    """
+    errors = []
+    valid = []
+    for line_number, row in rows:
+        if isinstance(row, str):
+            errors.append({"line": line_number, "errors": {"detail": row}})
+            continue
+        serializer = EventRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((line_number, serializer.validated_data))
+        else:
+            errors.append({"line": line_number, "errors": serializer.errors})
+
+    group_ids = {data["group_id"] for _, data in valid}
+    existing_groups = set(Group.objects.filter(id__in=group_ids).values_list("id", flat=True))
+    for line_number, data in valid:
+        if data["group_id"] not in existing_groups:
+            errors.append({"line": line_number, "errors": {"group_id": "This group does not exist."}})
+    if errors:
+        raise InvalidScheduleError(sorted(errors, key=lambda error: error["line"])[:MAX_ERRORS])
+
+    now = timezone.now()
+    events = {}
+    for _, data in valid:
+        event = Event(
+            group_id=data["group_id"],
+            team1=data["team1"].title(),
+            team2=data["team2"].title(),
+            start_time=data["start_time"],
+            end_time=data["end_time"],
+            # bulk_create skips Event.save, which keeps the state
+            state=market_state(data["start_time"], now),
+        )
+        events[_fixture(event)] = event
+    return list(events.values())
+
+
+def _fixture(event):
+    return (event.group_id, event.team1, event.team2, event.start_time)
+
+
+def _existing_fixtures(events):
+    """
+    How many of the events' fixtures are already in the table, in one query.
+    """
+    candidates = Event.all_objects.filter(
+        group_id__in={event.group_id for event in events},
+        start_time__in={event.start_time for event in events},
+    ).values_list("group_id", "team1", "team2", "start_time")
+    return len(set(candidates) & {_fixture(event) for event in events})
+
+
+@transaction.atomic
+def upsert_events(events, organizer=None, batch_size=BATCH_SIZE):
+    """
+    Insert the events, organized by `organizer`, or update the end time of
+    those whose fixture already exists. Returns {"created": n, "updated": n}.
+    """
+    # MySQL's ON DUPLICATE KEY UPDATE can't name the constraint (and Django
+    # refuses unique_fields there); it hits the fixture constraint all the same.
+    features = connections[router.db_for_write(Event)].features
+    unique_fields = ["group", "team1", "team2", "start_time"] if features.supports_update_conflicts_with_target else None
+    counts = {"created": 0, "updated": 0}
+    for start in range(0, len(events), batch_size):
+        batch = events[start:start + batch_size]
+        updated = _existing_fixtures(batch)
+        for event in batch:
+            event.organizer = organizer
+        Event.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=["end_time"],
+        )
+        counts["created"] += len(batch) - updated
+        counts["updated"] += updated
+    return counts
+
+
+def import_events(text, format, organizer=None, batch_size=BATCH_SIZE):
+    """
+    Validate and upsert a whole schedule; raises InvalidScheduleError if any row is invalid.
+    """
+    return upsert_events(validate_rows(parse_rows(text, format)), organizer=organizer, batch_size=batch_size)
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.archive import archive_events
+
+
+class Command(BaseCommand):
+    help = "Move settled events, with their bets and participants, from the hot tables to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=90,
+            help="Only archive events that ended at least this many days ago. Default: 90.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500, help="Events archived per transaction.")
+        parser.add_argument("--limit", type=int, help="Maximum events to archive in this run.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        totals = {"events": 0, "bets": 0, "participants": 0}
+        for counts in archive_events(cutoff, chunk_size=options["chunk_size"], limit=options["limit"]):
+            for table, count in counts.items():
+                totals[table] += count
+            if options["verbosity"] > 1:
+                self.stdout.write(", ".join(f"{table}: {count}" for table, count in counts.items()))
+        self.stdout.write(
+            self.style.SUCCESS("Archived " + ", ".join(f"{table}: {count}" for table, count in totals.items()))
+        )
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importing import BATCH_SIZE, FORMATS, InvalidScheduleError, format_for, import_events
+
+
+class Command(BaseCommand):
+    help = "Create or update events from a schedule file (CSV or JSON Lines), see api/importing.py."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The schedule file.")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="csv or jsonl. Default: from the file's extension."
+        )
+        parser.add_argument("--organizer", help="Email of the user to organize the new events (existing ones keep theirs).")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Events per INSERT.")
+
+    def handle(self, *args, **options):
+        format = options["format"] or format_for(options["path"])
+        if format is None:
+            raise CommandError("Can't tell the format from the file name, pass --format.")
+        organizer = None
+        if options["organizer"]:
+            try:
+                organizer = get_user_model().objects.get(email=options["organizer"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['organizer']}")
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as schedule:
+            text = schedule.read()
+        try:
+            counts = import_events(text, format, organizer=organizer, batch_size=options["batch_size"])
+        except InvalidScheduleError as e:
+            for error in e.errors:
+                self.stderr.write(f"line {error['line']}: {error['errors']}")
+            raise CommandError(f"Nothing imported: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Created {counts['created']}, updated {counts['updated']} events"))
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from betting_project.startup import heaviest_imports, measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a fresh interpreter, run django.setup() and load the URLconf, and report the total time "
+        "and the slowest module imports (from python -X importtime)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=25, help="Number of modules to list.")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "self"], default="cumulative",
+            help="Rank by time including the module's own imports (cumulative) or without them (self).",
+        )
+        parser.add_argument("--top-level", action="store_true", help="Only list modules imported directly.")
+        parser.add_argument("--attempts", type=int, default=3, help="Runs to take the fastest of.")
+
+    def handle(self, *args, **options):
+        result = measure_startup(settings.SETTINGS_MODULE, attempts=options["attempts"])
+        budget = getattr(settings, "STARTUP_BUDGET_SECONDS", None)
+        summary = f"Startup took {result['seconds'] * 1000:.0f} ms"
+        if budget:
+            summary += f" (budget {budget * 1000:.0f} ms)"
+        style = self.style.SUCCESS if not budget or result["seconds"] <= budget else self.style.ERROR
+        self.stdout.write(style(summary))
+
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>8}  module (imported by)")
+        rows = heaviest_imports(
+            result["imports"], options["limit"], key=f"{options['sort']}_us", top_level_only=options["top_level"]
+        )
+        for row in rows:
+            via = "" if row["imported_by"] == row["module"] else f" ({row['imported_by']})"
+            self.stdout.write(
+                f"{row['cumulative_us'] / 1000:>14.1f} {row['self_us'] / 1000:>8.1f}  {row['module']}{via}"
+            )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.scheduler import advance_markets, next_boundary
+
+
+class Command(BaseCommand):
+    help = "Open and close event markets whose start time boundaries have passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, waking up at the next boundary.",
+        )
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=30,
+            help="With --loop, seconds to sleep at most between runs, so new events are picked up. Default: 30.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counts = advance_markets()
+            if any(counts.values()) or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(", ".join(f"{state}: {count}" for state, count in counts.items()))
+                )
+            if not options["loop"]:
+                return
+            boundary = next_boundary()
+            sleep = options["max_sleep"]
+            if boundary is not None:
+                sleep = min(sleep, max((boundary - timezone.now()).total_seconds(), 0))
+            close_old_connections()
+            time.sleep(sleep)
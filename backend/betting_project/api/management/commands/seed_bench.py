@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seeding import PASSWORD, SIZES, clear_bench_data, has_bench_data, seed_bench_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create synthetic users, groups, events and bets for benchmarking, with most bets on a few hot "
+        "events. Bench users are bench_<n>@bench.local with password '%s'." % PASSWORD
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", choices=sorted(SIZES), default="small", help="Preset for the counts below. Default: small."
+        )
+        parser.add_argument("--users", type=int, help="Number of users.")
+        parser.add_argument("--groups", type=int, help="Number of groups.")
+        parser.add_argument("--events", type=int, help="Number of events.")
+        parser.add_argument("--bets", type=int, help="Approximate number of bets.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible data.")
+        parser.add_argument(
+            "--completed-share", type=float, default=0.2, help="Share of events that are past and settled."
+        )
+        parser.add_argument("--clear", action="store_true", help="Delete existing bench data first.")
+
+    def handle(self, *args, **options):
+        users, groups, events, bets = SIZES[options["size"]]
+        counts = {
+            "users": options["users"] or users,
+            "groups": options["groups"] or groups,
+            "events": options["events"] or events,
+            "bets": options["bets"] if options["bets"] is not None else bets,
+        }
+        if options["clear"]:
+            clear_bench_data()
+        elif has_bench_data():
+            raise CommandError("Bench data already exists; pass --clear to replace it.")
+
+        started = time.perf_counter()
+        created = seed_bench_data(
+            **counts, seed=options["seed"], completed_share=options["completed_share"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{model}: {count}" for model, count in created.items())
+                + f" in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_remove_event_participants_participant"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bet",
+            index=models.Index(
+                fields=["user", "-created_at"], name="bet_user_created_idx"
+            ),
+        ),
+    ]
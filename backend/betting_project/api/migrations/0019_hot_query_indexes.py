@@ -0,0 +1,38 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_bet_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bet",
+            index=models.Index(
+                fields=["event", "team_choice", "bet_amount"],
+                name="bet_event_team_amount_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["organizer", "start_time"], name="event_organizer_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["is_complete", "start_time"], name="event_complete_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="member",
+            index=models.Index(
+                fields=["group", "joined_at"], name="member_group_joined_idx"
+            ),
+        ),
+    ]
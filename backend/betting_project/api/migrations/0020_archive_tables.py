@@ -0,0 +1,138 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("api", "0019_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedEvent",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("team1", models.CharField(max_length=32)),
+                ("team2", models.CharField(max_length=32)),
+                ("team1_score", models.IntegerField(blank=True, null=True)),
+                ("team2_score", models.IntegerField(blank=True, null=True)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("is_complete", models.BooleanField(default=True)),
+                ("is_archived", models.BooleanField(default=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_events",
+                        to="api.group",
+                    ),
+                ),
+                (
+                    "organizer",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedBet",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("team1_score", models.IntegerField(blank=True, null=True)),
+                ("team2_score", models.IntegerField(blank=True, null=True)),
+                ("team_choice", models.CharField(default="", max_length=15)),
+                (
+                    "bet_type",
+                    models.CharField(
+                        choices=[("Win", "Win"), ("Lose", "Lose")],
+                        default="",
+                        max_length=4,
+                    ),
+                ),
+                (
+                    "bet_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("status", models.CharField(max_length=10)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bets",
+                        to="api.archivedevent",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_bets",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedParticipant",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "bet",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participants",
+                        to="api.archivedbet",
+                    ),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="event_participants",
+                        to="api.archivedevent",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("event", "user")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="archivedbet",
+            index=models.Index(
+                fields=["user", "-created_at"], name="archived_bet_user_created_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="archivedbet",
+            unique_together={("user", "event")},
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:58
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_state(apps, schema_editor):
+    Event = apps.get_model("api", "Event")
+    now = timezone.now()
+    Event.objects.filter(is_complete=False, start_time__lte=now).update(state="closed")
+    Event.objects.filter(is_complete=True).update(state="settled")
+    Event.objects.filter(is_archived=True).update(state="archived")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0020_archive_tables"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedevent",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("open", "Open"),
+                    ("closed", "Closed"),
+                    ("settling", "Settling"),
+                    ("settled", "Settled"),
+                    ("archived", "Archived"),
+                ],
+                default="archived",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("open", "Open"),
+                    ("closed", "Closed"),
+                    ("settling", "Settling"),
+                    ("settled", "Settled"),
+                    ("archived", "Archived"),
+                ],
+                default="open",
+                help_text="Where the event's market is: bets are only taken while it is open.",
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(backfill_state, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["state", "start_time"], name="event_state_start_idx"
+            ),
+        ),
+    ]
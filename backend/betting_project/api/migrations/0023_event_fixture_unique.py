@@ -0,0 +1,61 @@
+# Generated by Django 4.2.4 on 2026-10-19 09:05
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_fixtures(apps, schema_editor):
+    """
+    Keep one event per fixture before the constraint goes on: the copy with
+    bets or participants, else the oldest. Copies that are unused are
+    deleted; when more than one copy is in use, nothing is deleted and the
+    migration stops with their ids so they can be merged by hand.
+    """
+    Event = apps.get_model("api", "Event")
+    Bet = apps.get_model("api", "Bet")
+    Participant = apps.get_model("api", "Participant")
+    fixtures = (
+        Event.objects.order_by()
+        .values("group_id", "team1", "team2", "start_time")
+        .annotate(copies=Count("id"))
+        .filter(copies__gt=1)
+    )
+    unused = []
+    conflicts = []
+    for fixture in fixtures:
+        fixture.pop("copies")
+        ids = list(Event.objects.filter(**fixture).order_by("id").values_list("id", flat=True))
+        in_use = sorted(
+            set(Bet.objects.filter(event_id__in=ids).values_list("event_id", flat=True))
+            | set(Participant.objects.filter(event_id__in=ids).values_list("event_id", flat=True))
+        )
+        if len(in_use) > 1:
+            conflicts.append(in_use)
+            continue
+        keep = in_use[0] if in_use else ids[0]
+        unused.extend(event_id for event_id in ids if event_id != keep)
+    if conflicts:
+        raise RuntimeError(
+            "Can't add event_fixture_unique: these events share a fixture and each have bets or "
+            "participants, merge or reschedule them first: "
+            + "; ".join(", ".join(map(str, event_ids)) for event_ids in conflicts)
+        )
+    Event.objects.filter(id__in=unused).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0022_event_team_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_fixtures, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="event",
+            constraint=models.UniqueConstraint(
+                fields=("group", "team1", "team2", "start_time"),
+                name="event_fixture_unique",
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # models.py in your Django app
 from django.db import models
 from django.db.models import Count
+from datetime import timedelta
 from decimal import Decimal
 from django.conf import settings
 from django.db import models
@@ -133,17 +134,112 @@ class Member(models.Model):
     class Meta:
         unique_together = ("user", "group")
         ordering = ["joined_at"]
+        indexes = [
+            # A group's members in join order, without a sort
+            models.Index(fields=["group", "joined_at"], name="member_group_joined_idx"),
+        ]
+
+
+def potential_winnings(bets, team1, team2, usernames=None):
+    """
+    Pure calculation behind Event.calculate_potential_winnings.
+
+    Args:
+        bets: (username, team_choice, bet_amount) tuples for one event,
+            with team_choice stored as "Team 1" / "Team 2".
+        team1, team2: The event's team names, shown instead of the labels.
+        usernames: Only list the bets of these users (every bet when None).
+            The pools are summed over every bet either way.
+
+    Kept separate from the model so callers that already have the bet rows
+    (e.g. the async read path) can reuse it without another query.
+    """
+    bets = list(bets)
+
+    #initialize a dictionary to track the total bet amount for each team
+    total_bet_amount = {"Team 1": Decimal("0"), "Team 2": Decimal("0")}
+    for _, team_choice, bet_amount in bets:
+        if team_choice in total_bet_amount:
+            total_bet_amount[team_choice] += bet_amount or Decimal("0")
+    total_pool = total_bet_amount["Team 1"] + total_bet_amount["Team 2"]
+    team_names = {"Team 1": team1, "Team 2": team2}
+
+    potential_winnings = []
+    for username, team_choice, bet_amount in bets:
+        if usernames is not None and username not in usernames:
+            continue
+        team_total = total_bet_amount.get(team_choice, Decimal("0"))
+        # The total that can be won is the opposite team's bet pool.
+        winnable_amount = total_pool - team_total
+        potential_winning = Decimal("0")
+        if team_total > 0:
+            # Proportion of the bet in relation to the total bets placed on the chosen team.
+            potential_winning = (bet_amount or Decimal("0")) / team_total * winnable_amount
+        potential_winnings.append({
+            'user': username,
+            'bet_amount': bet_amount,
+            'team_choice': team_names.get(team_choice, "Unknown Team"),
+            'potential_winning': potential_winning,
+            'total_winnable_pool': winnable_amount
+        })
+
+    return {
+        "participants_info": potential_winnings,
+        "participants_count": len(bets),
+    }
+
 
 class EventManager(models.Manager):
+    """
+    Events that are not archived. Archived events are on their way to the
+    archive tables (see api/archive.py); use Event.all_objects to see them.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(is_archived=False)
+
     def order_by_participants(self):
         return self.get_queryset().annotate(
             num_participants=Count("bets__user", distinct=True)
         ).order_by("-num_participants")
 
+def market_state(start_time, now=None):
+    """
+    The state a not yet settled event should be in at `now`: bets are taken
+    from MARKET_OPEN_SECONDS_BEFORE_START (always, when None) until the start.
+    """
+    now = now or timezone.now()
+    if start_time <= now:
+        return Event.CLOSED
+    open_before = getattr(settings, "MARKET_OPEN_SECONDS_BEFORE_START", None)
+    if open_before is not None and start_time - now > timedelta(seconds=open_before):
+        return Event.SCHEDULED
+    return Event.OPEN
+
+
 class Event(models.Model):
     """
     Represents an event organized by a group, involving two teams.
+
+    `state` is the event's market: scheduled -> open -> closed (started) ->
+    settling -> settled -> archived. The start boundaries are crossed in bulk
+    by `manage.py schedule_markets` (see api/scheduler.py), settlement by
+    complete_event and archiving by `manage.py archive_events`.
     """
+    SCHEDULED = "scheduled"
+    OPEN = "open"
+    CLOSED = "closed"
+    SETTLING = "settling"
+    SETTLED = "settled"
+    ARCHIVED = "archived"
+    STATE_CHOICES = [
+        (SCHEDULED, "Scheduled"),
+        (OPEN, "Open"),
+        (CLOSED, "Closed"),
+        (SETTLING, "Settling"),
+        (SETTLED, "Settled"),
+        (ARCHIVED, "Archived"),
+    ]
+
     team1 = models.CharField(
         max_length=32,
         null=False,
@@ -201,8 +297,18 @@ class Event(models.Model):
     is_archived = models.BooleanField(
         default=False,
         help_text="Indicates whether the event is archived.")
+
+    state = models.CharField(
+        max_length=10,
+        choices=STATE_CHOICES,
+        default=OPEN,
+        help_text="Where the event's market is: bets are only taken while it is open."
+    )
+
+    objects = EventManager()
+    all_objects = models.Manager()
     
-    def calculate_potential_winnings(self):
+    def calculate_potential_winnings(self, usernames=None):
         """
             Calculates the potential winnings for each participant's bet based on 
             the current betting pool. This method is used to provide an estimate 
@@ -215,7 +321,9 @@ class Event(models.Model):
             3. Use this proportion to determine the potential share of the opposite team's total bets.
             
             Returns:
-                A list of dictionaries, each containing:
+                "participants_count", the number of bets, and "participants_info",
+                a list of dictionaries (for the bets of `usernames` only, when
+                given), each containing:
                 - 'user': Username of the participant.
                 - 'bet_amount': The amount bet by the participant.
                 - 'team_choice': The team chosen by the participant. (actual team name the event was created with not the db will store Team 1 or Team2
@@ -237,58 +345,52 @@ class Event(models.Model):
                 - Potential winning = 10% of $800 = $80
                 - Total Winnable Pool = $800 (Total bets on Team B)
         """     
-        # Initialize the bets collections by retrieving all related to this event.
-        bets = self.bets.all()
+        # Only the columns the calculation needs, usernames joined in the same query
+        bets = self.bets.values_list("user__username", "team_choice", "bet_amount")
+        return potential_winnings(bets, self.team1, self.team2, usernames)
+
+    @property
+    def accepts_bets(self):
+        """
+        Whether bets can be placed, changed or removed. Reads the state; the
+        start time is checked too since the scheduler may not have closed the
+        market yet.
+        """
+        return self.state == self.OPEN and timezone.now() < self.start_time
 
-        #initialize a dictionary to track the total bet amount for each team
-        total_bet_amount = {"Team 1": Decimal("0"), "Team 2": Decimal("0")}
-        
-        #loop over each bet and add the bet amount to the correspoing team's total 
-        for bet in bets:
-            total_bet_amount[bet.team_choice] += bet.bet_amount
-        
-        #initialize a list to store potential winnings
-        potential_winnings = []
-        participants = set() # initialize set for number of unique participants
-        for bet in bets:
-            participants.add(bet.user.username)
-            if total_bet_amount[bet.team_choice] > 0:
-                # Calculate the total that can be won from the opposite team's bet pool.
-                winnable_amount = (total_bet_amount["Team 1"] + total_bet_amount["Team 2"] - total_bet_amount[bet.team_choice])
-                
-                # Calculate the proportion of the bet in relation to the total bets placed on the chosen team.
-                winning_ratio = bet.bet_amount / total_bet_amount[bet.team_choice]
-                potential_winning = winning_ratio * winnable_amount
-            
-            if bet.team_choice == "Team 1":
-                team_name = bet.event.team1
-            elif bet.team_choice == "Team 2":
-                team_name = bet.event.team2
-            else:
-                team_name = "Unknown Team"
-                
-                # Append the calculated data to the potential_winnings list
-            potential_winnings.append({  # Correct usage of append
-                'user': bet.user.username,
-                'bet_amount': bet.bet_amount,
-                'team_choice': team_name,
-                'potential_winning': potential_winning,
-                'total_winnable_pool': winnable_amount
-            })
-        
-        return {
-            "participants_info": potential_winnings,
-            # "total_participants": len(participants) # total # of participants
-        }
     def save(self, *args, **kwargs):
         # Capitalie the name before saving
         self.team1 = self.team1.title()
         self.team2 = self.team2.title()
+        # Until it starts, the state follows the start time (e.g. when it is moved)
+        if self.is_complete and self.state != self.ARCHIVED:
+            self.state = self.SETTLED
+        elif self.state in (self.SCHEDULED, self.OPEN):
+            self.state = market_state(self.start_time)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "state"}
         super(Event, self).save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.team1} vs {self.team2} at {self.start_time.strftime('%Y-%m-%d %H:%M')}"
 
+    class Meta:
+        indexes = [
+            # An organizer's events (user_events), by start time
+            models.Index(fields=["organizer", "start_time"], name="event_organizer_start_idx"),
+            # Open or finished events around a time: equality column first, range column second
+            models.Index(fields=["is_complete", "start_time"], name="event_complete_start_idx"),
+            # Events in a state by start time: the open events listing and the scheduler's boundary scans
+            models.Index(fields=["state", "start_time"], name="event_state_start_idx"),
+            # Admin search by team name prefix
+            models.Index(fields=["team1"], name="event_team1_idx"),
+            models.Index(fields=["team2"], name="event_team2_idx"),
+        ]
+        constraints = [
+            # One event per fixture: imports (api/importing.py) upsert on it
+            models.UniqueConstraint(fields=["group", "team1", "team2", "start_time"], name="event_fixture_unique"),
+        ]
+
 class Participant(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="event_participants")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="event_participantions")
@@ -462,4 +564,97 @@ class Bet(models.Model):
         unique_together = ("user", "event")
         # index_together = ("user", "event") # no longer necesary since django v1.11
         ordering = ["-created_at"]  # newest bets first
-    
\ No newline at end of file
+        indexes = [
+            # Backs a user's bet history, newest first (see BetViewset.history)
+            models.Index(fields=["user", "-created_at"], name="bet_user_created_idx"),
+            # Settlement: an event's bets per team, and their amounts read from the
+            # index alone (InnoDB secondary indexes also carry the primary key)
+            models.Index(fields=["event", "team_choice", "bet_amount"], name="bet_event_team_amount_idx"),
+        ]
+    
+
+# Archive tables: settled events, their bets and participants are moved here
+# by `manage.py archive_events` (see api/archive.py), keeping their ids, so
+# the hot tables and their indexes only hold live data.
+
+class ArchivedEvent(models.Model):
+    """
+    A settled event moved out of the Event table. Same columns as Event.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    team1 = models.CharField(max_length=32)
+    team2 = models.CharField(max_length=32)
+    team1_score = models.IntegerField(null=True, blank=True)
+    team2_score = models.IntegerField(null=True, blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    is_complete = models.BooleanField(default=True)
+    organizer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    group = models.ForeignKey(
+        Group,
+        related_name="archived_events",
+        on_delete=models.CASCADE,
+    )
+    is_archived = models.BooleanField(default=True)
+    state = models.CharField(max_length=10, choices=Event.STATE_CHOICES, default=Event.ARCHIVED)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.team1} vs {self.team2} at {self.start_time.strftime('%Y-%m-%d %H:%M')} (archived)"
+
+
+class ArchivedBet(models.Model):
+    """
+    A bet of an archived event. Same columns as Bet.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="archived_bets",
+        on_delete=models.CASCADE,
+    )
+    event = models.ForeignKey(
+        ArchivedEvent,
+        related_name="bets",
+        on_delete=models.CASCADE,
+    )
+    team1_score = models.IntegerField(null=True, blank=True)
+    team2_score = models.IntegerField(null=True, blank=True)
+    team_choice = models.CharField(max_length=15, default="")
+    bet_type = models.CharField(max_length=4, choices=Bet.BET_TYPE_CHOICES, default="")
+    bet_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Copied from the bet, so not auto_now(_add)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    status = models.CharField(max_length=10)
+
+    def __str__(self):
+        return f"Archived bet {self.id} of user {self.user_id} - Status: {self.status}"
+
+    class Meta:
+        unique_together = ("user", "event")
+        ordering = ["-created_at"]
+        indexes = [
+            # Backs the archived part of a user's bet history, newest first
+            models.Index(fields=["user", "-created_at"], name="archived_bet_user_created_idx"),
+        ]
+
+
+class ArchivedParticipant(models.Model):
+    """
+    A participant of an archived event. Same columns as Participant.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(ArchivedEvent, on_delete=models.CASCADE, related_name="event_participants")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    bet = models.OneToOneField(
+        ArchivedBet, on_delete=models.CASCADE, related_name="participants", null=True, blank=True
+    )
+
+    class Meta:
+        unique_together = ("event", "user")
@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BetHistoryCursorPagination(CursorPagination):
+    """
+    Keyset pagination for a user's bet history, newest first.
+
+    The cursor encodes the last (created_at, id) position, so every page is
+    a range scan on the (user, created_at) index no matter how deep the
+    client pages, unlike LIMIT/OFFSET. Ties are broken by id ascending: the
+    index stores the primary key ascending after created_at, so the whole
+    order comes from it without a sort.
+    """
+    ordering = ("-created_at", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -0,0 +1,115 @@
+"""
+Pro-rata payouts in integer cents.
+
+An event's payout is a plain pro-rata split: every winning bet gets
+stake / winning stakes of the losing stakes (see api/settlement.py for when
+stakes are refunded instead). Working in integer cents makes the
+split exact: each share is rounded down, and the cents left over are handed
+out one each to the bets with the largest remainders (ties go to the earlier
+bet), so the shares always add up to exactly the pool.
+
+Stakes are held as int64 arrays, one entry per bet. With NumPy installed the
+split is vectorized (a million bets take milliseconds); without it, or when
+stake x pool could overflow int64, the same arithmetic runs on Python ints.
+Either way results are compact arrays (numpy.ndarray or array.array "q")
+aligned with the input; cents_array builds such an array straight from
+stakes already in cents, e.g. read from the database.
+"""
+import heapq
+from array import array
+from decimal import ROUND_HALF_UP, Decimal
+
+INT64_MAX = 2 ** 63 - 1
+
+_numpy = None
+
+
+def numpy_module():
+    """
+    NumPy if it is installed (imported on first use), else None.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def to_cents(amount):
+    return int((Decimal(amount or 0) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def cents_array(cents, count):
+    """
+    An int64 array of `count` amounts in cents from an iterable of ints,
+    without going through Decimal.
+    """
+    np = numpy_module()
+    if np is not None:
+        return np.fromiter(cents, dtype=np.int64, count=count)
+    return array("q", cents)
+
+
+def split_pro_rata(stakes, pool, use_numpy=None):
+    """
+    Split `pool` cents between `stakes` (cents) in proportion to them, with
+    largest-remainder rounding. Returns one share per stake, summing to `pool`
+    (or zeros when the stakes add up to nothing).
+    """
+    np = numpy_module() if use_numpy is not False else None
+    if np is not None:
+        stakes = np.asarray(stakes, dtype=np.int64)
+        if len(stakes) and int(stakes.max()) * pool <= INT64_MAX:
+            return _split_numpy(np, stakes, pool)
+    return _split_python(stakes, pool)
+
+
+def _split_numpy(np, stakes, pool):
+    total = int(stakes.sum())
+    if total == 0 or pool == 0:
+        return np.zeros(len(stakes), dtype=np.int64)
+    shares, remainders = np.divmod(stakes * pool, total)
+    leftover = pool - int(shares.sum())
+    if leftover:
+        # The `leftover` largest remainders, earlier bets first among equals, in O(n)
+        threshold = np.partition(remainders, len(remainders) - leftover)[len(remainders) - leftover]
+        above = np.flatnonzero(remainders > threshold)
+        at = np.flatnonzero(remainders == threshold)[:leftover - len(above)]
+        shares[above] += 1
+        shares[at] += 1
+    return shares
+
+
+def _split_python(stakes, pool):
+    stakes = [int(stake) for stake in stakes]
+    total = sum(stakes)
+    shares = array("q", bytes(8 * len(stakes)))
+    if total == 0 or pool == 0:
+        return shares
+    remainders = array("q") if total <= INT64_MAX else []
+    for index, stake in enumerate(stakes):
+        share, remainder = divmod(stake * pool, total)
+        shares[index] = share
+        remainders.append(remainder)
+    leftover = pool - sum(shares)
+    for index in heapq.nsmallest(leftover, range(len(stakes)), key=lambda index: (-remainders[index], index)):
+        shares[index] += 1
+    return shares
+
+
+def quote(amount, team_pool, other_pool):
+    """
+    What a new bet of `amount` cents on a team would win if that team won and
+    the pools (cents) stayed as they are: its share of the other team's pool,
+    rounded down (settlement can add a leftover cent).
+    """
+    if amount <= 0:
+        return 0
+    return amount * other_pool // (team_pool + amount)
@@ -0,0 +1,92 @@
+"""
+Moving event markets across their time boundaries (`manage.py schedule_markets`).
+
+Bets are checked against Event.state, so something has to move the state
+when the clock crosses a boundary:
+
+    scheduled -> open     MARKET_OPEN_SECONDS_BEFORE_START before the start
+                          (when that setting is None markets open on creation)
+    scheduled/open -> closed   at the start time
+
+Each transition is one conditional UPDATE per batch of events, found through
+the (state, start_time) index, so a thousand events starting at 20:00 close
+in one statement instead of a thousand saves. Settling, settled and archived
+are set by complete_event and archive_events.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import streaming
+from .models import Event
+
+BATCH_SIZE = 1000
+
+
+def _open_before():
+    seconds = getattr(settings, "MARKET_OPEN_SECONDS_BEFORE_START", None)
+    return None if seconds is None else timedelta(seconds=seconds)
+
+
+def _transition(queryset, from_states, to_state, batch_size):
+    """
+    Move the events of `queryset` from `from_states` to `to_state`, a batch
+    per transaction. Returns the number of events moved.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # Locked, so a concurrent complete_event can't be overwritten
+            event_ids = list(
+                queryset.filter(state__in=from_states)
+                .select_for_update(skip_locked=True)
+                .order_by("start_time")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not event_ids:
+                return moved
+            Event.objects.filter(id__in=event_ids, state__in=from_states).update(state=to_state)
+            streaming.publish_status_on_commit(event_ids, to_state)
+        moved += len(event_ids)
+
+
+def advance_markets(now=None, batch_size=BATCH_SIZE):
+    """
+    Open and close every market whose boundary has passed at `now`.
+    Returns the number of events moved to each state.
+    """
+    now = now or timezone.now()
+    open_before = _open_before()
+    if open_before is None:
+        opening = Event.objects.filter(start_time__gt=now)
+    else:
+        opening = Event.objects.filter(start_time__gt=now, start_time__lte=now + open_before)
+    return {
+        Event.CLOSED: _transition(
+            Event.objects.filter(start_time__lte=now), [Event.SCHEDULED, Event.OPEN], Event.CLOSED, batch_size
+        ),
+        Event.OPEN: _transition(opening, [Event.SCHEDULED], Event.OPEN, batch_size),
+    }
+
+
+def next_boundary(now=None):
+    """
+    When the next market opens or closes, or None if none is pending.
+    """
+    now = now or timezone.now()
+    boundaries = [
+        Event.objects.filter(state__in=[Event.SCHEDULED, Event.OPEN], start_time__gt=now)
+        .aggregate(Min("start_time"))["start_time__min"]
+    ]
+    open_before = _open_before()
+    if open_before is not None:
+        next_start = (
+            Event.objects.filter(state=Event.SCHEDULED, start_time__gt=now + open_before)
+            .aggregate(Min("start_time"))["start_time__min"]
+        )
+        boundaries.append(next_start and next_start - open_before)
+    boundaries = [boundary for boundary in boundaries if boundary is not None]
+    return min(boundaries, default=None)
@@ -0,0 +1,202 @@
+"""
+Synthetic data for benchmarks (`manage.py seed_bench`, benchmarks/endpoints.py).
+
+Rows are bulk-created, so model save() methods and signals don't run; the
+rows they would have created (Participant, BettingStats, stake LedgerEntry)
+are bulk-created here as well. Everything is named with the "bench" prefix
+so it can be told apart from (and cleared without touching) real data.
+
+Ids are read back after each bulk insert, since MySQL doesn't return them.
+
+Bets are skewed the way real traffic is: event popularity follows a Zipf
+distribution, so a few hot events hold most of the bets.
+"""
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import BettingStats, CustomUser, LedgerEntry
+from .models import Bet, Event, Group, Member, Participant, market_state
+
+PREFIX = "bench"
+PASSWORD = "bench-password"
+BATCH_SIZE = 2000
+
+# name: (users, groups, events, bets)
+SIZES = {
+    "small": (100, 5, 20, 1_000),
+    "medium": (1_000, 20, 200, 20_000),
+    "large": (10_000, 50, 1_000, 200_000),
+}
+
+TEAMS = ["Saiyans", "Namekians", "Androids", "Humans", "Frieza Force", "Pride Troopers", "Z Fighters", "Ginyu Force"]
+
+
+def clear_bench_data():
+    """
+    Delete the users and groups made by seed_bench_data (their events, bets,
+    members and ledger entries go with them).
+    """
+    with transaction.atomic():
+        Group.objects.filter(name__startswith=PREFIX.title()).delete()
+        CustomUser.objects.filter(username__startswith=f"{PREFIX}_").delete()
+
+
+def has_bench_data():
+    return CustomUser.objects.filter(username__startswith=f"{PREFIX}_").exists()
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+@transaction.atomic
+def seed_bench_data(users, groups, events, bets, seed=0, completed_share=0.2, hot_exponent=1.1):
+    """
+    Create `users` users, `groups` groups, `events` events and about `bets`
+    bets (no event gets more bets than there are users).
+
+    `completed_share` of the events are in the past and settled. Returns the
+    number of rows created per model.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+
+    CustomUser.objects.bulk_create(
+        [
+            CustomUser(
+                username=f"{PREFIX}_{index}",
+                email=f"{PREFIX}_{index}@bench.local",
+                password=password,
+                available_funds=Decimal("1000.00"),
+            )
+            for index in range(users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        CustomUser.objects.filter(username__startswith=f"{PREFIX}_").order_by("id").values_list("id", flat=True)
+    )
+
+    Group.objects.bulk_create(
+        [
+            Group(
+                name=f"{PREFIX.title()} Group {index}",
+                location="Bench",
+                description="Benchmark group",
+                user_id=rng.choice(user_ids),
+            )
+            for index in range(groups)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    group_rows = list(Group.objects.filter(name__startswith=f"{PREFIX.title()} Group ").order_by("id"))
+
+    # Group sizes are skewed too; every user is in at least one group
+    group_weights = zipf_weights(groups)
+    memberships = set()
+    for user_id in user_ids:
+        for group in rng.choices(group_rows, weights=group_weights, k=rng.randint(1, 3)):
+            memberships.add((user_id, group.id))
+    Member.objects.bulk_create(
+        [Member(user_id=user_id, group_id=group_id) for user_id, group_id in memberships], batch_size=BATCH_SIZE
+    )
+
+    event_rows = []
+    for index in range(events):
+        completed = rng.random() < completed_share
+        if completed:
+            start = now - timedelta(days=rng.randint(1, 60), hours=rng.randint(0, 23))
+        else:
+            start = now + timedelta(days=rng.randint(1, 30), hours=rng.randint(0, 23))
+        # Offset by the index so no two events share a start (group, teams and start are unique)
+        start += timedelta(seconds=index)
+        team1, team2 = rng.sample(TEAMS, 2)
+        event_rows.append(
+            Event(
+                group=rng.choice(group_rows),
+                organizer_id=rng.choice(user_ids),
+                team1=team1,
+                team2=team2,
+                start_time=start,
+                end_time=start + timedelta(hours=2),
+                is_complete=completed,
+                # bulk_create skips Event.save, which keeps the state
+                state=Event.SETTLED if completed else market_state(start, now),
+            )
+        )
+    Event.objects.bulk_create(event_rows, batch_size=BATCH_SIZE)
+    event_rows = list(Event.objects.filter(group__in=group_rows).order_by("id"))
+
+    # Hot events first in the weights, in random order among the events
+    ranked_events = rng.sample(event_rows, len(event_rows))
+    weights = zipf_weights(len(ranked_events), hot_exponent)
+    remaining_bets, remaining_weight = bets, sum(weights)
+
+    bet_rows = []
+    stats = defaultdict(lambda: {"open_stake": Decimal("0"), "lifetime_wagered": Decimal("0"),
+                                 "amount_lost": Decimal("0"), "bets_won": 0, "bets_lost": 0})
+    for event, weight in zip(ranked_events, weights):
+        # Bets that don't fit on a full event go to the events after it
+        count = min(users, round(remaining_bets * weight / remaining_weight))
+        remaining_bets -= count
+        remaining_weight -= weight
+        winning_team = rng.choice(["Team 1", "Team 2"]) if event.is_complete else None
+        for user_id in rng.sample(user_ids, count):
+            amount = Decimal(rng.choice([5, 10, 10, 20, 25, 50, 100]))
+            team_choice = rng.choice(["Team 1", "Team 2"])
+            user_stats = stats[user_id]
+            user_stats["lifetime_wagered"] += amount
+            if winning_team is None:
+                bet_status = "Pending"
+                user_stats["open_stake"] += amount
+            elif team_choice == winning_team:
+                bet_status = "Won"
+                user_stats["bets_won"] += 1
+            else:
+                bet_status = "Lost"
+                user_stats["bets_lost"] += 1
+                user_stats["amount_lost"] += amount
+            bet_rows.append(
+                Bet(
+                    user_id=user_id,
+                    event_id=event.id,
+                    team_choice=team_choice,
+                    bet_type=rng.choice(["Win", "Win", "Win", "Lose"]),
+                    bet_amount=amount,
+                    status=bet_status,
+                )
+            )
+    Bet.objects.bulk_create(bet_rows, batch_size=BATCH_SIZE)
+    bet_rows = list(
+        Bet.objects.filter(event__in=event_rows).order_by().values_list("id", "user_id", "event_id", "bet_amount")
+    )
+
+    Participant.objects.bulk_create(
+        [Participant(event_id=event_id, user_id=user_id, bet_id=bet_id) for bet_id, user_id, event_id, _ in bet_rows],
+        batch_size=BATCH_SIZE,
+    )
+    LedgerEntry.objects.bulk_create(
+        [
+            LedgerEntry(user_id=user_id, kind=LedgerEntry.STAKE, amount=-amount, bet_id=bet_id)
+            for bet_id, user_id, _, amount in bet_rows
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    BettingStats.objects.bulk_create(
+        [BettingStats(user_id=user_id, **stats.get(user_id, {})) for user_id in user_ids], batch_size=BATCH_SIZE
+    )
+
+    return {
+        "users": len(user_ids),
+        "groups": len(group_rows),
+        "members": len(memberships),
+        "events": len(event_rows),
+        "bets": len(bet_rows),
+    }
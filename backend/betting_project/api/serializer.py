@@ -1,9 +1,9 @@
 import re
+from decimal import Decimal
 from django.forms import ValidationError
 from rest_framework import serializers
 from users.serializer import UserSerializer
-from .models import Group, Event, Member, Bet, Participant
-from django.utils import timezone
+from .models import ArchivedBet, Group, Event, Member, Bet, Participant, potential_winnings
 from .serializer_mixins.mixins import BannerImageMixin
 
 
@@ -33,6 +33,7 @@ class EventSerializer(serializers.ModelSerializer):
             "group",
             "group_id",
             "is_complete",
+            "state",
             "participants_bets_and_winnings",
             "num_participants",
         )
@@ -60,6 +61,15 @@ class EventSerializer(serializers.ModelSerializer):
         except Group.DoesNotExist:
             raise ValidationError({"group_id": "This event already exist"})
         
+        # One event per fixture (see the event_fixture_unique constraint)
+        if Event.all_objects.filter(
+            group=group,
+            team1=validated_data["team1"].title(),
+            team2=validated_data["team2"].title(),
+            start_time=validated_data["start_time"],
+        ).exists():
+            raise serializers.ValidationError({"detail": "This event already exists in the group."})
+
         # Add group to validated data and create the Event instance
         validated_data['group'] = group
         event = Event.objects.create(**validated_data)
@@ -90,9 +100,24 @@ class EventSerializer(serializers.ModelSerializer):
         return instance
 
     def get_participants_bets_and_winnings(self, obj):
+        # Only the organizer sees everyone's bets; other users get their own
+        # (the quote endpoint answers what a new bet would win)
+        if "user" in self.context:
+            user = self.context["user"]
+        else:
+            user = getattr(self.context.get("request"), "user", None)
+        usernames = None
+        if user is None or not user.is_authenticated or user.id != obj.organizer_id:
+            username = getattr(user, "username", None)
+            usernames = {username} if username else set()
+        # Callers that loaded the bets of all their events up front pass them
+        # as context["bets_by_event"], {event_id: [(username, team_choice, bet_amount), ...]}
+        bets_by_event = self.context.get("bets_by_event")
+        if bets_by_event is not None:
+            return potential_winnings(bets_by_event.get(obj.id, []), obj.team1, obj.team2, usernames)
         # obj is an instance of the Event model
         # calculate_potential_winnings i called on the instance. 
-        return obj.calculate_potential_winnings()
+        return obj.calculate_potential_winnings(usernames)
         
 class EventBriefSerializer(serializers.ModelSerializer):
     group = GroupBriefSerializer(read_only=True)
@@ -112,6 +137,14 @@ class EventBriefSerializer(serializers.ModelSerializer):
             "group",
         )
 
+class QuoteSerializer(serializers.Serializer):
+    """
+    The query of GET /api/events/<id>/quote/: the team to bet on, as a bet's
+    team_choice ("Team 1" or "Team 2"), and the amount.
+    """
+    team = serializers.ChoiceField(choices=["Team 1", "Team 2"])
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0.01"))
+
 class MemberSerializer(serializers.ModelSerializer):
     user = UserSerializer(many=False)
 
@@ -171,7 +204,7 @@ class BetSerializer(serializers.ModelSerializer):
     def validate_event_id(self, value):
         try:
             event = Event.objects.get(pk=value)
-            if event.start_time <= timezone.now():
+            if not event.accepts_bets:
                 raise serializers.ValidationError("Cannot place a bet on an event that has already started.")
             return value
         except Event.DoesNotExist:
@@ -193,13 +226,9 @@ class BetSerializer(serializers.ModelSerializer):
         except Event.DoesNotExist:
             raise serializers.ValidationError({"event_id": "This event does not exist"})
         
-        current_time = timezone.now()
-
-        # Check if the event has started or ended
-        if event.start_time <= current_time:
+        # Check the event's market is open: not started, ended or settled
+        if not event.accepts_bets:
             raise serializers.ValidationError("Cannot place a bet on an event that has already started")
-        if hasattr(event, "end_time") and event.end_time and event.end_time <= current_time:
-            raise serializers.ValidationError("Cannot place bet on an event that has already ended")
         
         return data
 
@@ -215,6 +244,57 @@ class BetSerializer(serializers.ModelSerializer):
         # Now call the superclass method on the handle actual object creation
         return super().create(validated_data)
 
+class BetHistorySerializer(serializers.ModelSerializer):
+    """
+    Flat, read-only bet row for the bet history endpoint.
+
+    Only reads columns of the bet, its event and the event's group, so a page
+    of history is one query with select_related("event__group"), and never
+    computes the event's potential winnings like BetSerializer does.
+    """
+    event_id = serializers.IntegerField(read_only=True)
+    team1 = serializers.CharField(source="event.team1", read_only=True)
+    team2 = serializers.CharField(source="event.team2", read_only=True)
+    event_start_time = serializers.DateTimeField(source="event.start_time", read_only=True)
+    event_is_complete = serializers.BooleanField(source="event.is_complete", read_only=True)
+    group_id = serializers.IntegerField(source="event.group_id", read_only=True)
+    group_name = serializers.CharField(source="event.group.name", read_only=True)
+    chosen_team_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Bet
+        fields = [
+            "id",
+            "event_id",
+            "team1",
+            "team2",
+            "event_start_time",
+            "event_is_complete",
+            "group_id",
+            "group_name",
+            "team_choice",
+            "chosen_team_name",
+            "bet_type",
+            "bet_amount",
+            "status",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+    def get_chosen_team_name(self, bet):
+        if bet.team_choice == "Team 1":
+            return bet.event.team1
+        if bet.team_choice == "Team 2":
+            return bet.event.team2
+        return None
+
+class ArchivedBetHistorySerializer(BetHistorySerializer):
+    """
+    BetHistorySerializer rows for bets of archived events.
+    """
+    class Meta(BetHistorySerializer.Meta):
+        model = ArchivedBet
+
 class ParticipantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Participant
@@ -0,0 +1,293 @@
+"""
+Settling, voiding and archiving events: the batch jobs behind the Event
+admin actions (see api/admin.py). Settling is also how
+EventViewset.complete_event settles its one event, so payouts, bet
+statuses, betting stats and ledger entries have a single implementation.
+
+A job works through its events in chunks, one transaction per chunk. Every
+chunk is set-based: the bets of all its events are read in one query, and
+funds, betting stats, ledger entries, bet statuses and event states are each
+written with one statement per chunk, however many events and bets it holds.
+
+Settling:
+
+- a lone bet, or an event nobody (or everybody) bet on the winner of: every
+  stake is refunded;
+- otherwise each winning bet gets a share of the losing stakes in
+  proportion to its stake, split in whole cents so the shares add up to
+  exactly the losing stakes (see api/payouts.py);
+- bets on the winning team (by its "Team 1"/"Team 2" label) are marked
+  Won, all others Lost.
+
+Voiding refunds every stake. Each job returns one result per event
+({"event_id", "event", "result", "detail"}) and calls progress(done, total)
+after every chunk. Settled and refunded events' results also hold "bets"
+(how many) and "winning_info", the payouts as complete_event reports them.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
+from django.db.models.functions import Cast, Round
+
+from users import ledger, stats
+from users.models import LedgerEntry
+from . import payouts, streaming
+from .archive import archive_chunk
+from .models import Bet, Event
+
+logger = logging.getLogger(__name__)
+# One line per bet; off by default, see LOGGING in settings
+bet_logger = logging.getLogger(f"{__name__}.bets")
+
+CustomUser = get_user_model()
+
+CHUNK_SIZE = 100
+
+SETTLED = "settled"
+REFUNDED = "refunded"
+VOIDED = "voided"
+ARCHIVED = "archived"
+SKIPPED = "skipped"
+
+NO_BETS = "No bets were placed on this event"
+
+
+def _result(event, result, detail="", **extra):
+    return {"event_id": event.id, "event": str(event), "result": result, "detail": detail, **extra}
+
+
+def _run(event_ids, job, chunk_size, progress, name):
+    results = []
+    event_ids = list(event_ids)
+    for start in range(0, len(event_ids), chunk_size):
+        results.extend(sorted(job(event_ids[start:start + chunk_size]), key=lambda result: result["event_id"]))
+        done = min(start + chunk_size, len(event_ids))
+        logger.info("%s: %s of %s events done", name, done, len(event_ids))
+        if progress is not None:
+            progress(done, len(event_ids))
+    return results
+
+
+def _lock_unsettled(event_ids):
+    """
+    Lock the given events for the rest of the transaction. Returns the
+    results of those that can't be settled any more, and the others by id.
+    """
+    events = {
+        event.id: event
+        for event in Event.objects.select_for_update().filter(id__in=event_ids).order_by("id")
+    }
+    results = []
+    for event_id in event_ids:
+        event = events.get(event_id)
+        if event is None:
+            results.append({"event_id": event_id, "event": "", "result": SKIPPED, "detail": "Event does not exist"})
+        elif event.is_complete or event.state in (Event.SETTLED, Event.ARCHIVED):
+            results.append(_result(events.pop(event_id), SKIPPED, "Event has already been completed"))
+    return results, events
+
+
+# Stakes in whole cents, computed by the database (rounded first: SQLite keeps decimals as floats)
+STAKE_CENTS = Cast(Round(F("bet_amount") * 100), BigIntegerField())
+
+
+def _bets_by_event(event_ids):
+    bets = defaultdict(list)
+    # Oldest first: leftover cents go to the earlier bets (see api/payouts.py)
+    for bet in (
+        Bet.objects.filter(event_id__in=event_ids)
+        .order_by("event_id", "id")
+        .values("id", "user_id", "user__username", "event_id", "team_choice", "bet_amount", stake_cents=STAKE_CENTS)
+    ):
+        bets[bet["event_id"]].append(bet)
+    return bets
+
+
+class _Credits:
+    """
+    The funds, stats and ledger changes of a chunk, written in one go.
+    """
+
+    def __init__(self):
+        self.funds = defaultdict(Decimal)
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self.entries = []
+
+    def refund(self, bet):
+        amount = Decimal(bet["bet_amount"] or 0)
+        self.funds[bet["user_id"]] += amount
+        self.stats[bet["user_id"]]["open_stake"] -= amount
+        self.entries.append(
+            LedgerEntry(user_id=bet["user_id"], kind=LedgerEntry.REFUND, amount=amount, bet_id=bet["id"])
+        )
+        bet_logger.debug("Refunded %s to user %s for bet %s", amount, bet["user_id"], bet["id"])
+
+    def win(self, bet, share):
+        self.funds[bet["user_id"]] += share
+        user_stats = self.stats[bet["user_id"]]
+        user_stats["open_stake"] -= Decimal(bet["bet_amount"] or 0)
+        user_stats["amount_won"] += share
+        user_stats["bets_won"] += 1
+        self.entries.append(
+            LedgerEntry(user_id=bet["user_id"], kind=LedgerEntry.PAYOUT, amount=share, bet_id=bet["id"])
+        )
+        bet_logger.debug("Distributed %s to user %s for bet ID %s", share, bet["user_id"], bet["id"])
+
+    def lose(self, bet):
+        amount = Decimal(bet["bet_amount"] or 0)
+        user_stats = self.stats[bet["user_id"]]
+        user_stats["open_stake"] -= amount
+        user_stats["amount_lost"] += amount
+        user_stats["bets_lost"] += 1
+
+    def write(self):
+        if self.funds:
+            funds_field = CustomUser._meta.get_field("available_funds")
+            CustomUser.objects.filter(pk__in=self.funds).update(
+                available_funds=F("available_funds") + Case(
+                    *[When(pk=user_id, then=Value(amount, output_field=funds_field))
+                      for user_id, amount in self.funds.items()],
+                    default=Value(Decimal("0.00"), output_field=funds_field),
+                )
+            )
+        stats.apply_many(self.stats)
+        ledger.record_many(self.entries)
+
+
+def _team_label(event, winning_team):
+    if winning_team == event.team1:
+        return "Team 1"
+    if winning_team == event.team2:
+        return "Team 2"
+    return None
+
+
+@transaction.atomic
+def _settle_chunk(winners):
+    results, events = _lock_unsettled(list(winners))
+    labels = {}
+    for event_id, event in list(events.items()):
+        labels[event_id] = _team_label(event, winners[event_id])
+        if labels[event_id] is None:
+            results.append(_result(events.pop(event_id), SKIPPED, "Invalid winning team"))
+            del labels[event_id]
+
+    bets_by_event = _bets_by_event(list(events))
+    credits = _Credits()
+    settled = []
+    for event_id, event in events.items():
+        bets = bets_by_event.get(event_id)
+        if not bets:
+            results.append(_result(event, SKIPPED, NO_BETS))
+            continue
+        winning = [bet for bet in bets if bet["team_choice"] == labels[event_id]]
+        pools = defaultdict(int)
+        for bet in bets:
+            pools[bet["team_choice"]] += bet["stake_cents"] or 0
+        total = sum(pools.values())
+        if len(bets) == 1 or not winning or len(winning) == len(bets):
+            for bet in bets:
+                credits.refund(bet)
+            winning_info = [{"message": "Bets refunded", "refunded_bets": [bet["id"] for bet in bets]}]
+            results.append(
+                _result(event, REFUNDED, f"{len(bets)} bets refunded", bets=len(bets), winning_info=winning_info)
+            )
+        else:
+            winning_cents = payouts.cents_array((bet["stake_cents"] or 0 for bet in winning), len(winning))
+            shares = payouts.split_pro_rata(winning_cents, total - pools[labels[event_id]])
+            winning_info = []
+            for bet, share in zip(winning, shares):
+                share = payouts.from_cents(share)
+                credits.win(bet, share)
+                winning_info.append({"username": bet["user__username"], "winning_amount": share})
+            for bet in bets:
+                if bet["team_choice"] != labels[event_id]:
+                    credits.lose(bet)
+            results.append(
+                _result(
+                    event, SETTLED, f"{len(winning)} of {len(bets)} bets won",
+                    bets=len(bets), winning_info=winning_info,
+                )
+            )
+        settled.append(event_id)
+        streaming.publish_settled_on_commit(event_id, winners[event_id], payouts.from_cents(total), len(bets))
+
+    credits.write()
+    if settled:
+        # Won or Lost by the event's winner (refunded events included)
+        won = Q()
+        for event_id in settled:
+            won |= Q(event_id=event_id, team_choice=labels[event_id])
+        Bet.objects.filter(event_id__in=settled).update(
+            status=Case(When(won, then=Value("Won")), default=Value("Lost"))
+        )
+        Event.objects.filter(id__in=settled).update(is_complete=True, state=Event.SETTLED)
+    return results
+
+
+@transaction.atomic
+def _void_chunk(event_ids):
+    results, events = _lock_unsettled(event_ids)
+    bets_by_event = _bets_by_event(list(events))
+    credits = _Credits()
+    for event_id, event in events.items():
+        bets = bets_by_event.get(event_id, [])
+        for bet in bets:
+            credits.refund(bet)
+        results.append(_result(event, VOIDED, f"{len(bets)} bets refunded"))
+        total = sum(Decimal(bet["bet_amount"] or 0) for bet in bets)
+        streaming.publish_settled_on_commit(event_id, None, total, len(bets))
+
+    credits.write()
+    Bet.objects.filter(event_id__in=events).update(status="Refunded")
+    Event.objects.filter(id__in=events).update(is_complete=True, state=Event.SETTLED)
+    return results
+
+
+def _archive_chunk(event_ids):
+    events = {event.id: event for event in Event.objects.filter(id__in=event_ids)}
+    settled = [event_id for event_id, event in events.items() if event.is_complete]
+    if settled:
+        archive_chunk(settled)
+    results = []
+    for event_id in event_ids:
+        event = events.get(event_id)
+        if event is None:
+            results.append({"event_id": event_id, "event": "", "result": SKIPPED, "detail": "Event does not exist"})
+        elif event_id in settled:
+            results.append(_result(event, ARCHIVED))
+        else:
+            results.append(_result(event, SKIPPED, "Only settled events can be archived"))
+    return results
+
+
+def settle_events(winners, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Settle events with the given winners, {event_id: winning team name}.
+    """
+    return _run(
+        sorted(winners),
+        lambda event_ids: _settle_chunk({event_id: winners[event_id] for event_id in event_ids}),
+        chunk_size,
+        progress,
+        "Settling",
+    )
+
+
+def void_events(event_ids, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Call off unsettled events: every stake is refunded and the bets are
+    marked Refunded.
+    """
+    return _run(sorted(event_ids), _void_chunk, chunk_size, progress, "Voiding")
+
+
+def archive_events(event_ids, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Move settled events with their bets to the archive tables (see api/archive.py).
+    """
+    return _run(sorted(event_ids), _archive_chunk, chunk_size, progress, "Archiving")
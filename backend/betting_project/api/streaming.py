@@ -0,0 +1,162 @@
+"""
+Live event updates, pushed to clients over server-sent events (see
+views/stream_views.py) through betting_project.pubsub.
+
+Every message goes to the event's channel ("event:<id>") and to "events"
+(every event). Message types:
+
+    pool      the event's betting pool changed: totals per team and bet count
+    status    the event's market changed state (see Event.state), e.g. closed
+              at the start time
+    settled   the event was completed: winning team and pool
+    snapshot  sent by the stream itself on connect: state and pool
+
+Every message is published after the transaction that made the change
+commits: bet and settlement messages by the views, state changes by the
+market scheduler (api/scheduler.py).
+
+Pools are also cached for bet quotes (cached_pool) in the POOL_CACHE cache,
+which every worker process must share (e.g. Redis, see EVENT_POOL_CACHE_URL
+in settings): a pool refreshed by a bet on one worker would stay stale on
+the others. check_pool_cache makes `manage.py check` fail when the stream
+runs across processes (a shared PUBSUB backend) without one.
+"""
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from betting_project.db.replicas import PROCESS_LOCAL_CACHES
+from betting_project.pubsub import DEFAULT_PUBSUB, broker, get_pubsub_settings
+from .models import Bet
+
+logger = logging.getLogger(__name__)
+
+ALL_EVENTS = "events"
+
+SETTLED = "settled"
+
+POOL_CACHE = "event_pools"
+
+
+def event_channel(event_id):
+    return f"event:{event_id}"
+
+
+def _pools_queryset(event_ids):
+    return (
+        Bet.objects.filter(event_id__in=event_ids)
+        .order_by()
+        .values("event_id", "team_choice")
+        .annotate(total=Sum("bet_amount"), bets=Count("id"))
+    )
+
+
+def _pools_from_rows(event_ids, rows):
+    pools = {
+        event_id: {"pools": {"Team 1": Decimal("0.00"), "Team 2": Decimal("0.00")}, "bets": 0}
+        for event_id in event_ids
+    }
+    for row in rows:
+        pool = pools[row["event_id"]]
+        pool["pools"][row["team_choice"]] = row["total"] or Decimal("0.00")
+        pool["bets"] += row["bets"]
+    # Amounts as strings, like the API renders decimals
+    for pool in pools.values():
+        pool["pools"] = {team: f"{amount:.2f}" for team, amount in pool["pools"].items()}
+    return pools
+
+
+def pools(event_ids):
+    """
+    {event_id: {"pools": {"Team 1": "10.00", ...}, "bets": n}} in one query.
+    """
+    return _pools_from_rows(event_ids, _pools_queryset(event_ids))
+
+
+async def apools(event_ids):
+    return _pools_from_rows(event_ids, [row async for row in _pools_queryset(event_ids)])
+
+
+def _pool_cache_key(event_id):
+    return f"event-pool:{event_id}"
+
+
+def cached_pool(event_id):
+    """
+    The event's pool as pools() returns it, from the cache; a miss costs one
+    query. Kept fresh by publish_pool_on_commit, and for at most
+    EVENT_POOL_CACHE_SECONDS after writes that don't go through it.
+    """
+    pool = caches[POOL_CACHE].get(_pool_cache_key(event_id))
+    if pool is None:
+        pool = pools([event_id])[event_id]
+        caches[POOL_CACHE].set(_pool_cache_key(event_id), pool, settings.EVENT_POOL_CACHE_SECONDS)
+    return pool
+
+
+def check_pool_cache(app_configs=None, **kwargs):
+    """
+    System check: with several worker processes, cached pools need a cache
+    shared by every worker.
+    """
+    if get_pubsub_settings()["BACKEND"] == DEFAULT_PUBSUB["BACKEND"]:
+        return []
+    backend = settings.CACHES.get(POOL_CACHE, {}).get("BACKEND")
+    if backend is None or backend in PROCESS_LOCAL_CACHES:
+        return [
+            checks.Error(
+                f"A shared PUBSUB backend needs a shared {POOL_CACHE!r} cache (e.g. Redis) for bet quotes.",
+                hint="Set EVENT_POOL_CACHE_URL, or configure CACHES[\"event_pools\"] with a shared backend.",
+                id="api.E001",
+            )
+        ]
+    return []
+
+
+def _publish(event_id, message_type, data):
+    message = {"type": message_type, "data": {"event_id": event_id, **data}}
+    try:
+        broker.publish(event_channel(event_id), message)
+        broker.publish(ALL_EVENTS, message)
+    except Exception:
+        # Clients catch up on reconnect; never fail the write that triggered this
+        logger.exception("Could not publish %s for event %s", message_type, event_id)
+
+
+def publish_pool_on_commit(event_id):
+    """
+    Publish the event's new pool, and cache it for cached_pool(), once the
+    current transaction commits.
+    """
+    def publish():
+        pool = pools([event_id])[event_id]
+        caches[POOL_CACHE].set(_pool_cache_key(event_id), pool, settings.EVENT_POOL_CACHE_SECONDS)
+        _publish(event_id, "pool", pool)
+
+    transaction.on_commit(publish)
+
+
+def publish_settled_on_commit(event_id, winning_team, total_pool, bet_count):
+    transaction.on_commit(
+        lambda: _publish(
+            event_id,
+            SETTLED,
+            {"winning_team": winning_team, "total_pool": f"{Decimal(total_pool):.2f}", "bets": bet_count},
+        )
+    )
+
+
+def publish_status_on_commit(event_ids, state):
+    """
+    Publish the new state of the events once the current transaction commits.
+    """
+    def publish():
+        for event_id in event_ids:
+            _publish(event_id, "status", {"status": state})
+
+    transaction.on_commit(publish)
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import ArchivedBet, ArchivedEvent, ArchivedParticipant, Bet, Event, Group, Participant
+from users import ledger
+from users.models import CustomUser, LedgerEntry
+from users.statement import iter_ledger_entries, statement_csv_lines
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.commands.test_archive_events
+
+
+class ArchiveEventsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.goku = CustomUser.objects.create_user(username="goku", email="goku@capsule.com", password="Kamehameha1")
+        cls.vegeta = CustomUser.objects.create_user(username="vegeta", email="vegeta@capsule.com", password="FinalFlash1")
+        cls.group = Group.objects.create(name="Capsule Corp", location="West City", user=cls.goku)
+
+        now = timezone.now()
+        cls.old_events = [cls.make_event(now - timedelta(days=120 + index), is_complete=True) for index in range(2)]
+        cls.recent_event = cls.make_event(now - timedelta(days=10), is_complete=True)
+        cls.open_event = cls.make_event(now + timedelta(days=1), is_complete=False)
+        for event in [*cls.old_events, cls.recent_event, cls.open_event]:
+            for user, team in [(cls.goku, "Team 1"), (cls.vegeta, "Team 2")]:
+                bet = Bet.objects.create(
+                    user=user, event=event, team_choice=team, bet_type="Win", bet_amount=10,
+                    status="Won" if team == "Team 1" and event.is_complete else "Pending",
+                )
+                ledger.record_stake(bet)
+
+    @classmethod
+    def make_event(cls, end_time, is_complete):
+        return Event.objects.create(
+            group=cls.group,
+            organizer=cls.goku,
+            team1="Saiyans",
+            team2="Androids",
+            start_time=end_time - timedelta(hours=2),
+            end_time=end_time,
+            is_complete=is_complete,
+        )
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_events", *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_settled_events_with_their_bets(self):
+        old_ids = sorted(event.id for event in self.old_events)
+        old_bet_ids = sorted(Bet.objects.filter(event_id__in=old_ids).values_list("id", flat=True))
+
+        output = self.archive("--older-than", "90", "--chunk-size", "1")
+
+        self.assertIn("events: 2, bets: 4, participants: 4", output)
+        self.assertFalse(Event.all_objects.filter(id__in=old_ids).exists())
+        self.assertFalse(Bet.objects.filter(id__in=old_bet_ids).exists())
+        self.assertFalse(Participant.objects.filter(event_id__in=old_ids).exists())
+        # Same ids and columns in the archive tables
+        self.assertEqual(sorted(ArchivedEvent.objects.values_list("id", flat=True)), old_ids)
+        self.assertEqual(sorted(ArchivedBet.objects.values_list("id", flat=True)), old_bet_ids)
+        self.assertEqual(ArchivedParticipant.objects.filter(bet_id__in=old_bet_ids).count(), 4)
+        archived_bet = ArchivedBet.objects.get(user=self.goku, event_id=old_ids[0])
+        self.assertEqual((archived_bet.team_choice, archived_bet.status), ("Team 1", "Won"))
+        # Ledger entries follow their bets
+        self.assertEqual(
+            sorted(LedgerEntry.objects.filter(archived_bet__isnull=False).values_list("archived_bet_id", flat=True)),
+            old_bet_ids,
+        )
+
+        # Recent and open events stay in the hot tables
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertEqual(Bet.objects.count(), 4)
+
+    def test_limit(self):
+        self.assertIn("events: 1,", self.archive("--limit", "1"))
+        self.assertEqual(ArchivedEvent.objects.count(), 1)
+
+    def test_default_manager_hides_archived_events(self):
+        Event.all_objects.filter(pk=self.recent_event.pk).update(is_archived=True)
+        self.assertFalse(Event.objects.filter(pk=self.recent_event.pk).exists())
+        self.assertFalse(self.group.events.filter(pk=self.recent_event.pk).exists())
+        self.assertTrue(Event.all_objects.filter(pk=self.recent_event.pk).exists())
+
+    def test_archived_bets_are_read_from_the_archive(self):
+        self.archive()
+        client = APIClient()
+        client.force_authenticate(user=self.goku)
+
+        response = client.get(reverse("bet-archived-history"))
+        self.assertEqual(response.status_code, 200)
+        rows = response.data["results"]
+        self.assertEqual(sorted(row["event_id"] for row in rows), sorted(event.id for event in self.old_events))
+        self.assertEqual(rows[0]["chosen_team_name"], "Saiyans")
+        self.assertEqual(rows[0]["group_name"], "Capsule Corp")
+
+        response = client.get(reverse("bet-history"))
+        self.assertEqual(len(response.data["results"]), 2)
+
+        # Statements still show the archived bets
+        lines = list(statement_csv_lines(iter_ledger_entries(self.goku.id)))
+        self.assertEqual(sum("Saiyans vs Androids" in line for line in lines), 4)
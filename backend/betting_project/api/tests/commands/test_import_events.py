@@ -0,0 +1,108 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from api.models import Event, Group
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.commands.test_import_events
+
+
+class ImportEventsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = CustomUser.objects.create_user(
+            username="supreme", email="supreme@kai.com", password="Potara1234"
+        )
+        cls.group = Group.objects.create(name="Kaioshin", location="Sacred World", user=cls.organizer)
+        cls.start = datetime(2030, 5, 1, 18, 0, tzinfo=dt_timezone.utc)
+
+    def write(self, suffix, text):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as schedule:
+            schedule.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def csv_schedule(self, count, hours=2, group_id=None):
+        lines = ["group_id,team1,team2,start_time,end_time"]
+        for index in range(count):
+            start = self.start + timedelta(days=index)
+            lines.append(
+                f"{group_id or self.group.id},east kaio,west kaio {index},{start.isoformat()},"
+                f"{(start + timedelta(hours=hours)).isoformat()}"
+            )
+        return self.write(".csv", "\n".join(lines) + "\n")
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command("import_events", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_csv_import_then_upsert(self):
+        output = self.run_import(self.csv_schedule(3), "--organizer", "supreme@kai.com")
+        self.assertIn("Created 3, updated 0", output)
+        event = Event.objects.get(team2="West Kaio 0")
+        self.assertEqual(
+            (event.team1, event.start_time, event.state, event.organizer), ("East Kaio", self.start, "open", self.organizer)
+        )
+
+        # The same fixtures again: no duplicates, the new end times win, the organizer is kept
+        output = self.run_import(self.csv_schedule(4, hours=3))
+        self.assertIn("Created 1, updated 3", output)
+        self.assertEqual(Event.objects.count(), 4)
+        event.refresh_from_db()
+        self.assertEqual((event.end_time, event.organizer), (self.start + timedelta(hours=3), self.organizer))
+
+    def test_jsonl_and_invalid_rows_import_nothing(self):
+        start = self.start.isoformat()
+        path = self.write(
+            ".jsonl",
+            f'{{"group_id": {self.group.id}, "team1": "Goku", "team2": "Hit", "start_time": "{start}", '
+            f'"end_time": "{start}"}}\n'
+            f'{{"group_id": 999, "team1": "Goku", "team2": "Jiren", "start_time": "{start}", '
+            f'"end_time": "2030-05-02T00:00:00Z"}}\n'
+            "not json\n",
+        )
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, "Nothing imported: 3 invalid rows"):
+            call_command("import_events", path, stdout=StringIO(), stderr=err)
+        self.assertIn("line 1: {'end_time'", err.getvalue())
+        self.assertIn("line 2: {'group_id'", err.getvalue())
+        self.assertIn("line 3: {'detail': 'Invalid JSON", err.getvalue())
+        self.assertFalse(Event.objects.exists())
+
+    def test_queries_do_not_grow_with_the_rows(self):
+        def queries(count):
+            with CaptureQueriesContext(connection) as captured:
+                self.run_import(self.csv_schedule(count), "--batch-size", "1000")
+            return len(captured)
+
+        # (SQLite caps the variables of one statement, so stay under ~70 rows per INSERT)
+        self.assertEqual(queries(5), queries(60))
+        self.assertEqual(Event.objects.count(), 60)
+
+    def test_reimport_keeps_the_organizer(self):
+        self.run_import(self.csv_schedule(1), "--organizer", "supreme@kai.com")
+        CustomUser.objects.create_user(username="beerus", email="beerus@god.com", password="Hakai12345")
+        output = self.run_import(self.csv_schedule(2), "--organizer", "beerus@god.com")
+        self.assertIn("Created 1, updated 1", output)
+        self.assertEqual(Event.objects.get(team2="West Kaio 0").organizer, self.organizer)
+        self.assertEqual(Event.objects.get(team2="West Kaio 1").organizer.username, "beerus")
+
+    def test_upsert_without_a_conflict_target(self):
+        # MySQL can't name the conflict target: unique_fields must not be passed there
+        with mock.patch.object(connection.features, "supports_update_conflicts_with_target", False), \
+                mock.patch.object(QuerySet, "bulk_create") as bulk_create:
+            self.run_import(self.csv_schedule(2))
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertIsNone(bulk_create.call_args.kwargs["unique_fields"])
+        self.assertEqual(bulk_create.call_args.kwargs["update_fields"], ["end_time"])
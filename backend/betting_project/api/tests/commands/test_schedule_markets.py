@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import Event, Group
+from api.scheduler import advance_markets, next_boundary
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.commands.test_schedule_markets
+
+
+class ScheduleMarketsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bulma = CustomUser.objects.create_user(
+            username="bulma", email="bulma@capsule.com", password="Capsule123", available_funds=100
+        )
+        cls.group = Group.objects.create(name="Capsule Corp", location="West City", user=cls.bulma)
+
+    def make_event(self, start_time, **kwargs):
+        return Event.objects.create(
+            group=self.group,
+            organizer=self.bulma,
+            team1="Saiyans",
+            team2="Namekians",
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=2),
+            **kwargs,
+        )
+
+    def states(self, *events):
+        return [Event.all_objects.get(pk=event.pk).state for event in events]
+
+    def test_state_follows_start_time_on_save(self):
+        now = timezone.now()
+        self.assertEqual(self.make_event(now + timedelta(days=1)).state, Event.OPEN)
+        self.assertEqual(self.make_event(now - timedelta(hours=1)).state, Event.CLOSED)
+        self.assertEqual(self.make_event(now - timedelta(hours=2), is_complete=True).state, Event.SETTLED)
+
+    def test_closes_started_markets_in_bulk(self):
+        now = timezone.now()
+        starting = [self.make_event(now + timedelta(minutes=minutes)) for minutes in (1, 2, 3)]
+        later = self.make_event(now + timedelta(days=1))
+        settling = self.make_event(now + timedelta(seconds=90))
+        Event.objects.filter(pk=settling.pk).update(state=Event.SETTLING)
+
+        with CaptureQueriesContext(connection) as queries:
+            counts = advance_markets(now + timedelta(minutes=5), batch_size=2)
+
+        # One UPDATE per batch, not one per event
+        self.assertEqual(sum(query["sql"].startswith("UPDATE") for query in queries.captured_queries), 2)
+
+        self.assertEqual(counts, {Event.CLOSED: 3, Event.OPEN: 0})
+        self.assertEqual(self.states(*starting, later, settling), [Event.CLOSED] * 3 + [Event.OPEN, Event.SETTLING])
+
+    @override_settings(MARKET_OPEN_SECONDS_BEFORE_START=3600)
+    def test_opens_scheduled_markets(self):
+        now = timezone.now()
+        event = self.make_event(now + timedelta(hours=3))
+        self.assertEqual(event.state, Event.SCHEDULED)
+        self.assertEqual(next_boundary(now), event.start_time - timedelta(hours=1))
+
+        self.assertEqual(advance_markets(now + timedelta(hours=1))[Event.OPEN], 0)
+        self.assertEqual(advance_markets(now + timedelta(hours=2, minutes=1))[Event.OPEN], 1)
+        self.assertEqual(self.states(event), [Event.OPEN])
+        self.assertEqual(next_boundary(now + timedelta(hours=2, minutes=1)), event.start_time)
+
+    def test_bets_are_refused_once_closed(self):
+        event = self.make_event(timezone.now() + timedelta(days=1))
+        Event.objects.filter(pk=event.pk).update(state=Event.CLOSED)
+        client = APIClient()
+        client.force_authenticate(user=self.bulma)
+        response = client.post(
+            reverse("bet-list"),
+            {"user": self.bulma.id, "event_id": event.id, "team_choice": "Team 1", "bet_type": "Win",
+             "bet_amount": 10},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_and_state_filter(self):
+        event = self.make_event(timezone.now() + timedelta(days=1))
+        Event.objects.filter(pk=event.pk).update(start_time=timezone.now() - timedelta(minutes=1))
+        out = StringIO()
+        call_command("schedule_markets", stdout=out)
+        self.assertIn("closed: 1", out.getvalue())
+
+        response = APIClient().get(reverse("event-list"), {"state": "closed"})
+        self.assertEqual([row["id"] for row in response.data], [event.id])
+        self.assertEqual(response.data[0]["state"], "closed")
+        self.assertEqual(APIClient().get(reverse("event-list"), {"state": "later"}).status_code, 400)
@@ -0,0 +1,43 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+from api.models import Bet, Event, Group, Participant
+from users.models import BettingStats, CustomUser, LedgerEntry
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.commands.test_seed_bench
+
+
+class SeedBenchTestCase(TestCase):
+    def seed(self, *args):
+        out = StringIO()
+        call_command("seed_bench", "--users", "50", "--groups", "3", "--events", "10", "--bets", "200", *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_skewed_consistent_data(self):
+        self.assertIn("bets: 200", self.seed())
+
+        self.assertEqual(CustomUser.objects.filter(username__startswith="bench_").count(), 50)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Event.objects.count(), 10)
+        self.assertEqual(Bet.objects.count(), 200)
+        # The rows Bet.save and the user post_save signal would have made
+        self.assertEqual(Participant.objects.count(), 200)
+        self.assertEqual(LedgerEntry.objects.filter(kind=LedgerEntry.STAKE).count(), 200)
+        self.assertEqual(BettingStats.objects.count(), 50)
+
+        # A few hot events hold most of the bets
+        counts = list(
+            Event.objects.annotate(bet_count=Count("bets")).order_by("-bet_count").values_list("bet_count", flat=True)
+        )
+        self.assertGreater(sum(counts[:3]), sum(counts) / 2)
+
+    def test_refuses_to_seed_twice_without_clear(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed("--clear", "--seed", "1")
+        self.assertEqual(Bet.objects.count(), 200)
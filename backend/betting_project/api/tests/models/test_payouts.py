@@ -0,0 +1,63 @@
+import random
+import time
+import unittest
+from decimal import Decimal
+from django.test import SimpleTestCase
+from api import payouts
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.models.test_payouts
+
+
+class SplitProRataTestCase(SimpleTestCase):
+    def split(self, stakes, pool, use_numpy=None):
+        return [int(share) for share in payouts.split_pro_rata(stakes, pool, use_numpy=use_numpy)]
+
+    def test_shares_add_up_to_the_pool(self):
+        # 100 cents between three equal stakes: 33 each, the spare cent to the first bet
+        self.assertEqual(self.split([500, 500, 500], 100), [34, 33, 33])
+        # Largest remainders get the leftover cents
+        self.assertEqual(self.split([1, 2, 4], 10), [1, 3, 6])
+        self.assertEqual(self.split([300, 100], 999), [749, 250])
+
+    def test_nothing_to_split(self):
+        self.assertEqual(self.split([100, 200], 0), [0, 0])
+        self.assertEqual(self.split([0, 0], 500), [0, 0])
+        self.assertEqual(self.split([], 500), [])
+
+    def test_numpy_and_python_agree(self):
+        if payouts.numpy_module() is None:
+            self.skipTest("NumPy is not installed")
+        rng = random.Random(49)
+        for _ in range(50):
+            stakes = [rng.randint(1, 100_000) for _ in range(rng.randint(1, 300))]
+            pool = rng.randint(0, 10_000_000)
+            shares = self.split(stakes, pool)
+            self.assertEqual(shares, self.split(stakes, pool, use_numpy=False))
+            self.assertEqual(sum(shares), pool if sum(stakes) else 0)
+
+    def test_huge_amounts_dont_overflow(self):
+        # stake x pool is past int64, so the split runs on Python ints
+        stakes = [9_999_999_999, 1]
+        pool = 10 ** 12 + 1
+        self.assertEqual(sum(self.split(stakes, pool)), pool)
+        self.assertEqual(self.split(stakes, pool), self.split(stakes, pool, use_numpy=False))
+
+    def test_cents(self):
+        self.assertEqual(payouts.to_cents(Decimal("12.345")), 1235)
+        self.assertEqual(payouts.to_cents(None), 0)
+        self.assertEqual(payouts.from_cents(1200), Decimal("12.00"))
+        self.assertEqual(list(payouts.cents_array(iter([1235, 0, 99]), 3)), [1235, 0, 99])
+
+    @unittest.skipIf(payouts.numpy_module() is None, "NumPy is not installed")
+    def test_a_million_bets(self):
+        np = payouts.numpy_module()
+        stakes = np.random.default_rng(49).integers(100, 1_000_000, size=1_000_000)
+        pool = int(stakes.sum()) // 3
+        started = time.perf_counter()
+        shares = payouts.split_pro_rata(stakes, pool)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(int(shares.sum()), pool)
+        # Milliseconds in practice; the bound leaves room for a busy test machine
+        self.assertLess(elapsed, 1)
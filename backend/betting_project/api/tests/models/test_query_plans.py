@@ -0,0 +1,74 @@
+from django.contrib import admin
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from api.models import Bet, Event, Group, Member, Participant
+from api.seeding import seed_bench_data
+from betting_project.testing import ExplainMixin
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.models.test_query_plans
+
+
+class HotQueryPlanTestCase(ExplainMixin, TestCase):
+    """
+    The hot querysets must be served by an index. Runs EXPLAIN on a seeded
+    database with fresh planner statistics.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_bench_data(users=100, groups=5, events=40, bets=1000)
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute("ANALYZE TABLE api_bet, api_event, api_member")
+            else:
+                cursor.execute("ANALYZE")
+        cls.user = CustomUser.objects.filter(username__startswith="bench_").first()
+        cls.event = Event.objects.first()
+        cls.group = Group.objects.first()
+
+    def test_settlement(self):
+        bets = Bet.objects.filter(event=self.event)
+        self.assertNoFullTableScan(bets.values_list("bet_amount"))
+        self.assertNoFullTableScan(bets.filter(team_choice="Team 1"))
+        self.assertNoFullTableScan(bets.exclude(team_choice="Team 1").values_list("user_id", "bet_amount"))
+
+    def test_user_bets_newest_first(self):
+        self.assertNoFullTableScan(Bet.objects.filter(user=self.user))
+
+    def test_bet_history_order(self):
+        # The history's (-created_at, id) order comes from the index, without a sort
+        bets = Bet.objects.filter(user=self.user).order_by("-created_at", "id")
+        self.assertNoFullTableScan(bets)
+        self.assertNoSort(bets)
+
+    def test_organizer_events(self):
+        self.assertNoFullTableScan(Event.objects.filter(organizer=self.user))
+
+    def test_open_events_by_start_time(self):
+        self.assertNoFullTableScan(
+            Event.objects.filter(is_complete=False, start_time__lte=timezone.now()).order_by("start_time")
+        )
+
+    def test_markets_by_state(self):
+        # The open events listing and the scheduler's boundary scans
+        self.assertNoFullTableScan(
+            Event.objects.filter(state=Event.OPEN, start_time__gt=timezone.now()).order_by("start_time")
+        )
+        self.assertNoFullTableScan(Event.objects.filter(state=Event.OPEN, start_time__lte=timezone.now()))
+
+    def test_admin_changelists_are_not_sorted(self):
+        # A changelist page reads its rows in index order and stops at the page
+        # size; a sort would read and order the whole table first
+        request = RequestFactory().get("/admin/")
+        request.user = CustomUser(is_staff=True, is_superuser=True)
+        for model in (Bet, Member, Participant, Event):
+            with self.subTest(model=model.__name__):
+                changelist = admin.site._registry[model].get_changelist_instance(request)
+                self.assertNoSort(changelist.queryset[:changelist.list_per_page])
+
+    def test_group_members_in_join_order(self):
+        self.assertNoFullTableScan(Member.objects.filter(group=self.group))
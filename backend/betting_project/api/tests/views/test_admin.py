@@ -0,0 +1,215 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api import settlement
+from api.models import ArchivedEvent, Bet, Event, Group, Member, Participant
+from users import stats
+from users.models import BettingStats, CustomUser, LedgerEntry
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_admin
+
+
+class AdminChangelistTestCase(TestCase):
+    """
+    Changelist pages run the same number of queries however many rows they show.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            username="whis", email="whis@beerus.com", password="Angel1234", is_staff=True, is_superuser=True
+        )
+        cls.group = Group.objects.create(name="Universe 7", location="Beerus Planet", user=cls.admin)
+
+    def add_rows(self, count):
+        start = CustomUser.objects.count()
+        for index in range(start, start + count):
+            user = CustomUser.objects.create_user(
+                username=f"fighter{index}", email=f"fighter{index}@u7.com", password="Tournament1",
+                available_funds=100,
+            )
+            Member.objects.create(user=user, group=self.group)
+            event = Event.objects.create(
+                group=self.group, organizer=user, team1=f"Team {index}", team2="Universe 11",
+                start_time=timezone.now() + timedelta(days=1), end_time=timezone.now() + timedelta(days=2),
+            )
+            # Bet.save also creates the Participant row
+            Bet.objects.create(user=user, event=event, team_choice="Team 1", bet_type="Win", bet_amount=5)
+
+    def changelist_queries(self, model):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_have_no_per_row_queries(self):
+        self.client.force_login(self.admin)
+        for model in (Member, Event, Bet, Participant, CustomUser):
+            with self.subTest(model=model.__name__):
+                self.add_rows(2)
+                few = self.changelist_queries(model)
+                self.add_rows(5)
+                self.assertEqual(self.changelist_queries(model), few)
+
+    def test_search_and_change_form(self):
+        self.client.force_login(self.admin)
+        self.add_rows(2)
+        response = self.client.get(reverse("admin:api_bet_changelist"), {"q": "fighter2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([bet.user.username for bet in response.context["cl"].result_list], ["fighter2"])
+
+        event = Event.objects.first()
+        response = self.client.get(reverse("admin:api_event_change", args=[event.id]))
+        self.assertEqual(response.status_code, 200)
+
+
+class EventBatchActionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            username="beerus", email="beerus@u7.com", password="Hakai12345", is_staff=True, is_superuser=True
+        )
+        cls.group = Group.objects.create(name="Tournament", location="Null Realm", user=cls.admin)
+        cls.bettors = [
+            CustomUser.objects.create_user(
+                username=f"bettor{index}", email=f"bettor{index}@u7.com", password="Tournament1", available_funds=0
+            )
+            for index in range(3)
+        ]
+        cls.events = [cls.make_event(f"Universe {index}") for index in range(3)]
+        for event in cls.events:
+            for bettor, team, amount in zip(cls.bettors, ["Team 1", "Team 1", "Team 2"], [10, 30, 20]):
+                Bet.objects.create(user=bettor, event=event, team_choice=team, bet_type="Win", bet_amount=amount)
+                stats.record_bet_placed(bettor.id, amount)
+
+    @classmethod
+    def make_event(cls, team1):
+        now = timezone.now()
+        return Event.objects.create(
+            group=cls.group, organizer=cls.admin, team1=team1, team2="Universe 11",
+            start_time=now - timedelta(hours=2), end_time=now - timedelta(hours=1),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def run_action(self, action, events, **data):
+        return self.client.post(
+            reverse("admin:api_event_changelist"),
+            {"action": action, "_selected_action": [event.id for event in events], **data},
+        )
+
+    def test_settle_asks_for_winners_then_settles_in_one_job(self):
+        response = self.run_action("settle_events", self.events)
+        self.assertTemplateUsed(response, "admin/api/event/batch_action.html")
+        self.assertFalse(Event.objects.filter(is_complete=True).exists())
+
+        winners = {
+            f"winner_{self.events[0].id}": self.events[0].team1,
+            f"winner_{self.events[1].id}": "Universe 11",
+        }
+        response = self.run_action("settle_events", self.events, apply="yes", **winners)
+
+        results = {result["event_id"]: result["result"] for result in response.context["results"]}
+        self.assertEqual(
+            results, {self.events[0].id: "settled", self.events[1].id: "settled"}
+        )
+        self.assertEqual(
+            list(Event.objects.filter(state=Event.SETTLED).order_by("id").values_list("id", flat=True)),
+            [self.events[0].id, self.events[1].id],
+        )
+        # Event 0: the Team 1 bets share the 20 lost on Team 2. Event 1: the Team 2 bet wins the 40.
+        funds = {user.username: user.available_funds for user in CustomUser.objects.filter(username__startswith="bettor")}
+        self.assertEqual(funds, {"bettor0": Decimal("5.00"), "bettor1": Decimal("15.00"), "bettor2": Decimal("40.00")})
+        self.assertEqual(BettingStats.objects.get(user=self.bettors[2]).bets_won, 1)
+        self.assertEqual(BettingStats.objects.get(user=self.bettors[2]).bets_lost, 1)
+        self.assertEqual(LedgerEntry.objects.filter(kind=LedgerEntry.PAYOUT).count(), 3)
+        self.assertEqual(
+            sorted(Bet.objects.filter(event=self.events[1]).values_list("status", flat=True)), ["Lost", "Lost", "Won"]
+        )
+
+        # Settled events are reported, not settled twice
+        response = self.run_action("settle_events", self.events[:1], apply="yes", **winners)
+        self.assertEqual(response.context["results"][0]["result"], "skipped")
+
+    def test_statements_do_not_grow_with_the_events(self):
+        def settle(events):
+            winners = {f"winner_{event.id}": event.team1 for event in events}
+            with CaptureQueriesContext(connection) as queries:
+                self.run_action("settle_events", events, apply="yes", **winners)
+            return len(queries)
+
+        more_events = [self.make_event(f"Universe {index}") for index in range(3, 8)]
+        for event in more_events:
+            for bettor, team in zip(self.bettors, ["Team 1", "Team 2", "Team 2"]):
+                Bet.objects.create(user=bettor, event=event, team_choice=team, bet_type="Win", bet_amount=10)
+        self.assertEqual(settle(self.events[:1]), settle(more_events))
+
+    def test_void_refunds_every_bet(self):
+        response = self.run_action("void_events", self.events[:2], apply="yes")
+        self.assertEqual([result["result"] for result in response.context["results"]], ["voided", "voided"])
+        self.assertEqual(
+            sorted(CustomUser.objects.filter(username__startswith="bettor").values_list("available_funds", flat=True)),
+            [Decimal("20.00"), Decimal("40.00"), Decimal("60.00")],
+        )
+        self.assertEqual(set(Bet.objects.filter(event__in=self.events[:2]).values_list("status", flat=True)), {"Refunded"})
+        self.assertEqual(BettingStats.objects.get(user=self.bettors[1]).open_stake, Decimal("30.00"))
+
+    def test_settlement_pays_the_same_whichever_way_it_runs(self):
+        loser = CustomUser.objects.create_user(
+            username="toppo", email="toppo@u11.com", password="Tournament1", available_funds=0
+        )
+
+        def place_bets(event):
+            # Three equal stakes share 1.00: one of them gets the odd cent
+            for bettor in self.bettors:
+                Bet.objects.create(user=bettor, event=event, team_choice="Team 1", bet_type="Win", bet_amount=10)
+                stats.record_bet_placed(bettor.id, 10)
+            Bet.objects.create(user=loser, event=event, team_choice="Team 2", bet_type="Win", bet_amount=1)
+            stats.record_bet_placed(loser.id, 1)
+
+        def payouts_of(event):
+            return list(
+                LedgerEntry.objects.filter(bet__event=event, kind=LedgerEntry.PAYOUT)
+                .order_by("bet__user__username").values_list("bet__user__username", "amount")
+            )
+
+        by_admin = self.make_event("Universe 2")
+        by_organizer = self.make_event("Universe 3")
+        place_bets(by_admin)
+        place_bets(by_organizer)
+        settlement.settle_events({by_admin.id: by_admin.team1})
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.post(
+            reverse("event-complete-event", args=[by_organizer.id]), {"winning_team": by_organizer.team1}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        expected = [("bettor0", Decimal("0.34")), ("bettor1", Decimal("0.33")), ("bettor2", Decimal("0.33"))]
+        self.assertEqual(payouts_of(by_admin), expected)
+        self.assertEqual(payouts_of(by_organizer), expected)
+
+    def test_stakes_are_read_in_exact_cents(self):
+        # 0.29 and 0.57 are a cent short as binary floats, which is how SQLite keeps decimals
+        event = self.make_event("Universe 2")
+        Bet.objects.create(user=self.bettors[0], event=event, team_choice="Team 1", bet_type="Win", bet_amount="0.29")
+        Bet.objects.create(user=self.bettors[1], event=event, team_choice="Team 2", bet_type="Win", bet_amount="0.57")
+
+        [result] = settlement.settle_events({event.id: event.team1})
+
+        self.assertEqual(result["winning_info"], [{"username": "bettor0", "winning_amount": Decimal("0.57")}])
+
+    def test_archive_only_takes_settled_events(self):
+        self.run_action("void_events", self.events[:1], apply="yes")
+        response = self.run_action("archive_events", self.events[:2], apply="yes")
+        self.assertEqual([result["result"] for result in response.context["results"]], ["archived", "skipped"])
+        self.assertTrue(ArchivedEvent.objects.filter(pk=self.events[0].pk).exists())
+        self.assertTrue(Event.objects.filter(pk=self.events[1].pk).exists())
@@ -0,0 +1,136 @@
+import json
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.models import Bet, Event, Group, Member
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_async_views
+
+
+class AsyncReadPathTestCase(APITestCase):
+    """
+    The async views under /api/async/ must return the same JSON as the DRF views they mirror.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username="vegeta", email="vegeta@saiyan.com", password="FinalFlash1", available_funds=200
+        )
+        cls.other_user = CustomUser.objects.create_user(
+            username="nappa", email="nappa@saiyan.com", password="Bomber123", available_funds=50
+        )
+        cls.group = Group.objects.create(name="Saiyan Saga", location="Earth", description="Arrival")
+        Member.objects.create(user=cls.user, group=cls.group, admin="admin")
+        Member.objects.create(user=cls.other_user, group=cls.group)
+
+        now = timezone.now()
+        cls.event = Event.objects.create(
+            group=cls.group,
+            organizer=cls.user,
+            team1="Goku",
+            team2="Vegeta",
+            start_time=now + timedelta(days=1),
+            end_time=now + timedelta(days=2),
+        )
+        cls.empty_event = Event.objects.create(
+            group=cls.group,
+            team1="Krillin",
+            team2="Nappa",
+            start_time=now + timedelta(days=3),
+            end_time=now + timedelta(days=4),
+        )
+        Bet.objects.create(user=cls.user, event=cls.event, team_choice="Team 2", bet_type="Win", bet_amount=30)
+        Bet.objects.create(user=cls.other_user, event=cls.event, team_choice="Team 1", bet_type="Win", bet_amount=10)
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def assertSameJson(self, sync_url, async_url, params=None):
+        sync_response = self.client.get(sync_url, params)
+        async_response = self.client.get(async_url, params)
+        self.assertEqual(sync_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+        return json.loads(async_response.content)
+
+    def test_all_and_user_events_matches_sync(self):
+        data = self.assertSameJson(
+            reverse("event-all-and-user-events"), reverse("async-all-and-user-events")
+        )
+        self.assertEqual(data["all_events"][0]["num_participants"], 2)
+        self.assertEqual(len(data["user_events"]), 1)
+
+    def test_all_and_user_events_skips_bets_of_unlisted_events(self):
+        archived = Event.objects.create(
+            group=self.group, team1="Raditz", team2="Piccolo", start_time=self.event.start_time,
+            end_time=self.event.end_time, is_archived=True,
+        )
+        Bet.objects.create(user=self.user, event=archived, team_choice="Team 1", bet_type="Win", bet_amount=5)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("async-all-and-user-events"))
+        bet_queries = [query["sql"] for query in queries.captured_queries if 'FROM "api_bet"' in query["sql"]]
+        self.assertEqual(len(bet_queries), 1)
+        self.assertIn("is_archived", bet_queries[0])
+
+    def test_all_and_user_events_anonymous(self):
+        self.client.credentials()
+        data = self.assertSameJson(
+            reverse("event-all-and-user-events"), reverse("async-all-and-user-events")
+        )
+        self.assertNotIn("user_events", data)
+
+    def test_group_detail_matches_sync(self):
+        data = self.assertSameJson(
+            reverse("group-detail", args=[self.group.id]), reverse("async-group-detail", args=[self.group.id])
+        )
+        self.assertEqual(len(data["members"]), 2)
+        self.assertNotIn("password", data["members"][0]["user"])
+
+    def test_group_detail_not_found(self):
+        response = self.client.get(reverse("async-group-detail", args=[self.group.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_event_bet_matches_sync(self):
+        self.assertSameJson(
+            reverse("bet-event-bet"), reverse("async-event-bet"), {"event_id": self.event.id}
+        )
+
+    def test_history_rows_match_sync(self):
+        sync_data = self.client.get(reverse("bet-history")).json()
+        async_data = self.client.get(reverse("async-bet-history")).json()
+        self.assertEqual(async_data["results"], sync_data["results"])
+
+    def test_history_cursor_pages(self):
+        url = f"{reverse('async-bet-history')}?page_size=1"
+        rows = []
+        while url:
+            data = self.client.get(url).json()
+            rows.extend(data["results"])
+            url = data["next"]
+        self.assertEqual([row["bet_amount"] for row in rows], ["30.00"])
+
+        response = self.client.get(reverse("async-bet-history"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_authentication(self):
+        self.client.credentials()
+        response = self.client.get(reverse("async-bet-history"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        response = self.client.get(reverse("async-all-and-user-events"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_only_get_is_allowed(self):
+        response = self.client.post(reverse("async-bet-history"))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import Bet, Event, Group
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_bet_history
+
+
+class BetHistoryTestCase(APITestCase):
+    """
+    Tests for /api/bets/history/: keyset pagination, filters and query count.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username="gohan", email="gohan@earth.com", password="Masenko123"
+        )
+        cls.other_user = CustomUser.objects.create_user(
+            username="cell", email="cell@lab.com", password="PerfectForm1"
+        )
+        cls.group = Group.objects.create(name="Cell Games", location="Arena", description="Finals")
+
+        # 5 bets for the user, one per event, a day apart (newest = index 0)
+        now = timezone.now()
+        for index in range(5):
+            event = Event.objects.create(
+                group=cls.group,
+                team1=f"Home {index}",
+                team2=f"Away {index}",
+                start_time=now + timedelta(days=1),
+                end_time=now + timedelta(days=2),
+            )
+            bet = Bet.objects.create(
+                user=cls.user,
+                event=event,
+                team_choice="Team 1",
+                bet_type="Win",
+                bet_amount=10 + index,
+                status="Won" if index % 2 else "Lost",
+            )
+            Bet.objects.filter(pk=bet.pk).update(created_at=now - timedelta(days=index))
+            if index == 0:
+                Bet.objects.create(user=cls.other_user, event=event, team_choice="Team 2", bet_type="Win")
+
+        cls.url = reverse("bet-history")
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def test_pages_through_history_newest_first(self):
+        seen = []
+        url = f"{self.url}?page_size=2"
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row["bet_amount"] for row in response.data["results"])
+            url = response.data["next"]
+
+        # Only the user's own bets, newest first, no duplicates across pages
+        self.assertEqual(seen, ["10.00", "11.00", "12.00", "13.00", "14.00"])
+
+    def test_rows_are_flat(self):
+        row = self.client.get(self.url).data["results"][0]
+        self.assertEqual(row["team1"], "Home 0")
+        self.assertEqual(row["chosen_team_name"], "Home 0")
+        self.assertEqual(row["group_name"], "Cell Games")
+        self.assertNotIn("event", row)
+
+    def test_filters_by_status_and_date_range(self):
+        response = self.client.get(self.url, {"status": "won"})
+        self.assertEqual([row["bet_amount"] for row in response.data["results"]], ["11.00", "13.00"])
+
+        today = timezone.localdate()
+        response = self.client.get(
+            self.url,
+            {"from": (today - timedelta(days=2)).isoformat(), "to": (today - timedelta(days=1)).isoformat()},
+        )
+        self.assertEqual([row["bet_amount"] for row in response.data["results"]], ["11.00", "12.00"])
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get(self.url, {"from": "last tuesday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
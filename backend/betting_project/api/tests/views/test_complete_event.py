@@ -9,6 +9,9 @@ from django.utils import timezone
 from datetime import timedelta
 import json
 import logging
+from unittest import mock
+from django.db import DatabaseError
+from api import settlement
 
 User = get_user_model()
 
@@ -20,6 +23,7 @@ User = get_user_model()
 # python manage.py test api.tests.views.test_complete_event.EventViewSetTestCase.test_all_bettors_refund_winning_team
 # python manage.py test api.tests.views.test_complete_event.EventViewSetTestCase.test_all_bettors_refund_losing_team
 # python manage.py test api.tests.views.test_complete_event.EventViewSetTestCase.test_multiple_bettors_winnings_distribution
+# python manage.py test api.tests.views.test_complete_event.EventViewSetTestCase.test_failed_settlement_rolls_back
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -326,4 +330,57 @@ class EventViewSetTestCase(APITestCase):
         logger.info(f"{self.PINK}User {self.user.username} winning amount: {self.user.available_funds - initial_funds_user}{self.END}")
         logger.info(f"{self.PINK}User {self.user2.username} winning amount: {self.user2.available_funds - initial_funds_user2}{self.END}")
         logger.info(f"{self.PINK}User {self.user3.username} winning amount: {self.user3.available_funds - initial_funds_user3}{self.END}")
-                
\ No newline at end of file
+                
+
+    def test_failed_settlement_rolls_back(self):
+        """
+        A settlement that fails midway leaves no trace: the event is not stuck
+        in "settling", nobody is paid, and it can be completed again.
+        """
+        Bet.objects.create(event=self.event, user=self.user2, team_choice="Team 1", bet_amount=50)
+        Bet.objects.create(event=self.event, user=self.user3, team_choice="Team 2", bet_amount=50)
+        self.client.force_authenticate(user=self.user)
+        url = reverse("event-complete-event", args=[self.event.id])
+
+        write = settlement._Credits.write
+
+        def write_then_fail(credits):
+            write(credits)
+            raise DatabaseError("gone")
+
+        with mock.patch.object(settlement._Credits, "write", write_then_fail):
+            with self.assertRaises(DatabaseError):
+                self.client.post(url, {"winning_team": self.event.team1})
+
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.state, self.event.is_complete), (Event.OPEN, False))
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.available_funds, Decimal("200.00"))
+
+        response = self.client.post(url, {"winning_team": self.event.team1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.state, Event.SETTLED)
+        response = self.client.post(url, {"winning_team": self.event.team1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bets_are_marked_by_the_winning_team(self):
+        """
+        Bets hold the "Team 1"/"Team 2" label of the team they are on, the
+        winner is sent by name.
+        """
+        won = Bet.objects.create(event=self.event, user=self.user2, team_choice="Team 1", bet_amount=50)
+        lost = Bet.objects.create(event=self.event, user=self.user3, team_choice="Team 2", bet_amount=50)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            reverse("event-complete-event", args=[self.event.id]), {"winning_team": self.event.team1}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["winning_info"], [{"username": self.user2.username, "winning_amount": Decimal("50.00")}]
+        )
+        won.refresh_from_db()
+        lost.refresh_from_db()
+        self.assertEqual((won.status, lost.status), ("Won", "Lost"))
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api import streaming
+from api.models import Bet, Event, Group
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_event_quote
+
+
+class EventQuoteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username="yamcha", email="yamcha@earth.com", password="Wolffang1", available_funds=100
+        )
+        cls.group = Group.objects.create(name="Desert Bandits", location="Diablo Desert")
+        now = timezone.now()
+        cls.event = Event.objects.create(
+            group=cls.group,
+            organizer=cls.user,
+            team1="Yamcha",
+            team2="Tien",
+            start_time=now + timedelta(days=1),
+            end_time=now + timedelta(days=2),
+        )
+        cls.bettors = [
+            CustomUser.objects.create_user(username=name, email=f"{name}@earth.com", password="Kamehame1")
+            for name in ("puar", "oolong")
+        ]
+        Bet.objects.create(user=cls.user, event=cls.event, team_choice="Team 1", bet_type="Win", bet_amount=30)
+        Bet.objects.create(user=cls.bettors[0], event=cls.event, team_choice="Team 2", bet_type="Win", bet_amount=60)
+
+    def setUp(self):
+        caches[streaming.POOL_CACHE].clear()
+        self.addCleanup(caches[streaming.POOL_CACHE].clear)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def quote(self, **params):
+        return self.client.get(reverse("event-quote", args=[self.event.id]), params)
+
+    def test_quote_is_a_share_of_the_other_pool(self):
+        # 10 more on Yamcha: 10 / (30 + 10) of Tien's 60
+        response = self.quote(team="Team 1", amount="10")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            response.data,
+            {
+                "event_id": self.event.id,
+                "team_choice": "Team 1",
+                "team": "Yamcha",
+                "amount": "10.00",
+                "potential_winning": "15.00",
+                "total_winnable_pool": "60.00",
+            },
+        )
+        # Rounded down to the cent: 20 * 30 / 80
+        self.assertEqual(self.quote(team="Team 2", amount="20").data["potential_winning"], "7.50")
+        self.assertEqual(self.quote(team="Team 2", amount="0.07").data["potential_winning"], "0.03")
+
+    def test_bet_rows_are_not_read_once_cached(self):
+        self.quote(team="Team 1", amount="10")
+        # Only the event itself
+        with self.assertNumQueries(1):
+            response = self.quote(team="Team 2", amount="10")
+        self.assertEqual(response.data["potential_winning"], "4.28")
+
+    def test_bet_writes_refresh_the_pool(self):
+        self.assertEqual(self.quote(team="Team 1", amount="10").data["total_winnable_pool"], "60.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            Bet.objects.create(
+                user=self.bettors[1], event=self.event, team_choice="Team 2", bet_type="Win", bet_amount=20
+            )
+            streaming.publish_pool_on_commit(self.event.id)
+        self.assertEqual(self.quote(team="Team 1", amount="10").data["total_winnable_pool"], "80.00")
+
+    def test_invalid_quotes(self):
+        self.assertEqual(self.quote(team="Krillin", amount="10").status_code, 400)
+        # The team is picked by its bet label, never by name: a team may be called "Team 2"
+        self.assertEqual(self.quote(team="Yamcha", amount="10").status_code, 400)
+        self.assertEqual(self.quote(team="Team 1", amount="0").status_code, 400)
+        self.assertEqual(self.quote(team="Team 1").status_code, 400)
+        Event.objects.filter(id=self.event.id).update(state=Event.CLOSED)
+        self.assertEqual(self.quote(team="Team 1", amount="10").status_code, 400)
+
+    def test_event_lists_other_bets_only_to_its_organizer(self):
+        url = reverse("event-detail", args=[self.event.id])
+        winnings = self.client.get(url).data["participants_bets_and_winnings"]
+        self.assertEqual(winnings["participants_count"], 2)
+        self.assertCountEqual([info["user"] for info in winnings["participants_info"]], ["yamcha", "puar"])
+
+        self.client.force_authenticate(user=self.bettors[0])
+        winnings = self.client.get(url).data["participants_bets_and_winnings"]
+        self.assertEqual(winnings["participants_count"], 2)
+        self.assertEqual(
+            winnings["participants_info"],
+            [
+                {
+                    "user": "puar",
+                    "bet_amount": Decimal("60.00"),
+                    "team_choice": "Tien",
+                    "potential_winning": Decimal("30"),
+                    "total_winnable_pool": Decimal("30.00"),
+                }
+            ],
+        )
+
+        self.client.force_authenticate(user=self.bettors[1])
+        winnings = self.client.get(url).data["participants_bets_and_winnings"]
+        self.assertEqual((winnings["participants_count"], winnings["participants_info"]), (2, []))
@@ -0,0 +1,119 @@
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import Bet, Event, Group
+from api.scheduler import advance_markets
+from betting_project.pubsub import broker
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_event_stream
+
+
+def parse_sse(chunk):
+    """
+    (event type, data) of one server-sent event.
+    """
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+@override_settings(EVENT_STREAM_MAX_SECONDS=5, EVENT_STREAM_KEEPALIVE_SECONDS=5)
+class EventStreamTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username="trunks", email="trunks@future.com", password="Burning1", available_funds=100
+        )
+        cls.group = Group.objects.create(name="Future", location="Capsule Corp", description="Androids")
+        now = timezone.now()
+        cls.event = Event.objects.create(
+            group=cls.group,
+            organizer=cls.user,
+            team1="Trunks",
+            team2="Android 17",
+            start_time=now + timedelta(days=1),
+            end_time=now + timedelta(days=2),
+        )
+        Bet.objects.create(user=cls.user, event=cls.event, team_choice="Team 2", bet_type="Win", bet_amount=30)
+
+    def setUp(self):
+        broker.reset()
+        self.addCleanup(broker.reset)
+
+    async def connect(self, *event_ids):
+        response = await self.async_client.get(reverse("event-stream"), {"event_id": event_ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = response.streaming_content
+        self.assertEqual(await anext(content), b"retry: 5000\n\n")
+        return content
+
+    def place_bet(self, event, amount):
+        other = CustomUser.objects.create_user(
+            username="gohan", email="gohan@future.com", password="Masenko12", available_funds=100
+        )
+        client = APIClient()
+        client.force_authenticate(user=other)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse("bet-list"),
+                {"user": other.id, "event_id": event.id, "team_choice": "Team 1", "bet_type": "Win",
+                 "bet_amount": amount},
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def advance_markets(self, now):
+        with self.captureOnCommitCallbacks(execute=True):
+            advance_markets(now)
+
+    async def test_snapshot_then_pool_changes(self):
+        content = await self.connect(self.event.id)
+        self.assertEqual(
+            parse_sse(await anext(content)),
+            ("snapshot", {"event_id": self.event.id, "status": "open",
+                          "pools": {"Team 1": "0.00", "Team 2": "30.00"}, "bets": 1}),
+        )
+
+        # One publish when the bet commits reaches the open stream
+        await sync_to_async(self.place_bet)(self.event, 20)
+        self.assertEqual(
+            parse_sse(await anext(content)),
+            ("pool", {"event_id": self.event.id, "pools": {"Team 1": "20.00", "Team 2": "30.00"}, "bets": 2}),
+        )
+
+    async def test_market_close_is_pushed(self):
+        now = timezone.now()
+        event = await Event.objects.acreate(
+            group=self.group,
+            team1="Gohan",
+            team2="Android 18",
+            start_time=now + timedelta(minutes=1),
+            end_time=now + timedelta(hours=1),
+        )
+        content = await self.connect(event.id)
+        self.assertEqual((await anext(content)).startswith(b"event: snapshot"), True)
+
+        # The scheduler closes the market when the event starts
+        await sync_to_async(self.advance_markets)(now + timedelta(minutes=2))
+        self.assertEqual(parse_sse(await anext(content)), ("status", {"event_id": event.id, "status": "closed"}))
+
+    async def test_all_events_stream(self):
+        content = await self.connect()
+        await sync_to_async(self.place_bet)(self.event, 5)
+        message_type, data = parse_sse(await anext(content))
+        self.assertEqual((message_type, data["event_id"]), ("pool", self.event.id))
+
+    async def test_rejects_bad_event_ids(self):
+        response = await self.async_client.get(reverse("event-stream"), {"event_id": "goku"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_refused_under_wsgi(self):
+        # WSGI would buffer the whole stream before sending its first byte
+        response = self.client.get(reverse("event-stream"), {"event_id": self.event.id})
+        self.assertEqual(response.status_code, 501)
@@ -0,0 +1,55 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from api.models import Event, Group
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_events_bulk
+
+
+class EventsBulkTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(
+            username="whis", email="whis@angel.com", password="Angel12345", is_staff=True
+        )
+        cls.user = CustomUser.objects.create_user(username="krillin", email="krillin@earth.com", password="Destructo1")
+        cls.group = Group.objects.create(name="Tenkaichi", location="Papaya Island", user=cls.staff)
+        cls.schedule = (
+            "group_id,team1,team2,start_time,end_time\n"
+            f"{cls.group.id},Goku,Jackie Chun,2030-01-01T12:00:00Z,2030-01-01T13:00:00Z\n"
+            f"{cls.group.id},Krillin,Bacterian,2030-01-01T14:00:00Z,2030-01-01T15:00:00Z\n"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def test_csv_body(self):
+        response = self.client.post(reverse("event-bulk"), self.schedule, content_type="text/csv")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data, {"created": 2, "updated": 0})
+        self.assertEqual(Event.objects.filter(organizer=self.staff).count(), 2)
+
+    def test_multipart_upload(self):
+        upload = SimpleUploadedFile("schedule.csv", self.schedule.encode())
+        response = self.client.post(reverse("event-bulk"), {"file": upload}, format="multipart")
+        self.assertEqual(response.data, {"created": 2, "updated": 0})
+
+    def test_invalid_rows_are_reported(self):
+        response = self.client.post(
+            reverse("event-bulk"),
+            '{"group_id": 999, "team1": "Goku", "team2": "Piccolo"}\n',
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["line"], 1)
+        self.assertIn("start_time", response.data["errors"][0]["errors"])
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse("event-bulk"), self.schedule, content_type="text/csv")
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,217 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+import api.urls
+import users.urls
+from api.models import Bet, Event, Group, Member, Participant
+from betting_project.testing import QueryBudgetMixin, route_names
+from users.deposits import create_deposit
+from users.models import CustomUser
+from users.payments import get_payment_client, reset_payment_client
+
+# Commands
+# Run All test in this module
+# python manage.py test api.tests.views.test_query_budgets
+
+
+@override_settings(
+    PAYMENT_CLIENT="users.payments.FakePaymentClient", DEPOSITS_SUBMIT_ASYNC=False, EVENT_STREAM_MAX_SECONDS=0
+)
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Every route in api/urls.py and users/urls.py must stay within its query
+    budget (settings.QUERY_BUDGETS) on a dataset with several groups, events
+    and bets, so an N+1 shows up as a failure here.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username="piccolo", email="piccolo@namek.com", password="SpecialBeam1", available_funds=500
+        )
+        others = [
+            CustomUser.objects.create_user(
+                username=f"saibaman{index}", email=f"saibaman{index}@space.com", password="Sprout1234",
+                available_funds=500,
+            )
+            for index in range(3)
+        ]
+        cls.staff = CustomUser.objects.create_user(
+            username="popo", email="popo@lookout.com", password="Carpet1234", is_staff=True
+        )
+        start = timezone.now() + timedelta(days=1)
+        cls.groups = []
+        cls.events = []
+        for group_index in range(2):
+            group = Group.objects.create(name=f"Lookout {group_index}", location="Sky", user=cls.user)
+            cls.groups.append(group)
+            # The user is only a member of the first group
+            for user in ([cls.user] if group_index == 0 else []) + others:
+                Member.objects.create(user=user, group=group)
+            for event_index in range(3):
+                event = Event.objects.create(
+                    group=group,
+                    organizer=cls.user,
+                    team1=f"Namek {event_index}",
+                    team2=f"Earth {event_index}",
+                    start_time=start,
+                    end_time=start + timedelta(hours=2),
+                )
+                cls.events.append(event)
+                # Bet.save also creates the Participant rows
+                for user, team in zip([cls.user, *others], ["Team 1", "Team 2", "Team 1", "Team 2"]):
+                    Bet.objects.create(user=user, event=event, team_choice=team, bet_type="Win", bet_amount=10)
+        cls.bet = Bet.objects.filter(user=cls.user).first()
+        cls.member = Member.objects.filter(user=cls.user).first()
+        cls.participant = Participant.objects.first()
+
+    def setUp(self):
+        reset_payment_client()
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def tearDown(self):
+        reset_payment_client()
+
+    def route_requests(self):
+        """
+        One representative request per route name: (name, method, url, kwargs);
+        kwargs["as_user"] makes the request as that user.
+        """
+        event = self.events[0]
+        group, other_group = self.groups
+        deposit = create_deposit(self.user, 1000, "pm_card_visa")
+        completed_event = Event.objects.create(
+            group=group,
+            organizer=self.user,
+            team1="Saiyan",
+            team2="Namekian",
+            start_time=timezone.now() - timedelta(hours=3),
+            end_time=timezone.now() - timedelta(hours=1),
+        )
+        for user, team in zip(CustomUser.objects.all()[:4], ["Team 1", "Team 2", "Team 1", "Team 2"]):
+            Bet.objects.create(user=user, event=completed_event, team_choice=team, bet_type="Win", bet_amount=10)
+        open_event = Event.objects.create(
+            group=group,
+            team1="Cell",
+            team2="Gohan",
+            start_time=timezone.now() + timedelta(days=2),
+            end_time=timezone.now() + timedelta(days=3),
+        )
+        webhook_event = get_payment_client().build_event(
+            {"id": "pi_unknown", "status": "succeeded", "amount": 1000, "metadata": {}}
+        )
+        # Reads of the user's membership come before group-leave removes it
+        return [
+            ("api-root", "get", reverse("api-root"), {}),
+            ("async-all-and-user-events", "get", reverse("async-all-and-user-events"), {}),
+            ("async-group-detail", "get", reverse("async-group-detail", args=[group.id]), {}),
+            ("async-event-bet", "get", f"{reverse('async-event-bet')}?event_id={event.id}", {}),
+            ("async-bet-history", "get", reverse("async-bet-history"), {}),
+            ("event-stream", "get", f"{reverse('event-stream')}?event_id={event.id}", {"asgi": True}),
+            ("group-list", "get", reverse("group-list"), {}),
+            ("group-detail", "get", reverse("group-detail", args=[group.id]), {}),
+            ("member-detail", "get", reverse("member-detail", args=[self.member.id]), {}),
+            ("group-join", "post", reverse("group-join", args=[other_group.id]), {}),
+            ("group-leave", "post", reverse("group-leave", args=[group.id]), {}),
+            ("member-list", "get", reverse("member-list"), {}),
+            ("event-list", "get", reverse("event-list"), {}),
+            ("event-all-and-user-events", "get", reverse("event-all-and-user-events"), {}),
+            ("event-detail", "get", reverse("event-detail", args=[event.id]), {}),
+            ("event-quote", "get", reverse("event-quote", args=[event.id]), {"data": {"team": "Team 1", "amount": "10"}}),
+            (
+                "event-bulk",
+                "post",
+                reverse("event-bulk"),
+                {"data": f"group_id,team1,team2,start_time,end_time\n{group.id},Kami,Piccolo,"
+                         "2030-01-01T12:00:00Z,2030-01-01T13:00:00Z\n", "content_type": "text/csv", "as_user": self.staff},
+            ),
+            (
+                "event-complete-event",
+                "post",
+                reverse("event-complete-event", args=[completed_event.id]),
+                {"data": {"winning_team": "Saiyan"}},
+            ),
+            ("bet-list", "get", reverse("bet-list"), {}),
+            (
+                "bet-list",
+                "post",
+                reverse("bet-list"),
+                {"data": {"user": self.user.id, "event_id": open_event.id, "team_choice": "Team 1",
+                          "bet_type": "Win", "bet_amount": 5}},
+            ),
+            ("bet-event-bet", "get", f"{reverse('bet-event-bet')}?event_id={event.id}", {}),
+            ("bet-history", "get", reverse("bet-history"), {}),
+            ("bet-archived-history", "get", reverse("bet-archived-history"), {}),
+            ("bet-detail", "get", reverse("bet-detail", args=[self.bet.id]), {}),
+            ("participant-list", "get", reverse("participant-list"), {}),
+            ("participant-detail", "get", reverse("participant-detail", args=[self.participant.id]), {}),
+            ("customuser-me", "get", reverse("customuser-me"), {}),
+            ("customuser-detail", "get", reverse("customuser-detail", args=[self.user.id]), {}),
+            ("user-statement", "get", reverse("user-statement"), {}),
+            (
+                "signup",
+                "post",
+                reverse("signup"),
+                {"data": {"username": "dende", "email": "dende@namek.com", "password": "Healing12345",
+                          "password2": "Healing12345"}},
+            ),
+            ("stripe-config", "get", reverse("stripe-config"), {}),
+            ("stripe-charge", "post", reverse("stripe-charge"), {"data": {"amount": 500, "source": "pm_card_visa"}}),
+            ("stripe-deposit", "get", reverse("stripe-deposit", args=[deposit.id]), {}),
+            ("stripe-webhook", "post", reverse("stripe-webhook"), {"data": webhook_event, "format": "json"}),
+        ]
+
+    def test_every_route_has_a_request(self):
+        covered = {name for name, _, _, _ in self.route_requests()}
+        self.assertEqual(route_names(api.urls, users.urls) - covered, set())
+
+    def test_routes_stay_within_query_budget(self):
+        for name, method, url, kwargs in self.route_requests():
+            with self.subTest(route=name, method=method):
+                client = self.client
+                if "as_user" in kwargs:
+                    self.client = APIClient()
+                    self.client.force_authenticate(user=kwargs.pop("as_user"))
+                try:
+                    response = self.assertWithinQueryBudget(method, url, **kwargs)
+                finally:
+                    self.client = client
+                self.assertLess(response.status_code, 400, getattr(response, "data", response))
+
+
+class QueryCountMiddlewareTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="kami", email="kami@lookout.com", password="Guardian12")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_headers(self):
+        response = self.client.get(reverse("bet-history"))
+        self.assertEqual(response["X-Query-Count"], "1")
+        self.assertGreaterEqual(float(response["X-DB-Time"]), 0)
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    async def test_headers_on_the_async_path(self):
+        # The async ORM runs the queries off the event loop, on the request's sync thread
+        token = RefreshToken.for_user(self.user).access_token
+        response = await self.async_client.get(
+            reverse("async-bet-history"), headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Query-Count"], "2")
+
+    @override_settings(QUERY_COUNT_HEADERS=False, QUERY_BUDGETS={"bet-history": 0})
+    def test_over_budget_is_logged(self):
+        with self.assertLogs("betting_project.middleware", "WARNING") as logs:
+            response = self.client.get(reverse("bet-history"))
+        self.assertNotIn("X-Query-Count", response)
+        self.assertIn("GET bet-history ran 1 queries (budget 0", logs.output[0])
@@ -1,4 +1,4 @@
-from api.views import bet_views, group_views, member_views, event_views, participants_views
+from api.views import async_views, bet_views, stream_views, group_views, member_views, event_views, participants_views
 from rest_framework import routers
 from django.urls import path, include
 from django.conf import urls
@@ -15,6 +15,13 @@ router.register("participants", participants_views.ParticipantViewSet, basename=
 
 
 urlpatterns = [
+    # Async (ASGI) read path for the hottest GET endpoints, same JSON as the router's
+    path("async/events/all_and_user_events/", async_views.all_and_user_events, name="async-all-and-user-events"),
+    path("async/groups/<int:pk>/", async_views.group_detail, name="async-group-detail"),
+    path("async/bets/event-bet/", async_views.event_bet, name="async-event-bet"),
+    path("async/bets/history/", async_views.bet_history, name="async-bet-history"),
+    # Server-sent events of live event updates (ASGI)
+    path("stream/events/", stream_views.event_stream, name="event-stream"),
     path("", include(router.urls)),
 ]
 
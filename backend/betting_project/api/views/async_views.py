@@ -0,0 +1,339 @@
+"""
+Async (ASGI) variants of the hot read endpoints.
+
+DRF views are synchronous, so under ASGI every DRF request still occupies a
+worker thread while it waits on the database. The views below are plain
+Django `async def` views that only use the async ORM (`async for`, `aget`,
+...), so a slow client or a slow query only parks a coroutine.
+
+They return the same JSON as their DRF counterparts (the tests compare
+them); the only difference is the bet history cursor format.
+
+    /api/async/events/all_and_user_events/  ->  EventViewset.all_and_user_events
+    /api/async/groups/<pk>/                 ->  GroupViewset.retrieve
+    /api/async/bets/event-bet/?event_id=    ->  BetViewset.event_bet
+    /api/async/bets/history/                ->  BetViewset.history
+"""
+import base64
+import binascii
+import functools
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.db.models import Count, Q
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from users.models import CustomUser
+from ..filters import parse_date_bound
+from ..models import Bet, Event, Group, Member
+from ..pagination import BetHistoryCursorPagination
+from ..serializer import EventSerializer
+
+# DRF fields used only for formatting, so values render exactly like the sync API
+_datetime_field = serializers.DateTimeField()
+_amount_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+_funds_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+_jwt_authentication = JWTAuthentication()
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def _datetime(value):
+    return _datetime_field.to_representation(value) if value else None
+
+
+def _file_url(request, name):
+    if not name:
+        return None
+    return request.build_absolute_uri(default_storage.url(name))
+
+
+async def _authenticate(request):
+    """
+    Async equivalent of JWTAuthentication.authenticate.
+
+    Token validation needs no database; only the user lookup does, and that
+    uses the async ORM. Returns None for anonymous requests.
+    """
+    header = _jwt_authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = _jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = _jwt_authentication.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+    try:
+        user = await CustomUser.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except CustomUser.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def async_api_view(login_required=False):
+    """
+    Wrap an async view with JWT authentication and DRF-style error responses.
+    The view is called as view(request, user, *args, **kwargs).
+    """
+    def decorator(view):
+        # Django 4.2's require_GET can't wrap coroutines, so check the method here
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return HttpResponseNotAllowed(["GET", "HEAD"])
+            try:
+                user = await _authenticate(request)
+                if login_required and user is None:
+                    raise AuthenticationFailed("Authentication credentials were not provided.")
+                return await view(request, user, *args, **kwargs)
+            except (AuthenticationFailed, InvalidToken) as e:
+                response = _json(e.detail, status=e.status_code)
+                response["WWW-Authenticate"] = 'Bearer realm="api"'
+                return response
+            except ValidationError as e:
+                return _json(e.detail, status=e.status_code)
+        return wrapper
+    return decorator
+
+
+async def _bets_by_event(bet_queryset):
+    """
+    Load (username, team_choice, bet_amount) for every bet in the queryset in one query.
+    """
+    bets = defaultdict(list)
+    rows = bet_queryset.order_by("-created_at").values_list(
+        "event_id", "user__username", "team_choice", "bet_amount"
+    )
+    async for event_id, username, team_choice, bet_amount in rows:
+        bets[event_id].append((username, team_choice, bet_amount))
+    return bets
+
+
+def _events_data(request, user, events, bets, many=True):
+    """
+    EventSerializer output for events loaded with select_related("group"),
+    given their bets from _bets_by_event: serializing them runs no query.
+    `user` is the JWT user, which request.user doesn't carry here.
+    """
+    context = {"request": request, "user": user, "bets_by_event": bets}
+    return EventSerializer(events, many=many, context=context).data
+
+
+@async_api_view()
+async def all_and_user_events(request, user):
+    listed = Event.objects.select_related("group")
+    events = [
+        event
+        async for event in listed.annotate(num_participants=Count("bets__user", distinct=True)).order_by(
+            "-num_participants"
+        )
+    ]
+    # The bets of the listed (unarchived) events only, through a subquery rather than an IN list
+    bets = await _bets_by_event(Bet.objects.filter(event__in=Event.objects.all()))
+
+    response_data = {"all_events": _events_data(request, user, events, bets)}
+    if user is not None:
+        user_events = [event async for event in listed.filter(organizer=user)]
+        response_data["user_events"] = _events_data(request, user, user_events, bets)
+    return _json(response_data)
+
+
+async def _members_payload(request, group_id):
+    """
+    Same shape as MemberSerializer(many=True) for a group's members.
+    """
+    members = [
+        member
+        async for member in Member.objects.filter(group_id=group_id).values(
+            "user_id", "group_id", "admin", "joined_at"
+        )
+    ]
+    user_ids = [member["user_id"] for member in members]
+
+    users = {}
+    async for user in CustomUser.objects.filter(id__in=user_ids).values():
+        users[user["id"]] = user
+    auth_groups = defaultdict(list)
+    async for user_id, auth_group_id in CustomUser.groups.through.objects.filter(
+        customuser_id__in=user_ids
+    ).values_list("customuser_id", "group_id"):
+        auth_groups[user_id].append(auth_group_id)
+    permissions = defaultdict(list)
+    async for user_id, permission_id in CustomUser.user_permissions.through.objects.filter(
+        customuser_id__in=user_ids
+    ).values_list("customuser_id", "permission_id"):
+        permissions[user_id].append(permission_id)
+
+    def user_payload(user):
+        # Same shape as UserSerializer (every field but the password)
+        return {
+            "id": user["id"],
+            "last_login": _datetime(user["last_login"]),
+            "is_superuser": user["is_superuser"],
+            "first_name": user["first_name"],
+            "last_name": user["last_name"],
+            "is_staff": user["is_staff"],
+            "is_active": user["is_active"],
+            "date_joined": _datetime(user["date_joined"]),
+            "username": user["username"],
+            "email": user["email"],
+            "profile_picture": _file_url(request, user["profile_picture"]),
+            "available_funds": _funds_field.to_representation(user["available_funds"]),
+            "groups": auth_groups[user["id"]],
+            "user_permissions": permissions[user["id"]],
+        }
+
+    return [
+        {
+            "user": user_payload(users[member["user_id"]]),
+            "group": member["group_id"],
+            "admin": member["admin"],
+            "joined_at": _datetime(member["joined_at"]),
+        }
+        for member in members
+    ]
+
+
+@async_api_view()
+async def group_detail(request, user, pk):
+    try:
+        group = await Group.objects.values("id", "name", "location", "description", "banner_image").aget(pk=pk)
+    except Group.DoesNotExist:
+        return _json({"detail": "Not found."}, status=404)
+
+    events = [event async for event in Event.objects.select_related("group").filter(group_id=pk)]
+    bets = await _bets_by_event(Bet.objects.filter(event__group_id=pk))
+    return _json({
+        "name": group["name"],
+        "id": group["id"],
+        "location": group["location"],
+        "description": group["description"],
+        "events": _events_data(request, user, events, bets),
+        "members": await _members_payload(request, pk),
+        "banner_image": _file_url(request, group["banner_image"]),
+    })
+
+
+@async_api_view(login_required=True)
+async def event_bet(request, user):
+    event_id = request.GET.get("event_id")
+    if not event_id:
+        return _json({"error": "event_id must be provided"}, status=400)
+
+    queryset = Bet.objects.filter(event_id=event_id)
+    if not user.is_staff:
+        queryset = queryset.filter(user=user)
+    bet = await queryset.values(
+        "id", "user_id", "event_id", "team_choice", "bet_type", "bet_amount",
+        "created_at", "updated_at", "status",
+    ).afirst()
+    if bet is None:
+        return _json({"detail": "Not found."}, status=404)
+
+    event = await Event.objects.select_related("group").aget(pk=bet["event_id"])
+    bets = await _bets_by_event(Bet.objects.filter(event_id=bet["event_id"]))
+    team_names = {"Team 1": event.team1, "Team 2": event.team2}
+    return _json({
+        "id": bet["id"],
+        "user": bet["user_id"],
+        "event": _events_data(request, user, event, bets, many=False),
+        "team_choice": bet["team_choice"],
+        "bet_type": bet["bet_type"],
+        "bet_amount": _amount_field.to_representation(bet["bet_amount"]),
+        "created_at": _datetime(bet["created_at"]),
+        "updated_at": _datetime(bet["updated_at"]),
+        "status": bet["status"],
+        "chosen_team_name": team_names.get(bet["team_choice"]),
+    })
+
+
+def _encode_cursor(created_at, pk):
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{pk}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        created_at = None
+    if created_at is None:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return created_at, pk
+
+
+@async_api_view(login_required=True)
+async def bet_history(request, user):
+    """
+    Same rows and filters as BetViewset.history; `next` carries a
+    (created_at, id) keyset cursor.
+    """
+    queryset = Bet.objects.filter(user=user)
+    if request.GET.get("status"):
+        queryset = queryset.filter(status__iexact=request.GET["status"])
+    created_from = parse_date_bound(request.GET, "from")
+    if created_from:
+        queryset = queryset.filter(created_at__gte=created_from)
+    created_to = parse_date_bound(request.GET, "to", end_of_day=True)
+    if created_to:
+        queryset = queryset.filter(created_at__lte=created_to)
+    if request.GET.get("cursor"):
+        created_at, pk = _decode_cursor(request.GET["cursor"])
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    try:
+        page_size = int(request.GET.get("page_size", BetHistoryCursorPagination.page_size))
+    except ValueError:
+        page_size = BetHistoryCursorPagination.page_size
+    page_size = max(1, min(page_size, BetHistoryCursorPagination.max_page_size))
+
+    # Ties in id order: bet_user_created_idx holds the id ascending after created_at
+    rows = queryset.order_by("-created_at", "id").values(
+        "id", "event_id", "event__team1", "event__team2", "event__start_time",
+        "event__is_complete", "event__group_id", "event__group__name",
+        "team_choice", "bet_type", "bet_amount", "status", "created_at",
+    )[: page_size + 1]
+    rows = [row async for row in rows]
+
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        query = request.GET.copy()
+        query["cursor"] = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    results = []
+    for row in rows:
+        team_names = {"Team 1": row["event__team1"], "Team 2": row["event__team2"]}
+        results.append({
+            "id": row["id"],
+            "event_id": row["event_id"],
+            "team1": row["event__team1"],
+            "team2": row["event__team2"],
+            "event_start_time": _datetime(row["event__start_time"]),
+            "event_is_complete": row["event__is_complete"],
+            "group_id": row["event__group_id"],
+            "group_name": row["event__group__name"],
+            "team_choice": row["team_choice"],
+            "chosen_team_name": team_names.get(row["team_choice"]),
+            "bet_type": row["bet_type"],
+            "bet_amount": _amount_field.to_representation(row["bet_amount"]),
+            "status": row["status"],
+            "created_at": _datetime(row["created_at"]),
+        })
+    return _json({"next": next_url, "results": results})
@@ -8,9 +8,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from users.models import CustomUser
-from ..models import Bet, Event
-from ..serializer import BetSerializer
-from django.utils import timezone
+from users import ledger, stats
+from betting_project import metrics
+from .. import streaming
+from ..models import ArchivedBet, Bet, Event
+from ..filters import parse_date_bound
+from ..pagination import BetHistoryCursorPagination
+from ..serializer import ArchivedBetHistorySerializer, BetHistorySerializer, BetSerializer
 from django.db import transaction
 import logging
 
@@ -18,11 +22,6 @@ logger = logging.getLogger(__name__)
 
 class BetViewset(viewsets.ModelViewSet):
     
-    # Color for logger debugger
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    END = '\033[0m'
-    
     # Define the serializer class used for this viewset
     serializer_class = BetSerializer
     
@@ -71,11 +70,48 @@ class BetViewset(viewsets.ModelViewSet):
         
         # Serialize the bet instance
         serializer = self.get_serializer(bet)
-        print(serializer.data)
         # Return the serialized bet data in the response
         return Response(serializer.data)
 
-    
+
+    @action(detail=False, methods=["get"], url_path="history")
+    def history(self, request):
+        """
+        The logged in user's bets, newest first, as flat rows.
+
+        Query params (all optional):
+            status: only bets with this status (e.g. "Won", "Lost", "Pending").
+            from / to: only bets created in this range; ISO dates or datetimes.
+            cursor / page_size: cursor pagination, see BetHistoryCursorPagination.
+        """
+        queryset = Bet.objects.filter(user=request.user).select_related("event__group")
+        return self._history_page(request, queryset, BetHistorySerializer)
+
+    @action(detail=False, methods=["get"], url_path="history/archived")
+    def archived_history(self, request):
+        """
+        The logged in user's bets on archived events (see api/archive.py),
+        same rows and query params as history.
+        """
+        queryset = ArchivedBet.objects.filter(user=request.user).select_related("event__group")
+        return self._history_page(request, queryset, ArchivedBetHistorySerializer)
+
+    def _history_page(self, request, queryset, serializer_class):
+        bet_status = request.query_params.get("status")
+        if bet_status:
+            queryset = queryset.filter(status__iexact=bet_status)
+        created_from = parse_date_bound(request.query_params, "from")
+        if created_from:
+            queryset = queryset.filter(created_at__gte=created_from)
+        created_to = parse_date_bound(request.query_params, "to", end_of_day=True)
+        if created_to:
+            queryset = queryset.filter(created_at__lte=created_to)
+
+        paginator = BetHistoryCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def check_and_update_funds(self, user_id, bet_amount):
         """
         Check if the user has sufficient funds and update their balance.
@@ -89,9 +125,10 @@ class BetViewset(viewsets.ModelViewSet):
         # Retrieve the latest user instance from the db
         user = CustomUser.objects.get(id=user_id)
         
-        # Log the current state for debugging        
-        logger.debug(f"{self.GREEN} 'bet_amount: {bet_amount}, type: {type(bet_amount)}'{self.END}")
-        logger.debug(f"{self.GREEN} 'user.available_funds: {user.available_funds}, type: {type(user.available_funds)}'{self.END}")
+        # Log the current state for debugging
+        logger.debug(
+            "Funds check for user %s: bet_amount=%s, available_funds=%s", user_id, bet_amount, user.available_funds
+        )
 
         # Check if the user's available funds are less than or equal to zero
         if user.available_funds <= 0:
@@ -105,7 +142,7 @@ class BetViewset(viewsets.ModelViewSet):
         user.available_funds -= bet_amount
         # Save the updated user object
         user.save(update_fields=["available_funds"])
-        logger.info(f"{self.GREEN}'Updated funds for user %s', {user_id} {self.END}")
+        logger.info("Updated funds for user %s", user_id)
 
 
     def perform_create(self, serializer):
@@ -120,13 +157,17 @@ class BetViewset(viewsets.ModelViewSet):
         # Check and update the user's funds
         self.check_and_update_funds(user.id, bet_amount)
         # Save the bet instance with the currently authenticated user
-        serializer.save(user=self.request.user)
+        bet = serializer.save(user=self.request.user)
+        stats.record_bet_placed(user.id, bet_amount)
+        ledger.record_stake(bet)
+        transaction.on_commit(lambda: metrics.BETS_PLACED.inc(bet_type=bet.bet_type))
+        streaming.publish_pool_on_commit(bet.event_id)
 
     def create_bet(self, request, user):
         """
         Custom action to Create a new bet.
         """
-        print("create_bet method called") # DEBUGGING
+        logger.debug("create_bet called for user %s", user.id)
         # Deserialize and validate the incoming data from react betform
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -143,8 +184,8 @@ class BetViewset(viewsets.ModelViewSet):
             # Return an error response if the event does not exist
             return Response({"details": "Event does not exist"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if the event has already started
-        if event.start_time <= timezone.now():
+        # Check if the event's market has closed
+        if not event.accepts_bets:
             # Return an error response if the event has started
             return Response({"details": "Cannot place a bet after the event has started"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -153,7 +194,7 @@ class BetViewset(viewsets.ModelViewSet):
             try:                
                 # Create and Save the bet to the database
                 self.perform_create(serializer)
-                logger.info(f"{self.GREEN}Bet successfully created for user {user.id} on event {event_id}{self.END}")
+                logger.info("Bet successfully created for user %s on event %s", user.id, event_id)
             except ValidationError as e:
                 # Handle known validation errors (like insufficient funds error details from check_and_update_funds)
                 return Response({"details": str(e)}, status=status.HTTP_400_BAD_REQUEST)   
@@ -173,7 +214,7 @@ class BetViewset(viewsets.ModelViewSet):
         bet = self.get_object()
 
         # Check if the event associated with the bet has already started
-        if bet.event.start_time <= timezone.now():
+        if not bet.event.accepts_bets:
             # Return an error response if the event has started
             return Response({"details": "Cannot update a bet after the event has started"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -181,8 +222,11 @@ class BetViewset(viewsets.ModelViewSet):
         serializer = self.get_serializer(bet, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         
-        # Save the updated bet data
+        # Save the updated bet data and keep the user's stake totals in step
+        old_amount = bet.bet_amount
         serializer.save()
+        stats.record_bet_changed(bet.user_id, old_amount, bet.bet_amount)
+        streaming.publish_pool_on_commit(bet.event_id)
         
         # Return a success response with the updated bet data
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -194,10 +238,13 @@ class BetViewset(viewsets.ModelViewSet):
         # Retrieve the bet instance to be deleted
         bet = self.get_object()
 
-        # Check if the event time associated with the bet is in the past
-        if bet.event.start_time <= timezone.now():
+        # Check if the event associated with the bet has already started
+        if not bet.event.accepts_bets:
             # Return an error response if the event has started
             return Response({"details": "Cannot delete a bet after the associated event has started"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Proceed with the default deletion process if the event has not started
-        return super().destroy(request, *args, **kwargs)
+        response = super().destroy(request, *args, **kwargs)
+        stats.record_bet_removed(bet.user_id, bet.bet_amount)
+        streaming.publish_pool_on_commit(bet.event_id)
+        return response
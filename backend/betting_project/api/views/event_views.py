@@ -1,43 +1,55 @@
 from decimal import Decimal
 from django.db.models import Count
-from MySQLdb import DatabaseError
 from django.utils import timezone
 from validators.bet_validators import bet_type_validator
+from .. import importing, payouts, settlement, streaming
 from ..models import Event, Bet
-from ..serializer import EventSerializer
+from ..serializer import EventSerializer, QuoteSerializer
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.exceptions import ValidationError
 from django.db import models
 from django.db.models import F, Sum
 from django.db import transaction
 from django.contrib.auth import get_user_model
+from betting_project import metrics
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 CustomUser = get_user_model()
 
+# Content types of schedules sent as the body of POST /api/events/bulk/
+BULK_CONTENT_TYPES = {
+    "text/csv": importing.CSV,
+    "application/x-ndjson": importing.JSON_LINES,
+    "application/jsonl": importing.JSON_LINES,
+}
+
 
 class EventViewset(viewsets.ModelViewSet):
     """
     API endpoint that allows events to be viewed or edited.
     """
 
-    # Color for logger debugger
-    YELLOW = "\033[93m"  # ANSI escape code for bright yellow text
-    HEADER = "\033[95m"
-    BLUE = "\033[94m"
-    RED = "\033[91m"
-    GREEN = "\033[92m"
-    END = "\033[0m"
-
     queryset = Event.objects.all()
     serializer_class = EventSerializer
 
+    def get_queryset(self):
+        """
+        `?state=open` lists the events in one market state, soonest first.
+        """
+        queryset = super().get_queryset()
+        state = self.request.query_params.get("state")
+        if state is not None and self.action == "list":
+            if state not in dict(Event.STATE_CHOICES):
+                raise ValidationError({"state": f"Must be one of {', '.join(dict(Event.STATE_CHOICES))}."})
+            queryset = queryset.filter(state=state).order_by("start_time")
+        return queryset
 
     def create(self, request, *args, **kwargs):
         logger.info("Received data for Event creation: %s", request.data)
@@ -50,7 +62,7 @@ class EventViewset(viewsets.ModelViewSet):
             raise PermissionDenied
 
         # Check if the event has already started
-        if timezone.now() >= event.start_time:
+        if event.state not in (Event.SCHEDULED, Event.OPEN) or timezone.now() >= event.start_time:
             raise ValidationError(
                 {"detail": "Cannot update the event after it has started"}
             )
@@ -76,6 +88,72 @@ class EventViewset(viewsets.ModelViewSet):
         )
         return super().destroy(request, *args, **kwargs)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create or update many events from a schedule (see api/importing.py);
+        new events are organized by the requesting staff user. Send the file as the request
+        body (Content-Type text/csv or application/x-ndjson) or as the "file"
+        field of a multipart upload. Answers {"created": n, "updated": n}, or
+        400 with the invalid rows and nothing imported.
+        """
+        # ?schedule_format= overrides the format (DRF keeps ?format= for renderers)
+        content_type = request.content_type.split(";")[0].strip()
+        if content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                raise ValidationError({"file": "Upload the schedule as the \"file\" field."})
+            schedule_format = request.query_params.get("schedule_format") or importing.format_for(upload.name)
+            body = upload.read()
+        else:
+            schedule_format = request.query_params.get("schedule_format") or BULK_CONTENT_TYPES.get(content_type)
+            body = request.body
+        if schedule_format not in importing.FORMATS:
+            raise ValidationError({"schedule_format": f"Must be one of {', '.join(importing.FORMATS)}."})
+
+        try:
+            counts = importing.import_events(body.decode("utf-8-sig"), schedule_format, organizer=request.user)
+        except UnicodeDecodeError:
+            raise ValidationError({"detail": "The schedule must be UTF-8."})
+        except importing.InvalidScheduleError as e:
+            return Response({"errors": e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(
+            "Events imported by user %s: %s created, %s updated",
+            request.user.username, counts["created"], counts["updated"],
+        )
+        return Response(counts, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"], url_path="quote")
+    def quote(self, request, pk=None):
+        """
+        What a bet of `?amount=` on `?team=` would win if it were placed now
+        and that team won, from the event's cached pool totals (see
+        streaming.cached_pool): no bet rows are read.
+        """
+        event = self.get_object()
+        serializer = QuoteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        label = serializer.validated_data["team"]
+        if not event.accepts_bets:
+            raise ValidationError({"details": "Betting on this event has closed"})
+
+        other_label = "Team 2" if label == "Team 1" else "Team 1"
+        pool = streaming.cached_pool(event.id)["pools"]
+        amount = payouts.to_cents(serializer.validated_data["amount"])
+        other_pool = payouts.to_cents(pool[other_label])
+        winning = payouts.quote(amount, payouts.to_cents(pool[label]), other_pool)
+        return Response(
+            {
+                "event_id": event.id,
+                "team_choice": label,
+                "team": event.team1 if label == "Team 1" else event.team2,
+                "amount": f"{payouts.from_cents(amount):.2f}",
+                "potential_winning": f"{payouts.from_cents(winning):.2f}",
+                "total_winnable_pool": f"{payouts.from_cents(other_pool):.2f}",
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(
     detail=False,
     methods=["get"],
@@ -146,14 +224,14 @@ class EventViewset(viewsets.ModelViewSet):
         url_path="mark-as-complete",
         permission_classes=[IsAuthenticated],
     )
+    @transaction.atomic
     def complete_event(self, request, pk=None):
         """
         Custom action to mark an event as complete. This method follows several steps:
         1. User authentication check.
         2. Winning team validation.
-        3. Calculation of the total bet amount.
-        4. Marking the event as complete in the database.
-        5. Updating the bet status based on the event outcome.
+        3. Settlement through api.settlement.settle_events, which distributes
+           the winnings, marks the bets Won or Lost and the event settled.
 
         The winning team name is determined in this method and passed to the EventSerializer
         as part of the context. This context is used by the serializer to accurately calculate
@@ -170,8 +248,9 @@ class EventViewset(viewsets.ModelViewSet):
             and serialized event data.
         """
 
-        # Retrieve the event based on the pk from the URL
-        event = self.get_object()
+        # Retrieve the event based on the pk from the URL, and lock it until the
+        # settlement commits: if any step fails, all of them roll back, state included
+        event = Event.objects.select_for_update().get(pk=self.get_object().pk)
 
         # Step 1: Check if the user is authorized to complete the event
         if not self.is_authorized_user(request.user, event):
@@ -179,31 +258,29 @@ class EventViewset(viewsets.ModelViewSet):
                 {"details": "You did not create this event"},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        if event.is_complete:
+            return Response(
+                {"details": "Event has already been completed"}, status=status.HTTP_400_BAD_REQUEST
+            )
         # Step 2: Validate the winning team
         winning_team = self.validate_winning_team(request, event)
         if not winning_team:
             return Response(
                 {"details": "Invalid Winning Team"}, status=status.HTTP_400_BAD_REQUEST
             )
-        # Step 3: Calculate the total bet amount
-        total_bet_amount = self._calculate_total_bet_amount(event)
-        if total_bet_amount == 0:
+        # Step 3: Settle it the way the Event admin does: payouts, bet statuses,
+        # betting stats and ledger entries all come from api/settlement.py
+        settlement_started = time.perf_counter()
+        [result] = settlement.settle_events({event.id: winning_team})
+        if result["result"] == settlement.SKIPPED:
             return Response(
-                {"details": "No bets were placed on this event"},
-                status=status.HTTP_404_NOT_FOUND,
+                {"details": result["detail"]},
+                status=status.HTTP_404_NOT_FOUND
+                if result["detail"] == settlement.NO_BETS
+                else status.HTTP_400_BAD_REQUEST,
             )
-        # Step 4: Calculate and distribute winnings
-        # Example: if total_bet_amount is $1000 and a user bet $100 on the winning team
-        # their winning_info entry should look like {"username": "Julia Narine "winning_amount": $100}
-        winning_info = self._calculate_and_distribute_winnings(
-            event, winning_team, total_bet_amount
-        )
-
-        # Step 5: Calculate and distribute winnings based on the event outcome
-        self._update_bet_status(event, winning_team)
-
-        event.is_complete = True
-        event.save()
+        metrics.SETTLEMENT_DURATION.observe(time.perf_counter() - settlement_started)
+        metrics.SETTLEMENT_BETS.observe(result["bets"])
 
         logger.info(
             "Event with ID %s marked as complete by user %s",
@@ -214,7 +291,7 @@ class EventViewset(viewsets.ModelViewSet):
             {
                 "details": "Event completed and winnings distributed",
                 "winning_team": winning_team,
-                "winning_info": winning_info,
+                "winning_info": result["winning_info"],
             },
             status=status.HTTP_200_OK,
         )
@@ -235,172 +312,3 @@ class EventViewset(viewsets.ModelViewSet):
         if winning_team_name in [event.team1, event.team2]:
             return winning_team_name
         return None
-
-    def _calculate_total_bet_amount(self, event):
-        return Bet.objects.filter(event=event).aggregate(Sum("bet_amount"))[
-            "bet_amount__sum"
-        ]
-
-    def _update_bet_status(self, event, winning_team):
-        """
-        Updates the status of each bet based on the outcome of the event.
-        Sets the status to 'Won' if the bet was on the winning team, otherwise 'Lost'.
-        """
-        all_bets = Bet.objects.filter(event=event)
-        for bet in all_bets:
-            if bet.team_choice == winning_team:
-                bet.status = "Won"
-            else:
-                bet.status = "Lost"
-            bet.save()
-
-    @transaction.atomic
-    def _calculate_and_distribute_winnings(
-        self, event, winning_team_name, total_bet_amount
-    ):
-        """
-        Calculate and distribute winnigns based on the bets place on an event.
-        Handles several senaris:
-        1. If only 1 person bets. the are refunded regardless of the outcome
-        2. If all bettors select the winning team, their bets are refunded.
-        3. If there are multiple bets and 1 person wins, they win a proportion of of the total bet amount.
-        4. If more than one person wins, each winner gets a proportion of the total pool based on their bet.
-
-        Args:
-            event (Event): The event for which to calculate and distribute winnings.
-            winning_team (str): The team that won the event.
-            total_bet_amount (Decimal): The total amount bet on the event.
-
-        Returns:
-            list: A list of dicts w/ each winner's username and their winning amount.
-        """
-
-        logger.info(
-            f"{self.GREEN}Starting calculation and distribution of the winnings for event {event.id}{self.END}"
-        )
-
-        # Check if the event is already completed ()
-        if event.is_complete:
-            logger.info(f"Event {event.id} is already marked as complete.")
-            return {"details": "Event has already been completed."}
-
-        total_bet_amount = Decimal(total_bet_amount)
-        all_bets = Bet.objects.filter(event=event)
-
-        # Logging for debugging
-        logger.info(
-            f"{self.BLUE}Total bet amount for event {event.id}: {total_bet_amount}{self.END}"
-        )
-        logger.info(
-            f"{self.BLUE}Winning team for event {event.id}: {winning_team_name}{self.END}"
-        )
-
-        for bet in all_bets:
-            bet.bet_amount = Decimal(bet.bet_amount)
-            logger.info(
-                f"{self.BLUE}Bet ID {bet.id}: Team choice - {bet.team_choice},  Bet amount - {bet.bet_amount}{self.END}"
-            )
-
-        # Determine if the winning team name matches team1 or team2 of the event
-        if winning_team_name == event.team1:
-            winning_team_label = "Team 1"
-        elif winning_team_name == event.team2:
-            winning_team_label = "Team 2"
-        else:
-            logger.error(
-                f"{self.RED}Invalid winning team name for event {event.id}: {winning_team_name}{self.END}"
-            )
-            return {"details": "Invalid winning team name"}
-
-        winning_bets = all_bets.filter(team_choice=winning_team_label)
-        total_bettors = all_bets.count()
-        winning_bettors = winning_bets.count()
-
-        # Logging for debugging
-        logger.info(
-            f"{self.BLUE}Total bettors for event {event.id}: {total_bettors}{self.END}"
-        )
-        logger.info(
-            f"{self.BLUE}Total winning bettors for event {event.id}: {winning_bettors}{self.END}"
-        )
-
-        # Scenario 1: Only 1 bettor in the event
-        if total_bettors == 1:
-            logger.info(
-                f"{self.YELLOW} Only 1 bet placed for {event.id}, a refund will be distributed{self.END}"
-            )
-            return self._refund_bets(all_bets)
-
-        # Scenario 2: No bettors chose the winning team
-        elif winning_bettors == 0:
-            logger.info(
-                f"{self.YELLOW}No winning bets for event {event.id}, all bets refunded{self.END}"
-            )
-            return self._refund_bets(all_bets)
-
-        # Scenario 3: All bettors chose the winning team
-        elif winning_bettors == total_bettors:
-            logger.info(
-                f"{self.YELLOW}All bets were winning for event {event.id} all bets refunded{self.END}"
-            )
-            return self._refund_bets(all_bets)
-
-        # Scenario 4: Multiple bettors, distribute winnings based on bet proportion
-        else:
-            logger.info(
-                f"{self.YELLOW} One more winning bets for event {event.id}, distributing winnings{self.END}"
-            )
-            return self._distribute_winnings(winning_bets, total_bet_amount)
-
-    # HELPER METHODS
-    def _refund_bets(self, bets):
-        refunded_bets = []
-        for bet in bets:
-            try:
-                CustomUser.objects.filter(pk=bet.user.pk).update(
-                    available_funds=F("available_funds") + bet.bet_amount
-                )
-                logger.info(
-                    f"{self.BLUE}Refunded {bet.bet_amount} to user {bet.user.username} for bet {bet.id}{self.END}"
-                )
-                refunded_bets.append(bet.id)
-            except DatabaseError as e:
-                logger.error(
-                    f"{self.RED}Database error while refunding bet {bet.id}: {e}{self.END}"
-                )
-                # No need to raise an exception; let the transaction.atomic handle the rollback
-        return [{"message": "Bets refunded", "refunded_bets": refunded_bets}]
-
-    def _distribute_winnings(self, winning_bets, total_bet_amount):
-        winning_info = []
-        winning_bet_total = Decimal("0")
-
-        for bet in winning_bets:
-            # bet_amount = Decimal(bet.bet_amount)
-            winning_bet_total += Decimal(bet.bet_amount)
-
-        if winning_bet_total == 0:
-            logger.error(f"{self.RED}No winning bets total to distribute{self.END}")
-            return [{"message": "Error: No winning bets total"}]
-
-        losing_bet_total = total_bet_amount - winning_bet_total
-
-        for bet in winning_bets:
-            try:
-                bet_amount = Decimal(bet.bet_amount)
-                user_share = (bet_amount / winning_bet_total) * losing_bet_total
-                CustomUser.objects.filter(pk=bet.user.pk).update(
-                    available_funds=F("available_funds") + user_share
-                )
-                winning_info.append(
-                    {"username": bet.user.username, "winning_amount": user_share}
-                )
-                logger.info(
-                    f"{self.BLUE}Distributed {user_share} to user {bet.user.username} for bet ID {bet.id}{self.END}"
-                )
-            except DatabaseError as e:
-                logger.error(
-                    f"{self.RED}Database error while distributing winnings for bet {bet.id}: {e}{self.END}"
-                )
-                # No need to raise an exception; let the transaction.atomic handle the rollback
-        return winning_info
@@ -0,0 +1,93 @@
+"""
+Server-sent events stream of live event updates (see api/streaming.py).
+
+    GET /api/stream/events/                      every event's updates
+    GET /api/stream/events/?event_id=1&event_id=2  only these events, each
+                                                 starting with a snapshot
+
+Connected clients cost an idle coroutine each, not a worker thread, when
+served from the ASGI app (betting_project.asgi, e.g. under uvicorn). Under
+WSGI (including `manage.py runserver`) Django would collect the whole
+stream before sending any of it, so the view answers 501 there and clients
+fall back to the event state in the API's payloads. The stream ends after
+EVENT_STREAM_MAX_SECONDS so connections get rebalanced; EventSource
+reconnects on its own. A client that falls too far behind gets a "reset"
+message and is disconnected, so it reloads instead of showing stale data.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from betting_project.pubsub import broker
+from .. import streaming
+from ..models import Event
+
+MAX_EVENTS = 50
+RETRY_MILLISECONDS = 5000
+
+
+def _sse(message_type, data):
+    return f"event: {message_type}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n"
+
+
+async def event_stream(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Live updates need the ASGI server (betting_project.asgi)."}, status=501)
+    try:
+        event_ids = sorted({int(value) for value in request.GET.getlist("event_id")})
+    except ValueError:
+        return JsonResponse({"event_id": "Must be integers."}, status=400)
+    if len(event_ids) > MAX_EVENTS:
+        return JsonResponse({"event_id": f"At most {MAX_EVENTS} events per stream."}, status=400)
+
+    response = StreamingHttpResponse(_stream(event_ids), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Don't let nginx buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _stream(event_ids):
+    max_seconds = settings.EVENT_STREAM_MAX_SECONDS
+    keepalive = settings.EVENT_STREAM_KEEPALIVE_SECONDS
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+
+    # Subscribe before the snapshot so no change falls in between
+    channels = [streaming.event_channel(event_id) for event_id in event_ids] or [streaming.ALL_EVENTS]
+    subscription = broker.subscribe(channels)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        if event_ids:
+            events = [
+                event async for event in Event.objects.filter(id__in=event_ids).values("id", "state")
+            ]
+            pools = await streaming.apools([event["id"] for event in events])
+            for event in events:
+                yield _sse("snapshot", {
+                    "event_id": event["id"],
+                    "status": event["state"],
+                    **pools[event["id"]],
+                })
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            item = await subscription.get(timeout=min(keepalive, remaining))
+            if subscription.overflowed:
+                yield _sse("reset", {})
+                return
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            _, message = item
+            yield _sse(message["type"], message["data"])
+    finally:
+        subscription.close()
@@ -0,0 +1,185 @@
+"""
+Throughput benchmark: sync DRF views under WSGI (gunicorn) vs the async views
+under ASGI (uvicorn), at a fixed number of concurrent connections.
+
+Run from backend/betting_project against a seeded local database:
+
+    python benchmarks/async_vs_sync.py --token <access token> --event-id 1 --group-id 1
+
+By default it starts both servers itself (same worker count for each), hits
+every endpoint pair for --duration seconds with --concurrency open
+connections, and writes the results as JSON (see --output). Use
+--wsgi-url / --asgi-url with --no-serve to benchmark servers you started yourself.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+# (name, sync path, async path, needs auth)
+ENDPOINTS = [
+    ("all_and_user_events", "/api/events/all_and_user_events/", "/api/async/events/all_and_user_events/", False),
+    ("group_detail", "/api/groups/{group_id}/", "/api/async/groups/{group_id}/", False),
+    ("event_bet", "/api/bets/event-bet/?event_id={event_id}", "/api/async/bets/event-bet/?event_id={event_id}", True),
+    ("bet_history", "/api/bets/history/", "/api/async/bets/history/", True),
+]
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def load(url, concurrency, duration, headers):
+    """
+    Keep `concurrency` requests in flight against `url` for `duration` seconds.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            continue
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+    }
+
+
+def start_servers(args):
+    wsgi = subprocess.Popen([
+        "gunicorn", "betting_project.wsgi:application",
+        "--bind", f"127.0.0.1:{args.wsgi_port}",
+        "--workers", str(args.workers),
+        "--threads", str(args.threads),
+        "--backlog", str(args.concurrency * 2),
+    ])
+    asgi = subprocess.Popen([
+        "uvicorn", "betting_project.asgi:application",
+        "--host", "127.0.0.1",
+        "--port", str(args.asgi_port),
+        "--workers", str(args.workers),
+        "--backlog", str(args.concurrency * 2),
+        "--no-access-log",
+    ])
+    return [wsgi, asgi]
+
+
+async def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def run(args):
+    wsgi_url = args.wsgi_url or f"http://127.0.0.1:{args.wsgi_port}"
+    asgi_url = args.asgi_url or f"http://127.0.0.1:{args.asgi_port}"
+    await wait_until_up(f"{wsgi_url}/api/")
+    await wait_until_up(f"{asgi_url}/api/")
+
+    results = []
+    for name, sync_path, async_path, needs_auth in ENDPOINTS:
+        if needs_auth and not args.token:
+            print(f"skipping {name}: needs --token")
+            continue
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        params = {"event_id": args.event_id, "group_id": args.group_id}
+        for server, base, path in (("wsgi", wsgi_url, sync_path), ("asgi", asgi_url, async_path)):
+            url = base + path.format(**params)
+            # Warm up connections and caches before measuring
+            await load(url, min(args.concurrency, 20), 2, headers)
+            result = await load(url, args.concurrency, args.duration, headers)
+            result.update({"endpoint": name, "server": server, "url": url})
+            results.append(result)
+            print(
+                f"{name:22} {server}  {result['requests_per_second']:>8} req/s  "
+                f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  errors {result['errors']}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per endpoint and server.")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes for both servers.")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per gunicorn worker.")
+    parser.add_argument("--wsgi-port", type=int, default=8001)
+    parser.add_argument("--asgi-port", type=int, default=8002)
+    parser.add_argument("--wsgi-url", help="Base URL of an already running WSGI server.")
+    parser.add_argument("--asgi-url", help="Base URL of an already running ASGI server.")
+    parser.add_argument("--no-serve", action="store_true", help="Don't start the servers.")
+    parser.add_argument("--token", help="JWT access token for the endpoints that need a user.")
+    parser.add_argument("--event-id", type=int, default=1)
+    parser.add_argument("--group-id", type=int, default=1)
+    parser.add_argument("--output", default="benchmarks/results/async_vs_sync.json")
+    args = parser.parse_args()
+
+    servers = [] if args.no_serve else start_servers(args)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({
+            "benchmark": "async_vs_sync",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "settings": os.environ.get("DJANGO_SETTINGS_MODULE", "betting_project.settings"),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers,
+            "threads": args.threads,
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
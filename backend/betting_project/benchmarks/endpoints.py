@@ -0,0 +1,323 @@
+"""
+Latency percentiles and query counts for every route in api/urls.py and
+users/urls.py, at several data sizes (see api/seeding.py for the presets).
+
+Run from backend/betting_project:
+
+    python benchmarks/endpoints.py --sizes small,medium
+    python benchmarks/endpoints.py --sizes small,medium --compare benchmarks/results/endpoints-<commit>.json
+
+It creates a test database (like `manage.py test`), seeds it once per size
+and calls each route --requests times in-process through the test client,
+so the numbers are the view, ORM and database cost without a web server.
+Requests that write run in a transaction that is rolled back, so every
+iteration sees the same data. Results are written as JSON, named after the
+current commit; --compare reports routes whose p95 or query count went up
+against an earlier run and exits with status 1 if there are any.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "betting_project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone as django_timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+import api.urls  # noqa: E402
+import users.urls  # noqa: E402
+from api.models import Bet, Event, Group, Member, Participant  # noqa: E402
+from api.seeding import SIZES, seed_bench_data  # noqa: E402
+from betting_project.middleware import QueryCounter  # noqa: E402
+from betting_project.testing import route_names  # noqa: E402
+from users.deposits import create_deposit  # noqa: E402
+from users.models import CustomUser  # noqa: E402
+from users.payments import get_payment_client, reset_payment_client  # noqa: E402
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def current_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty.stdout.strip() else commit
+
+
+def build_fixture():
+    """
+    A regular (non-staff) user with a bet on the hottest event, a membership
+    and a deposit on the seeded data, plus the objects the route requests need.
+    """
+    runner = CustomUser.objects.create_user(
+        username="bench_runner", email="bench_runner@bench.local", password="bench-password",
+        available_funds=10_000,
+    )
+    # The two hottest upcoming events
+    upcoming = list(
+        Event.objects.filter(start_time__gt=django_timezone.now())
+        .annotate(bet_count=Count("bets"))
+        .order_by("-bet_count", "id")[:2]
+    )
+    hot_group = upcoming[0].group
+    member, _ = Member.objects.get_or_create(user=runner, group=hot_group)
+    # Bet.save also creates the Participant row
+    bet = Bet.objects.create(user=runner, event=upcoming[0], team_choice="Team 1", bet_type="Win", bet_amount=10)
+    other_group = Group.objects.exclude(members__user=runner).order_by("id").first()
+    # A past event with bets, left open for the runner to settle
+    to_settle = Event.objects.filter(is_complete=True, bets__isnull=False).order_by("id").first()
+    Event.objects.filter(pk=to_settle.pk).update(is_complete=False, state=Event.CLOSED, organizer=runner)
+    deposit = create_deposit(runner, 1000, "pm_card_visa")
+    return {
+        "runner": runner,
+        "event": upcoming[0],
+        "open_event": upcoming[1],
+        "to_settle": Event.objects.get(pk=to_settle.pk),
+        "group": hot_group,
+        "other_group": other_group,
+        "member": member,
+        "bet": bet,
+        "participant": Participant.objects.get(bet=bet),
+        "deposit": deposit,
+    }
+
+
+def route_requests(fixture):
+    """
+    (name, method, url, kwargs) for one request per route.
+    """
+    runner = fixture["runner"]
+    event = fixture["event"]
+    group = fixture["group"]
+    webhook_event = get_payment_client().build_event(
+        {"id": "pi_unknown", "status": "succeeded", "amount": 1000, "metadata": {}}
+    )
+    return [
+        ("api-root", "get", reverse("api-root"), {}),
+        ("async-all-and-user-events", "get", reverse("async-all-and-user-events"), {}),
+        ("async-group-detail", "get", reverse("async-group-detail", args=[group.id]), {}),
+        ("async-event-bet", "get", f"{reverse('async-event-bet')}?event_id={event.id}", {}),
+        ("async-bet-history", "get", reverse("async-bet-history"), {}),
+        ("group-list", "get", reverse("group-list"), {}),
+        ("group-detail", "get", reverse("group-detail", args=[group.id]), {}),
+        ("group-join", "post", reverse("group-join", args=[fixture["other_group"].id]), {}),
+        ("group-leave", "post", reverse("group-leave", args=[group.id]), {}),
+        ("member-list", "get", reverse("member-list"), {}),
+        ("member-detail", "get", reverse("member-detail", args=[fixture["member"].id]), {}),
+        ("event-list", "get", reverse("event-list"), {}),
+        ("event-all-and-user-events", "get", reverse("event-all-and-user-events"), {}),
+        ("event-detail", "get", reverse("event-detail", args=[event.id]), {}),
+        (
+            "event-complete-event",
+            "post",
+            reverse("event-complete-event", args=[fixture["to_settle"].id]),
+            {"data": {"winning_team": fixture["to_settle"].team1}},
+        ),
+        ("bet-list", "get", reverse("bet-list"), {}),
+        (
+            "bet-list",
+            "post",
+            reverse("bet-list"),
+            {"data": {"user": runner.id, "event_id": fixture["open_event"].id, "team_choice": "Team 1",
+                      "bet_type": "Win", "bet_amount": 5}},
+        ),
+        ("bet-event-bet", "get", f"{reverse('bet-event-bet')}?event_id={event.id}", {}),
+        ("bet-history", "get", reverse("bet-history"), {}),
+        ("bet-detail", "get", reverse("bet-detail", args=[fixture["bet"].id]), {}),
+        ("participant-list", "get", reverse("participant-list"), {}),
+        ("participant-detail", "get", reverse("participant-detail", args=[fixture["participant"].id]), {}),
+        ("customuser-me", "get", reverse("customuser-me"), {}),
+        ("customuser-detail", "get", reverse("customuser-detail", args=[runner.id]), {}),
+        ("user-statement", "get", reverse("user-statement"), {}),
+        (
+            "signup",
+            "post",
+            reverse("signup"),
+            {"data": {"username": "bench_signup", "email": "bench_signup@bench.local", "password": "Bench12345",
+                      "password2": "Bench12345"}},
+        ),
+        ("stripe-config", "get", reverse("stripe-config"), {}),
+        ("stripe-charge", "post", reverse("stripe-charge"), {"data": {"amount": 500, "source": "pm_card_visa"}}),
+        ("stripe-deposit", "get", reverse("stripe-deposit", args=[fixture["deposit"].id]), {}),
+        ("stripe-webhook", "post", reverse("stripe-webhook"), {"data": webhook_event, "format": "json"}),
+    ]
+
+
+class Rollback(Exception):
+    pass
+
+
+def call(client, method, url, kwargs):
+    """
+    Make one request; return (seconds, queries, status). Writes are rolled back.
+    """
+    # An execute wrapper rather than connection.queries, whose log is capped
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        if method == "get":
+            response = client.get(url, **kwargs)
+            if getattr(response, "streaming", False):
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        else:
+            try:
+                with transaction.atomic():
+                    response = getattr(client, method)(url, **kwargs)
+                    elapsed = time.perf_counter() - started
+                    raise Rollback
+            except Rollback:
+                pass
+    return elapsed, counter.count, response.status_code
+
+
+def bench_size(size, requests, warmup):
+    call_command("flush", interactive=False, verbosity=0)
+    started = time.perf_counter()
+    created = seed_bench_data(*SIZES[size])
+    print(f"[{size}] seeded {created} in {time.perf_counter() - started:.1f}s")
+
+    fixture = build_fixture()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(fixture['runner']).access_token}")
+
+    routes = route_requests(fixture)
+    missing = route_names(api.urls, users.urls) - {name for name, _, _, _ in routes}
+    if missing:
+        print(f"[{size}] no request defined for: {', '.join(sorted(missing))}")
+
+    results = []
+    for name, method, url, kwargs in routes:
+        for _ in range(warmup):
+            call(client, method, url, kwargs)
+        samples = [call(client, method, url, kwargs) for _ in range(requests)]
+        latencies = sorted(seconds for seconds, _, _ in samples)
+        result = {
+            "route": name,
+            "method": method.upper(),
+            "status": samples[-1][2],
+            "requests": requests,
+            "queries": int(statistics.median(queries for _, queries, _ in samples)),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+        results.append(result)
+        print(
+            f"[{size}] {result['method']:4} {name:28} {result['status']}  queries {result['queries']:>4}  "
+            f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms"
+        )
+    return {"size": size, "rows": created, "results": results}
+
+
+def compare(report, baseline_path, threshold, min_ms):
+    """
+    Print the routes that got slower or run more queries than in the baseline.
+    Returns the number of regressions.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {
+        (size["size"], result["method"], result["route"]): result
+        for size in baseline["sizes"]
+        for result in size["results"]
+    }
+    regressions = 0
+    print(f"compared with {baseline.get('commit')} ({baseline_path}):")
+    for size in report["sizes"]:
+        for result in size["results"]:
+            old = before.get((size["size"], result["method"], result["route"]))
+            if old is None:
+                continue
+            problems = []
+            if result["queries"] > old["queries"]:
+                problems.append(f"queries {old['queries']} -> {result['queries']}")
+            if result["p95_ms"] > old["p95_ms"] * threshold and result["p95_ms"] - old["p95_ms"] > min_ms:
+                problems.append(f"p95 {old['p95_ms']} -> {result['p95_ms']} ms")
+            if problems:
+                regressions += 1
+                print(f"  REGRESSION [{size['size']}] {result['method']} {result['route']}: {', '.join(problems)}")
+    if not regressions:
+        print("  no regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma separated, from {', '.join(SIZES)}.")
+    parser.add_argument("--requests", type=int, default=30, help="Measured requests per route and size.")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per route first.")
+    parser.add_argument("--output", help="Default: benchmarks/results/endpoints-<commit>.json")
+    parser.add_argument("--compare", help="Results of an earlier run to check for regressions against.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p95 ratio that counts as a regression.")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Ignore p95 increases smaller than this.")
+    parser.add_argument("--keepdb", action="store_true", help="Keep the test database afterwards.")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+
+    setup_test_environment(debug=False)
+    # Measure the primary only, with the offline payment client and no background threads
+    override_settings(
+        DATABASE_REPLICAS=[],
+        PAYMENT_CLIENT="users.payments.FakePaymentClient",
+        DEPOSITS_SUBMIT_ASYNC=False,
+        PROFILE_SAMPLE_RATE=0,
+    ).enable()
+    reset_payment_client()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    try:
+        report = {
+            "benchmark": "endpoints",
+            "commit": current_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "database": connection.vendor,
+            "settings": os.environ["DJANGO_SETTINGS_MODULE"],
+            "requests": args.requests,
+            "sizes": [bench_size(size, args.requests, args.warmup) for size in sizes],
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    output = args.output or f"benchmarks/results/endpoints-{report['commit']}.json"
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare and compare(report, args.compare, args.threshold, args.min_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
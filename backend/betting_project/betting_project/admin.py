@@ -0,0 +1,84 @@
+"""
+Admin helpers for the large tables (bets, participants, events, users).
+
+A changelist page normally runs an exact COUNT(*) of the table, which reads
+every row of a million-row table on each page load. LargeTableAdmin pages
+with EstimatedCountPaginator instead: when the changelist isn't filtered or
+searched, the row count comes from the database's table statistics once the
+table is past ADMIN_ESTIMATED_COUNT_THRESHOLD rows. Page links past the end
+of the real data show an empty page, which is the price of not counting.
+
+Rows are listed newest first by primary key rather than by the model's
+Meta.ordering (e.g. bets by -created_at), which no index serves on its own:
+sorting the whole table for every page would cost more than the count.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using="default"):
+    """
+    The number of rows in the model's table according to the database's
+    statistics, or None when it has none: SQLite sqlite_stat1 (after
+    ANALYZE), MySQL information_schema.TABLES, PostgreSQL pg_class.
+    """
+    db = connections[using]
+    table = model._meta.db_table
+    try:
+        with db.cursor() as cursor:
+            if db.vendor == "sqlite":
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+            if db.vendor == "mysql":
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES"
+                    " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] is not None else None
+            if db.vendor == "postgresql":
+                cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table])
+                row = cursor.fetchone()
+                # -1 until the table is first analyzed
+                return int(row[0]) if row and row[0] >= 0 else None
+    except DatabaseError:
+        # e.g. sqlite_stat1 doesn't exist before the first ANALYZE
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator that trusts the table statistics for the count of a whole
+    large table, and counts exactly otherwise.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        model = getattr(queryset, "model", None)
+        # Only the whole table (as the default manager sees it) has an estimate
+        if model is not None and queryset.query.where == model._default_manager.all().query.where:
+            estimate = estimated_row_count(model, queryset.db)
+            if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base ModelAdmin for tables too big to count: estimated page counts, and
+    no second COUNT(*) of the whole table next to filtered results. Subclasses
+    should also set list_select_related for the columns they display and
+    raw_id_fields for their foreign keys, so neither list nor form loads
+    another table row by row.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ["-pk"]
@@ -0,0 +1,13 @@
+from django.db.backends.mysql import base
+
+from ..pooled import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    MySQL backend with pooled connections. ENGINE = "betting_project.db.backends.mysql".
+    """
+
+    def pool_health_check(self, connection):
+        # Same check Django's CONN_HEALTH_CHECKS uses, without a query
+        connection.ping()
@@ -0,0 +1,65 @@
+import functools
+
+from ..pool import PoolTimeout, get_pool, get_pool_settings
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixin for a Django DatabaseWrapper that takes raw connections from a
+    per-process ConnectionPool and hands them back on close().
+
+    Django still decides when a connection is "closed" (end of request with
+    CONN_MAX_AGE=0, or when CONN_MAX_AGE expires), so every request gets its
+    connection from the pool and returns it afterwards. POOL["MAX_SIZE"] = 0
+    turns pooling off and falls back to the stock backend.
+    """
+
+    _connection_pool = None
+
+    def pooling_enabled(self):
+        return get_pool_settings(self.settings_dict)["MAX_SIZE"] > 0
+
+    def pool_health_check(self, connection):
+        """
+        Raise if a pooled connection can't be used any more.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        if not self.pooling_enabled():
+            return super().get_new_connection(conn_params)
+        pool = get_pool(
+            self.alias,
+            self.settings_dict,
+            functools.partial(super().get_new_connection, conn_params),
+            self.pool_health_check,
+        )
+        try:
+            connection = pool.acquire()
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        self._connection_pool = pool
+        return connection
+
+    def _close(self):
+        pool, self._connection_pool = self._connection_pool, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Closed inside atomic(): Django keeps self.connection until
+                # the block exits, so it must not go to another thread
+                pool.discard(self.connection)
+                return
+            try:
+                # connect() restores autocommit on checkout; just don't hand over an open transaction
+                if not self.autocommit:
+                    self.connection.rollback()
+            except self.Database.Error:
+                pool.discard(self.connection)
+                return
+            pool.release(self.connection)
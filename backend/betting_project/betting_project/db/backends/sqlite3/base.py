@@ -0,0 +1,10 @@
+from django.db.backends.sqlite3 import base
+
+from ..pooled import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    SQLite backend with pooled connections, for local testing of the pooled
+    setup. ENGINE = "betting_project.db.backends.sqlite3".
+    """
@@ -0,0 +1,284 @@
+"""
+Per-process database connection pool used by the backends in
+betting_project/db/backends/.
+
+Django opens a new DB connection per request (CONN_MAX_AGE=0) or keeps one
+per thread (CONN_MAX_AGE>0). With the pooled backends, Django's "close" hands
+the raw connection back to a pool shared by all threads of the worker
+process, and the next request takes it from there instead of paying for the
+TCP/TLS/auth handshake again.
+
+Configured per database with a "POOL" dict in settings.DATABASES, e.g.
+
+    "POOL": {
+        "MAX_SIZE": 10,                 # open connections per process, 0 disables pooling
+        "TIMEOUT": 10.0,                # seconds to wait for a free connection
+        "MAX_LIFETIME": 1800.0,         # recycle connections older than this
+        "HEALTH_CHECK_INTERVAL": 1.0,   # check connections idle for longer than this
+        "WAIT_WARNING": 0.1,            # log checkouts that waited longer than this
+    }
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_POOL = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 10.0,
+    "MAX_LIFETIME": 1800.0,
+    "HEALTH_CHECK_INTERVAL": 1.0,
+    "WAIT_WARNING": 0.1,
+}
+
+
+def get_pool_settings(settings_dict):
+    return {**DEFAULT_POOL, **(settings_dict.get("POOL") or {})}
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection became free within the pool's timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of at most `max_size` open connections.
+
+    `factory()` opens a new connection, `health_check(conn)` must raise if the
+    connection is no longer usable and `close(conn)` closes it. Connections
+    are handed out most-recently-used first, so idle ones age out through
+    MAX_LIFETIME instead of all being kept half-warm.
+    """
+
+    def __init__(
+        self,
+        factory,
+        health_check,
+        close=lambda connection: connection.close(),
+        max_size=10,
+        timeout=10.0,
+        max_lifetime=1800.0,
+        health_check_interval=1.0,
+        wait_warning=0.1,
+        name="default",
+        clock=time.monotonic,
+    ):
+        self.factory = factory
+        self.health_check = health_check
+        self.close_connection = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.wait_warning = wait_warning
+        self.name = name
+        self.clock = clock
+
+        # (connection, created_at, last_used_at), most recently used last
+        self._idle = []
+        self._created_at = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._counters = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "reused": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+        }
+
+    def acquire(self):
+        """
+        Return an open connection, waiting up to `timeout` seconds for one to be released.
+        """
+        started = self.clock()
+        deadline = started + self.timeout
+        waited = False
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No connection available in pool '{self.name}' after {self.timeout}s "
+                        f"({self._in_use} in use, max {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            if self._idle:
+                candidate = self._idle.pop()
+            else:
+                candidate = None
+                self._size += 1
+            self._in_use += 1
+            self._record_checkout(self.clock() - started if waited else None)
+
+        try:
+            if candidate is not None:
+                connection = self._validate(*candidate)
+                if connection is not None:
+                    return connection
+            return self._create()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, connection):
+        """
+        Give a connection back to the pool. It must be in autocommit mode with no open transaction.
+        """
+        with self._cond:
+            self._in_use -= 1
+            if not self._closed:
+                self._idle.append((connection, self._created_at.get(id(connection), self.clock()), self.clock()))
+                self._cond.notify()
+                return
+            self._size -= 1
+        self._close_quietly(connection)
+
+    def discard(self, connection):
+        """
+        Close a checked-out connection instead of returning it, freeing its slot.
+        """
+        self._close_quietly(connection)
+        with self._cond:
+            self._size -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """
+        Close the idle connections; checked-out ones are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for connection, _, _ in idle:
+            self._close_quietly(connection)
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._counters,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def _count(self, counter):
+        with self._cond:
+            self._counters[counter] += 1
+
+    def _record_checkout(self, wait_seconds):
+        self._counters["checkouts"] += 1
+        if wait_seconds is None:
+            return
+        self._counters["waits"] += 1
+        self._counters["wait_seconds"] += wait_seconds
+        self._counters["max_wait_seconds"] = max(self._counters["max_wait_seconds"], wait_seconds)
+        if wait_seconds >= self.wait_warning:
+            logger.warning(
+                "Waited %.3fs for a connection from pool '%s' (max %s)", wait_seconds, self.name, self.max_size
+            )
+
+    def _validate(self, connection, created_at, last_used_at):
+        """
+        Return the idle connection if it is still usable, otherwise close it and return None.
+        """
+        now = self.clock()
+        if self.max_lifetime and now - created_at >= self.max_lifetime:
+            self._count("recycled")
+            self._close_quietly(connection)
+            return None
+        if now - last_used_at >= self.health_check_interval:
+            try:
+                self.health_check(connection)
+            except Exception:
+                self._count("health_check_failures")
+                logger.info("Dropping unusable connection from pool '%s'", self.name)
+                self._close_quietly(connection)
+                return None
+        self._count("reused")
+        return connection
+
+    def _create(self):
+        connection = self.factory()
+        self._created_at[id(connection)] = self.clock()
+        self._count("created")
+        return connection
+
+    def _close_quietly(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            self.close_connection(connection)
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(alias, settings_dict, factory, health_check):
+    """
+    Return the process-wide pool for a database alias, creating it on first use.
+
+    Pools are keyed by alias and database NAME (the test runner renames the
+    database) and are dropped after a fork, so workers never share sockets
+    opened by the parent process.
+    """
+    global _pools_pid
+    key = (alias, settings_dict["NAME"])
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            options = get_pool_settings(settings_dict)
+            pool = _pools[key] = ConnectionPool(
+                factory,
+                health_check,
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                max_lifetime=options["MAX_LIFETIME"],
+                health_check_interval=options["HEALTH_CHECK_INTERVAL"],
+                wait_warning=options["WAIT_WARNING"],
+                name=alias,
+            )
+        return pool
+
+
+def pool_stats():
+    """
+    Stats for every pool in this process, keyed by database alias.
+    """
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {alias: pool.stats() for (alias, _), pool in pools}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
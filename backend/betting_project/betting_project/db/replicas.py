@@ -0,0 +1,136 @@
+"""
+Request-scoped state for read-replica routing (see routers.ReplicaRouter and
+middleware.ReplicaRoutingMiddleware).
+
+Reads only go to a replica inside a request that opted in: a safe (GET/HEAD/
+OPTIONS) request from a client that hasn't written recently. Everything else
+(management commands, background threads, webhooks) reads from the primary.
+Once a request writes, its remaining reads go to the primary too, and the
+client stays pinned to the primary for REPLICA_STICKY_SECONDS so it reads
+its own writes (e.g. available_funds after placing a bet) despite replication lag.
+
+Pins are kept in the PIN_CACHE cache, which every worker process must share
+(e.g. Redis, see REPLICA_PIN_CACHE_URL in settings): a pin held in one
+process's memory would miss the client's next request on another worker.
+check_pin_cache makes `manage.py check` fail when replicas are configured
+without one.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_CACHE = "replica_pins"
+
+# Cache backends that live inside one process, or keep nothing
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+class RoutingState:
+    __slots__ = ("use_replicas", "wrote")
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def begin(use_replicas):
+    """
+    Start routing for a request. Returns a token for end().
+    """
+    return _state.set(RoutingState(use_replicas))
+
+
+def end(token):
+    """
+    Stop routing for a request and return its RoutingState.
+    """
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def record_write():
+    state = _state.get()
+    if state is not None:
+        state.wrote = True
+
+
+def choose_read_database():
+    """
+    A replica alias if the current request may read from one, else the primary.
+    """
+    replicas = get_replicas()
+    state = _state.get()
+    if (
+        not replicas
+        or state is None
+        or not state.use_replicas
+        or state.wrote
+        # Reads inside a transaction must see the transaction's writes
+        or connections[DEFAULT_DB_ALIAS].in_atomic_block
+    ):
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+def _pin_key(client_key):
+    return f"db-primary-pin:{client_key}"
+
+
+def pin_to_primary(client_key):
+    """
+    Send this client's reads to the primary for REPLICA_STICKY_SECONDS.
+    """
+    if get_replicas():
+        caches[PIN_CACHE].set(_pin_key(client_key), True, getattr(settings, "REPLICA_STICKY_SECONDS", 5))
+
+
+async def apin_to_primary(client_key):
+    if get_replicas():
+        await caches[PIN_CACHE].aset(_pin_key(client_key), True, getattr(settings, "REPLICA_STICKY_SECONDS", 5))
+
+
+def pin_user_to_primary(user_id):
+    """
+    Pin a user after a write made on their behalf outside their own request (e.g. a deposit webhook).
+    """
+    pin_to_primary(f"user:{user_id}")
+
+
+def is_pinned(client_key):
+    return bool(caches[PIN_CACHE].get(_pin_key(client_key)))
+
+
+async def ais_pinned(client_key):
+    return bool(await caches[PIN_CACHE].aget(_pin_key(client_key)))
+
+
+def check_pin_cache(app_configs=None, **kwargs):
+    """
+    System check: with replicas, pins need a cache shared by every worker.
+    """
+    if not get_replicas():
+        return []
+    backend = settings.CACHES.get(PIN_CACHE, {}).get("BACKEND")
+    if backend is None or backend in PROCESS_LOCAL_CACHES:
+        return [
+            checks.Error(
+                f"DATABASE_REPLICAS needs a shared {PIN_CACHE!r} cache (e.g. Redis) to pin clients to the primary.",
+                hint="Set REPLICA_PIN_CACHE_URL, or configure CACHES[\"replica_pins\"] with a shared backend.",
+                id="betting_project.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,21 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from . import replicas
+
+
+class ReplicaRouter:
+    """
+    Writes go to the primary ("default"); reads go to one of
+    settings.DATABASE_REPLICAS when the current request allows it (see replicas.py).
+    """
+
+    def db_for_read(self, model, **hints):
+        return replicas.choose_read_database()
+
+    def db_for_write(self, model, **hints):
+        replicas.record_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
@@ -0,0 +1,128 @@
+"""
+Logging helpers used by settings.LOGGING.
+
+- BackgroundQueueHandler: the only handler on the request path. It puts
+  records on a bounded queue, and a QueueListener thread runs the real
+  (console/file) handlers, so slow disks or terminals never block a request.
+- JsonFormatter: one JSON object per line, including any `extra=` fields.
+- SamplingFilter: lets through a fraction of the records of a chatty logger
+  (e.g. per-bet settlement lines) while always keeping warnings and errors.
+- logger_levels: per-module levels from an env string like "api=DEBUG,users.deposits=WARNING".
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        return json.dumps(payload, default=str)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records and write them from a background thread.
+
+    `handlers` are the handlers that do the writing. In dictConfig, pass them
+    as "cfg://handlers.<name>" and give this handler a name that sorts after
+    theirs (e.g. "queue"), so they are configured first.
+
+    When the queue is full, records are dropped and counted instead of
+    blocking the caller.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self._running = False
+        # Index instead of iterating: only indexing resolves dictConfig's cfg:// references
+        handlers = [handlers[index] for index in range(len(handlers))]
+        for handler in handlers:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(
+                    f"{handler!r} is not a configured handler; name the queue handler so it sorts after its targets"
+                )
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+
+    def prepare(self, record):
+        # Merge the message arguments here, since they may not be safe to
+        # touch from another thread, but leave formatting to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """
+        Write out what is queued and stop the writer thread.
+        """
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Pass roughly `rate` (0..1) of the records below WARNING; always pass WARNING and above.
+    """
+
+    def __init__(self, rate=1.0, name=""):
+        super().__init__(name)
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def logger_levels(spec):
+    """
+    Turn "api=DEBUG,users.deposits=WARNING" into dictConfig "loggers" entries.
+    """
+    loggers = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        loggers[name.strip()] = {"level": level.strip().upper()}
+    return loggers
@@ -0,0 +1,298 @@
+"""
+Counters and histograms in the Prometheus text exposition format, served at
+/metrics (see views.metrics and middleware.MetricsMiddleware).
+
+Recording takes no lock: every thread adds to its own shard, and a scrape
+sums the shards. A new thread takes over the shard of one that has exited,
+so a process holds no more shards than it has ever had threads alive at
+once, and the exited thread's counts carry on in it. With METRICS_MULTIPROC_DIR set (multi-process gunicorn or
+uvicorn), each shard is also an mmap'd file in that directory, and a scrape
+from any worker sums every file in it. Empty the directory before starting
+the server; files of exited workers are kept so their counts aren't lost.
+"""
+import bisect
+import itertools
+import json
+import mmap
+import os
+import struct
+import threading
+from math import inf
+
+from django.conf import settings
+
+_HEADER = struct.Struct("<Q")  # bytes used in the file
+_KEY_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_INITIAL_FILE_SIZE = 64 * 1024
+
+# Shard file names must be unique across registries in the same process too
+_shard_ids = itertools.count()
+
+
+class _Shard:
+    """
+    The values recorded by one thread at a time, its `owner`. Only the owner
+    writes to it.
+    """
+
+    def __init__(self, path=None):
+        self.owner = None
+        self.values = {}
+        self._offsets = {}
+        self._mmap = None
+        if path is not None:
+            with open(path, "w+b") as file:
+                file.truncate(_INITIAL_FILE_SIZE)
+                self._mmap = mmap.mmap(file.fileno(), _INITIAL_FILE_SIZE)
+            self._used = _HEADER.size
+            _HEADER.pack_into(self._mmap, 0, self._used)
+
+    def add(self, key, amount):
+        value = self.values.get(key, 0.0) + amount
+        self.values[key] = value
+        if self._mmap is not None:
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._allocate(key)
+            _VALUE.pack_into(self._mmap, offset, value)
+
+    def _allocate(self, key):
+        """
+        Append an entry (key length, key, padding to 8 bytes, value) and
+        return the offset of its value. The header is updated last, so
+        readers never see a partly written entry.
+        """
+        encoded = json.dumps(key).encode()
+        value_offset = self._used + _KEY_LENGTH.size + len(encoded)
+        value_offset += -value_offset % 8
+        end = value_offset + _VALUE.size
+        if end > len(self._mmap):
+            self._mmap.resize(max(end, len(self._mmap) * 2))
+        _KEY_LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._mmap, value_offset, 0.0)
+        self._used = end
+        _HEADER.pack_into(self._mmap, 0, self._used)
+        self._offsets[key] = value_offset
+        return value_offset
+
+
+def read_shard_file(path):
+    """
+    Yield (key, value) for every entry in a shard file.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < _HEADER.size:
+        return
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    position = _HEADER.size
+    while position < used:
+        (length,) = _KEY_LENGTH.unpack_from(data, position)
+        position += _KEY_LENGTH.size
+        name, suffix, label_values = json.loads(data[position:position + length])
+        position += length
+        position += -position % 8
+        yield (name, suffix, tuple(label_values)), _VALUE.unpack_from(data, position)[0]
+        position += _VALUE.size
+
+
+class Registry:
+    """
+    The metrics of a process and the per-thread shards holding their values.
+
+    `directory` defaults to settings.METRICS_MULTIPROC_DIR, read when a
+    thread records its first value.
+    """
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._metrics = {}
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # A forked worker starts empty; the parent's shards (and files) stay the parent's
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        if self._directory is not None:
+            return self._directory
+        return getattr(settings, "METRICS_MULTIPROC_DIR", None)
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        with self._lock:
+            shard = next((shard for shard in self._shards if not shard.owner.is_alive()), None)
+            if shard is None:
+                directory = self.directory
+                path = None
+                if directory:
+                    path = os.path.join(directory, f"{os.getpid()}-{next(_shard_ids)}.metrics")
+                shard = _Shard(path)
+                self._shards.append(shard)
+            shard.owner = threading.current_thread()
+        self._local.shard = shard
+        return shard
+
+    def collect(self):
+        """
+        Totals per (metric name, suffix, label values), summed over threads
+        or, in multi-process mode, over every shard file in the directory.
+        """
+        totals = {}
+        directory = self.directory
+        if directory:
+            items = (
+                item
+                for name in sorted(os.listdir(directory))
+                if name.endswith(".metrics")
+                for item in read_shard_file(os.path.join(directory, name))
+            )
+        else:
+            with self._lock:
+                shards = list(self._shards)
+            # dict() copies in one step, so a thread adding a key meanwhile is fine
+            items = (item for shard in shards for item in dict(shard.values).items())
+        for key, value in items:
+            totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def expose(self):
+        """
+        Every registered metric in the text exposition format (version 0.0.4).
+        """
+        totals = self.collect()
+        by_metric = {}
+        for (name, suffix, label_values), value in totals.items():
+            by_metric.setdefault(name, {}).setdefault(label_values, {})[suffix] = value
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for label_values, samples in sorted(by_metric.get(metric.name, {}).items()):
+                lines.extend(metric.sample_lines(dict(zip(metric.labelnames, label_values)), samples))
+        return "\n".join(lines) + "\n"
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = REGISTRY if registry is None else registry
+        self.registry.register(self)
+
+    def _label_values(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError:
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}") from None
+
+
+class Counter(Metric):
+    """
+    A total that only goes up. Name it with a _total suffix.
+    """
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        self.registry.shard().add((self.name, "", self._label_values(labels)), amount)
+
+    def sample_lines(self, labels, samples):
+        yield f"{self.name}{_format_labels(labels)} {_format_value(samples.get('', 0.0))}"
+
+
+class Histogram(Metric):
+    """
+    Counts observations into buckets (upper bounds, "le") and sums them.
+    """
+
+    type = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        buckets = sorted(float(bound) for bound in buckets)
+        if not buckets or buckets[-1] != inf:
+            buckets.append(inf)
+        self.buckets = tuple(buckets)
+        self._bucket_keys = [_format_value(bound) for bound in self.buckets]
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        label_values = self._label_values(labels)
+        shard = self.registry.shard()
+        # Stored per bucket; made cumulative on exposition
+        shard.add((self.name, self._bucket_keys[bisect.bisect_left(self.buckets, value)], label_values), 1)
+        shard.add((self.name, "sum", label_values), value)
+
+    def sample_lines(self, labels, samples):
+        cumulative = 0.0
+        for bound in self._bucket_keys:
+            cumulative += samples.get(bound, 0.0)
+            yield f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {_format_value(cumulative)}"
+        yield f"{self.name}_sum{_format_labels(labels)} {_format_value(samples.get('sum', 0.0))}"
+        yield f"{self.name}_count{_format_labels(labels)} {_format_value(cumulative)}"
+
+
+def _format_value(value):
+    if value == inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+# Metrics recorded by the apps
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time spent handling requests.", ["route", "method"]
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_seconds", "Time spent running database queries per request.", ["route", "method"]
+)
+BETS_PLACED = Counter("bets_placed_total", "Bets placed.", ["bet_type"])
+SETTLEMENT_DURATION = Histogram(
+    "event_settlement_duration_seconds", "Time taken to settle an event and pay out its bets."
+)
+SETTLEMENT_BETS = Histogram(
+    "event_settlement_bets",
+    "Bets per settled event.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+DEPOSITS = Counter("deposits_total", "Deposits by outcome: created, succeeded or failed.", ["outcome"])
@@ -0,0 +1,274 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import metrics, profiling
+from .db import replicas
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_jwt_authentication = JWTAuthentication()
+
+
+def client_key(request):
+    """
+    Identify the client without touching the database: the user id from the
+    JWT, or the session cookie for session-authenticated (admin) requests.
+    """
+    header = _jwt_authentication.get_header(request)
+    raw_token = _jwt_authentication.get_raw_token(header) if header else None
+    if raw_token is not None:
+        try:
+            return f"user:{_jwt_authentication.get_validated_token(raw_token)[jwt_settings.USER_ID_CLAIM]}"
+        except (InvalidToken, KeyError):
+            return None
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f"session:{session_key}" if session_key else None
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs in sync and async handler chains alike.
+
+    Under ASGI, Django would run sync-only middleware (and everything below
+    it, async views included) through async_to_sync in a thread. Subclasses
+    implement call(request) and acall(request); the one matching the chain
+    is used.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Let safe requests read from the replicas, unless the client wrote recently.
+    Any write pins the client to the primary for REPLICA_STICKY_SECONDS.
+    """
+
+    def call(self, request):
+        if not replicas.get_replicas():
+            return self.get_response(request)
+
+        key = client_key(request)
+        safe = request.method in SAFE_METHODS
+        token = replicas.begin(use_replicas=safe and not (key and replicas.is_pinned(key)))
+        try:
+            response = self.get_response(request)
+        finally:
+            state = replicas.end(token)
+
+        if key and (state.wrote or not safe):
+            replicas.pin_to_primary(key)
+        return response
+
+    async def acall(self, request):
+        if not replicas.get_replicas():
+            return await self.get_response(request)
+
+        key = client_key(request)
+        safe = request.method in SAFE_METHODS
+        token = replicas.begin(use_replicas=safe and not (key and await replicas.ais_pinned(key)))
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = replicas.end(token)
+
+        if key and (state.wrote or not safe):
+            await replicas.apin_to_primary(key)
+        return response
+
+
+def query_budget(method, route_name):
+    """
+    Max queries for a request: QUERY_BUDGETS["<METHOD> <url name>"], then
+    QUERY_BUDGETS["<url name>"], then QUERY_BUDGET_DEFAULT.
+    """
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    default = getattr(settings, "QUERY_BUDGET_DEFAULT", 20)
+    return budgets.get(f"{method} {route_name}", budgets.get(route_name, default))
+
+
+class QueryCounter:
+    """
+    Execute wrapper that counts queries and the time spent running them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _wrap_connections(stack, counter):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(counter))
+
+
+class QueryCountMiddleware(HybridMiddleware):
+    """
+    Count the queries and DB time of each request, on every database alias.
+
+    The totals are kept on the request (db_query_count, db_seconds), sent as
+    X-Query-Count / X-DB-Time (milliseconds) when QUERY_COUNT_HEADERS is on,
+    and requests over their route's query budget are logged. Queries run
+    while a streaming response is consumed are not counted.
+
+    Under ASGI a request's queries run on its own sync thread (the async ORM
+    and sync views both use it), not on the event loop, so the counter is
+    installed on that thread's connections.
+    """
+
+    def call(self, request):
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            _wrap_connections(stack, counter)
+            response = self.get_response(request)
+        return self.finish(request, response, counter)
+
+    async def acall(self, request):
+        counter = QueryCounter()
+        stack = ExitStack()
+        await sync_to_async(_wrap_connections)(stack, counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, counter)
+
+    def finish(self, request, response, counter):
+        request.db_query_count = counter.count
+        request.db_seconds = counter.seconds
+        if getattr(settings, "QUERY_COUNT_HEADERS", False):
+            response["X-Query-Count"] = str(counter.count)
+            response["X-DB-Time"] = f"{counter.seconds * 1000:.3f}"
+
+        match = request.resolver_match
+        if match is not None:
+            budget = query_budget(request.method, match.url_name)
+            if counter.count > budget:
+                logger.warning(
+                    "%s %s ran %s queries (budget %s, %.1f ms in the database)",
+                    request.method,
+                    match.url_name,
+                    counter.count,
+                    budget,
+                    counter.seconds * 1000,
+                    extra={"route": match.url_name, "query_count": counter.count, "query_budget": budget},
+                )
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Record each request's latency and database time per route and method.
+
+    Goes before QueryCountMiddleware, which sets request.db_seconds.
+    Requests that matched no route share the route label "unmatched".
+    """
+
+    def call(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self.record(request, response, time.perf_counter() - started)
+
+    async def acall(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.record(request, response, time.perf_counter() - started)
+
+    def record(self, request, response, duration):
+        match = request.resolver_match
+        route = match.view_name if match is not None else "unmatched"
+        metrics.REQUEST_DURATION.observe(duration, route=route, method=request.method)
+        db_seconds = getattr(request, "db_seconds", None)
+        if db_seconds is not None:
+            metrics.REQUEST_DB_DURATION.observe(db_seconds, route=route, method=request.method)
+        return response
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Profile a request with cProfile when it carries a valid X-Profile token,
+    or at random for PROFILE_SAMPLE_RATE (0..1) of the requests.
+
+    Requests that aren't profiled only pay for the header lookup (and a
+    random number when sampling is on). Token-triggered responses name the
+    stored profile in an X-Profile-Id header. Under ASGI the profile covers
+    the event loop thread, so it includes whatever else ran on the loop
+    meanwhile.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = getattr(settings, "PROFILE_SAMPLE_RATE", 0)
+
+    def wanted(self, request):
+        """
+        None if the request isn't profiled, else whether its token asked for it.
+        """
+        token = request.META.get(profiling.HEADER)
+        requested = token is not None and profiling.token_is_valid(token)
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return None
+        return requested
+
+    def call(self, request):
+        requested = self.wanted(request)
+        profiler = profiling.start() if requested is not None else None
+        if profiler is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.save(request, response, profiler, requested, time.perf_counter() - started)
+
+    async def acall(self, request):
+        requested = self.wanted(request)
+        profiler = profiling.start() if requested is not None else None
+        if profiler is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.save(request, response, profiler, requested, time.perf_counter() - started)
+
+    def save(self, request, response, profiler, requested, duration):
+        match = request.resolver_match
+        name = profiling.save(profiler, request.method, match.view_name if match else "unmatched", duration)
+        logger.info("Profiled %s %s in %.1f ms: %s", request.method, request.path, duration * 1000, name)
+        if requested:
+            response["X-Profile-Id"] = name
+        return response
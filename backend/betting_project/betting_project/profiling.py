@@ -0,0 +1,119 @@
+"""
+On-demand cProfile of single requests (see middleware.ProfilingMiddleware).
+
+A request is profiled when it carries a valid X-Profile header (a signed
+token staff get from POST /api/profiles/token/) or, with PROFILE_SAMPLE_RATE
+above 0, at random. The profile is written to PROFILE_DIR as a .prof file
+(open it with `python -m pstats` or snakeviz) and listed at /api/profiles/.
+
+Only the request's thread is profiled: under ASGI that is the event loop,
+where async views run (interleaved with other requests) and sync views don't.
+"""
+import cProfile
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_PROFILE"
+_SALT = "betting_project.profiling"
+
+# <unix ms>-<method>-<route>-<duration ms>ms-<id>.prof
+_FILENAME = re.compile(
+    r"^(?P<timestamp>\d+)-(?P<method>[A-Z]+)-(?P<route>[\w.:-]+)-(?P<duration_ms>\d+)ms-(?P<id>[0-9a-f]+)\.prof$"
+)
+
+
+def profile_dir():
+    return str(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "profiles"))
+
+
+def make_token(user):
+    """
+    A header value that makes requests get profiled for PROFILE_TOKEN_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=_SALT).sign(str(user.pk))
+
+
+def token_is_valid(token):
+    try:
+        signing.TimestampSigner(salt=_SALT).unsign(token, max_age=getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def start():
+    """
+    Start profiling the current thread. Returns None if another profiler is
+    active (Python 3.12+ allows one at a time).
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        logger.info("Not profiling: another profiler is active")
+        return None
+    return profiler
+
+
+def save(profiler, method, route, duration):
+    """
+    Write the profile to PROFILE_DIR and drop the oldest files beyond
+    PROFILE_MAX_FILES. Returns the file name.
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    route = re.sub(r"[^\w.:-]", "_", route)
+    name = f"{int(time.time() * 1000)}-{method}-{route}-{int(duration * 1000)}ms-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(os.path.join(directory, name))
+
+    max_files = getattr(settings, "PROFILE_MAX_FILES", 200)
+    for old in list_profiles()[max_files:]:
+        try:
+            os.remove(os.path.join(directory, old["name"]))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+def list_profiles():
+    """
+    The stored profiles, newest first.
+    """
+    try:
+        names = os.listdir(profile_dir())
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        match = _FILENAME.match(name)
+        if match is None:
+            continue
+        profiles.append({
+            "name": name,
+            "method": match["method"],
+            "route": match["route"],
+            "duration_ms": int(match["duration_ms"]),
+            "created_at": datetime.fromtimestamp(int(match["timestamp"]) / 1000, tz=timezone.utc).isoformat(),
+            "size": os.path.getsize(os.path.join(profile_dir(), name)),
+        })
+    profiles.sort(key=lambda profile: int(profile["name"].split("-", 1)[0]), reverse=True)
+    return profiles
+
+
+def profile_path(name):
+    """
+    Path of a stored profile, or None if there is no such profile.
+    """
+    if not _FILENAME.match(name):
+        return None
+    path = os.path.join(profile_dir(), name)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,247 @@
+"""
+In-process publish/subscribe for pushing changes to connected clients (see
+api/streaming.py and the server-sent events view in api/views/stream_views.py).
+
+Publishers call publish(channel, message) from any thread, typically in
+transaction.on_commit. Subscribers are coroutines holding a Subscription:
+each has a bounded asyncio.Queue filled from its own event loop, so one
+publish reaches every connected client without them polling.
+
+With several worker processes a message has to reach the subscribers of
+every process. settings.PUBSUB["BACKEND"] picks how messages travel:
+
+    LocalBackend   this process only (one worker, development, tests)
+    RedisBackend   Redis PUBLISH; every process listens on a background
+                   thread once it has a subscriber (needs the redis package)
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUBSUB = {
+    "BACKEND": "betting_project.pubsub.LocalBackend",
+    "OPTIONS": {},
+    # Messages a subscriber may fall behind by before it is dropped
+    "MAX_QUEUED": 100,
+}
+
+
+def get_pubsub_settings():
+    """
+    Merge the project's PUBSUB setting over the defaults.
+    """
+    return {**DEFAULT_PUBSUB, **getattr(settings, "PUBSUB", {})}
+
+
+class Subscription:
+    """
+    Messages of some channels for one consumer. Iterate it with `async for`
+    (yields (channel, message)), and close it when done.
+
+    A subscriber that falls MAX_QUEUED messages behind is dropped: iteration
+    ends and `overflowed` is set, so the client can reconnect and reload.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, broker, channels, max_queued):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(max_queued)
+
+    def deliver(self, channel, message):
+        """
+        Queue a message; safe to call from any thread.
+        """
+        self._loop.call_soon_threadsafe(self._put, (channel, message))
+
+    def _put(self, item):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.broker.unsubscribe(self)
+            # Make room so the waiting consumer wakes up and stops
+            self._queue.get_nowait()
+            self._queue.put_nowait(self._CLOSED)
+
+    async def get(self, timeout=None):
+        """
+        The next (channel, message), or None after `timeout` seconds or once
+        the subscription has been dropped.
+        """
+        try:
+            item = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return None if item is self._CLOSED else item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    The subscriptions of this process, and the backend that carries
+    published messages to the brokers of every process.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    config = get_pubsub_settings()
+                    self._backend = import_string(config["BACKEND"])(self, **config["OPTIONS"])
+        return self._backend
+
+    def publish(self, channel, message):
+        """
+        Send a JSON-serializable message to the subscribers of `channel` in
+        every process.
+        """
+        self.backend.publish(channel, message)
+
+    def subscribe(self, channels):
+        """
+        Subscribe to `channels`. Must be called from a coroutine.
+        """
+        backend = self.backend
+        subscription = Subscription(self, channels, get_pubsub_settings()["MAX_QUEUED"])
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        backend.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def deliver(self, channel, message):
+        """
+        Hand a message to this process's subscribers (called by the backend).
+        """
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.deliver(channel, message)
+            except RuntimeError:
+                # Its event loop has been closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscriptions.get(channel, ()))
+            return len({subscription for subscribers in self._subscriptions.values() for subscription in subscribers})
+
+    def reset(self):
+        """
+        Drop all subscriptions and the backend, e.g. after PUBSUB is overridden in tests.
+        """
+        with self._lock:
+            backend, self._backend = self._backend, None
+            self._subscriptions = {}
+        if backend is not None:
+            backend.stop()
+
+
+class LocalBackend:
+    """
+    Deliver to the subscribers of this process only.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, message):
+        self.broker.deliver(channel, message)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Publish through Redis, so subscribers in every process get the message.
+
+    OPTIONS: URL (default redis://localhost:6379/0) and PREFIX for the Redis
+    channel names. A process only listens once something subscribes in it.
+    """
+
+    def __init__(self, broker, URL="redis://localhost:6379/0", PREFIX="betting:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImproperlyConfigured("RedisBackend needs the redis package: pip install redis") from e
+        self.broker = broker
+        self.prefix = PREFIX
+        self.client = redis.Redis.from_url(URL)
+        self._listener = None
+        self._pubsub = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def start(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.psubscribe(self.prefix + "*")
+            self._listener = threading.Thread(target=self._listen, name="pubsub-redis", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        for item in self._pubsub.listen():
+            try:
+                channel = item["channel"].decode()[len(self.prefix):]
+                self.broker.deliver(channel, json.loads(item["data"]))
+            except Exception:
+                logger.exception("Could not deliver a message from Redis")
+
+    def stop(self):
+        with self._lock:
+            if self._pubsub is not None:
+                self._pubsub.close()
+            self._pubsub = self._listener = None
+
+
+broker = Broker()
+publish = broker.publish
@@ -15,6 +15,25 @@ SECRET_KEY = os.environ.get('SECRET_KEY')
 if DEBUG:
     STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY')
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+
+# Payment provider used by deposits. Set PAYMENT_CLIENT=users.payments.FakePaymentClient
+# to run the deposit flow offline (local development / load tests).
+PAYMENT_CLIENT = os.environ.get('PAYMENT_CLIENT', 'users.payment_gateway.GatewayPaymentClient')
+# Pooled HTTP client used by GatewayPaymentClient (see users/payment_gateway.py)
+PAYMENT_GATEWAY = {
+    "BASE_URL": os.environ.get('PAYMENT_GATEWAY_URL', "https://api.stripe.com"),
+    "CONNECT_TIMEOUT": 2.0,
+    "READ_TIMEOUT": 10.0,
+    "MAX_RETRIES": 2,
+    "BACKOFF_FACTOR": 0.2,
+    "POOL_MAXSIZE": 10,
+    "BREAKER_FAILURE_THRESHOLD": 5,
+    "BREAKER_RESET_TIMEOUT": 30.0,
+}
+PAYMENT_RETURN_URL = "http://localhost:3000/"
+# Submit deposits to the provider on a background thread instead of the request thread
+DEPOSITS_SUBMIT_ASYNC = True
 
 # SECURITY WARNING: don't run with debug turned on in production!
 
@@ -40,12 +59,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "betting_project.middleware.MetricsMiddleware",
+    "betting_project.middleware.ProfilingMiddleware",
+    # Before the middleware below, so it also counts their queries
+    "betting_project.middleware.QueryCountMiddleware",
     "django.middleware.security.SecurityMiddleware",
     'corsheaders.middleware.CorsMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "betting_project.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -73,14 +97,54 @@ WSGI_APPLICATION = "betting_project.wsgi.application"
 #.. Added 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        # MySQL with a per-process connection pool (see betting_project/db/pool.py)
+        "ENGINE": "betting_project.db.backends.mysql",
         "NAME": os.environ.get('MYSQL_DB_NAME'),
         "HOST": "localhost",
         "USER": "root",
-        "PASSWORD": os.environ.get('MYSQL_DB_PASSWORD')
+        "PASSWORD": os.environ.get('MYSQL_DB_PASSWORD'),
+        # 0 = hand the connection back to the pool at the end of every request.
+        # For persistent per-thread connections instead, set DB_POOL_SIZE=0 and DB_CONN_MAX_AGE=600.
+        "CONN_MAX_AGE": int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": {
+            "MAX_SIZE": int(os.environ.get('DB_POOL_SIZE', 10)),  # per worker process
+            "TIMEOUT": 10.0,
+            "MAX_LIFETIME": 1800.0,
+            "HEALTH_CHECK_INTERVAL": 1.0,
+            "WAIT_WARNING": 0.1,
+        },
     }
 }
 
+# Read replicas: MYSQL_REPLICA_HOSTS="host1,host2" adds "replica1", "replica2", ...
+# Safe requests read from them, see betting_project/db/replicas.py
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('MYSQL_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f"replica{index}"] = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica{index}")
+DATABASE_ROUTERS = ["betting_project.db.routers.ReplicaRouter"]
+# Seconds a client keeps reading from the primary after a write (covers replication lag)
+REPLICA_STICKY_SECONDS = 5
+
+# "replica_pins" holds those per-client pins and must be shared by every worker
+# process (checked by `manage.py check` when replicas are configured), e.g.
+# REPLICA_PIN_CACHE_URL="redis://cache:6379/1"
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "replica_pins": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.environ['REPLICA_PIN_CACHE_URL']}
+        if os.environ.get('REPLICA_PIN_CACHE_URL')
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "replica-pins"}
+    ),
+    # Per-team pool totals for bet quotes, see EVENT_POOL_CACHE_SECONDS
+    "event_pools": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.environ['EVENT_POOL_CACHE_URL']}
+        if os.environ.get('EVENT_POOL_CACHE_URL')
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "event-pools"}
+    ),
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -151,10 +215,122 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=15),
     'ROTATE_REFRESH_TOKENS': True,
+    # Rejects revoked refresh tokens and revokes the old one on rotation
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializer.RevocationAwareTokenRefreshSerializer',
+}
+
+# Refresh token revocation store (see users/token_revocation.py)
+TOKEN_REVOCATION = {
+    "FILTER_CAPACITY": 100_000,
+    "FILTER_ERROR_RATE": 0.001,
+    "SYNC_INTERVAL": 5,
 }
 
 
+# Admin changelists of tables past this many rows (per the database's table
+# statistics) show an estimated count instead of running COUNT(*), see betting_project/admin.py
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Seconds an event's per-team pool totals stay cached for bet quotes (GET
+# /api/events/<id>/quote/, see api/streaming.py), in the "event_pools" cache.
+# Every bet write refreshes the entry; with several worker processes the cache
+# must be shared (checked by `manage.py check` when PUBSUB is), e.g.
+# EVENT_POOL_CACHE_URL="redis://cache:6379/2"
+EVENT_POOL_CACHE_SECONDS = 60
+
+
 #....ADDED
+# Per-request query counting (betting_project.middleware.QueryCountMiddleware).
+# QUERY_COUNT_HEADERS adds X-Query-Count / X-DB-Time (ms) to every response.
+QUERY_COUNT_HEADERS = os.environ.get('QUERY_COUNT_HEADERS', str(DEBUG)) == 'True'
+# Max queries per route (URL name, optionally prefixed by the method); requests
+# over budget are logged. api/tests/views/test_query_budgets.py checks every
+# route against these on a small fixed dataset, so the list-style endpoints
+# that still grow with the data (N+1) have budgets sized for that dataset.
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    "api-root": 1,
+    "async-all-and-user-events": 4,
+    "async-group-detail": 8,
+    "async-event-bet": 4,
+    "async-bet-history": 2,
+    "group-list": 28,
+    "group-detail": 18,
+    "group-join": 6,
+    "group-leave": 4,
+    "member-list": 23,
+    "member-detail": 5,
+    "event-list": 18,
+    "event-all-and-user-events": 33,
+    "event-detail": 4,
+    "event-bulk": 8,
+    "event-complete-event": 28,
+    "event-quote": 3,
+    "GET bet-list": 23,
+    "POST bet-list": 18,
+    "bet-event-bet": 5,
+    "bet-history": 2,
+    "bet-archived-history": 2,
+    "bet-detail": 5,
+    "participant-list": 2,
+    "participant-detail": 2,
+    "customuser-me": 2,
+    # Admin batch actions on events (api/settlement.py): about 15 statements per chunk of 100 events
+    "POST api_event_changelist": 30,
+    "customuser-detail": 4,
+    "user-statement": 2,
+    "signup": 7,
+    "stripe-config": 1,
+    "stripe-charge": 4,
+    "stripe-deposit": 2,
+    "stripe-webhook": 3,
+}
+
+# Pub/sub behind the live event stream (see betting_project/pubsub.py). With several
+# worker processes use "betting_project.pubsub.RedisBackend" with OPTIONS {"URL": ...}.
+PUBSUB = {
+    "BACKEND": os.environ.get('PUBSUB_BACKEND', "betting_project.pubsub.LocalBackend"),
+    "OPTIONS": {"URL": os.environ['PUBSUB_REDIS_URL']} if os.environ.get('PUBSUB_REDIS_URL') else {},
+    "MAX_QUEUED": 100,
+}
+# Server-sent events at /api/stream/events/: streams end after this many seconds
+# (clients reconnect) and send a keepalive comment when idle
+EVENT_STREAM_MAX_SECONDS = 300
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
+
+# Event markets (Event.state) open this many seconds before the start and close
+# at the start, moved by `manage.py schedule_markets --loop` (see api/scheduler.py).
+# None opens markets as soon as events are created.
+MARKET_OPEN_SECONDS_BEFORE_START = None
+
+# Prometheus metrics at /metrics (see betting_project/metrics.py). With several
+# worker processes, point METRICS_MULTIPROC_DIR at a directory shared by the
+# workers (emptied before the server starts) so any worker reports the totals.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR') or None
+# If set, scrapers must send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# Request profiling (see betting_project/profiling.py): requests with a valid
+# X-Profile token, and PROFILE_SAMPLE_RATE (0..1) of all requests, are
+# profiled with cProfile and kept as .prof files in PROFILE_DIR.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')
+PROFILE_MAX_FILES = 200
+PROFILE_TOKEN_MAX_AGE = 3600
+
+# Max seconds for a fresh process to run django.setup() and load the URLconf
+# (see betting_project/startup.py and `manage.py profile_startup`); checked by
+# `manage.py test --tag slow`.
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 1.5))
+
+# Logging: the request thread only puts records on a queue (handler "queue");
+# a background thread writes them as JSON lines to the console and debug.log.
+# LOG_LEVEL sets the default level, LOG_LEVELS="api=DEBUG,users.deposits=WARNING"
+# sets per-module levels. The per-bet settlement lines cost a query and a
+# record per bet, so they are off unless LOG_BET_SAMPLE_RATE (the share of
+# them kept, e.g. 0.01) is set.
+from betting_project.log import logger_levels
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -163,25 +339,50 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'betting_project.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'bet_sample': {
+            '()': 'betting_project.log.SamplingFilter',
+            'rate': float(os.environ.get('LOG_BET_SAMPLE_RATE') or 0.01),
+        },
     },
     'handlers': {
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'file': {
             'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': 'debug.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
+        },
+        # Must sort after the handlers it writes to
+        'queue': {
+            '()': 'betting_project.log.BackgroundQueueHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'queue_size': 10000,
         },
     },
     'loggers': {
         '': {  # root logger
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'handlers': ['queue'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO'),
             'propagate': True,
         },
+        # One line per SQL query; only when asked for in LOG_LEVELS
+        'django.db.backends': {
+            'level': 'INFO',
+        },
+        # Per-bet lines of event settlement
+        'api.settlement.bets': {
+            'level': 'DEBUG' if os.environ.get('LOG_BET_SAMPLE_RATE') else 'INFO',
+            'filters': ['bet_sample'],
+        },
+        **logger_levels(os.environ.get('LOG_LEVELS', '')),
     },
 }
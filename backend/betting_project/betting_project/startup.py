@@ -0,0 +1,76 @@
+"""
+Measure how long a fresh process takes to become ready: django.setup() plus
+loading the URLconf (which imports every view). This is what each new
+worker pays before serving its first request, e.g. when autoscaling.
+
+Used by `manage.py profile_startup` and the startup budget test
+(STARTUP_BUDGET_SECONDS).
+"""
+import json
+import os
+import subprocess
+import sys
+
+# Run in a child interpreter so nothing is imported yet
+_CHILD = """
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver, reverse
+get_resolver().url_patterns
+reverse("api-root")
+print(json.dumps({"seconds": time.perf_counter() - started}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Turn `python -X importtime` output into dicts with module, self_us,
+    cumulative_us and imported_by (the top-level import that pulled it in).
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or line.endswith("| imported package"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": depth})
+
+    # A module is listed after everything it imported, so walk backwards to find parents
+    top_level = None
+    for row in reversed(rows):
+        if row["depth"] == 0:
+            top_level = row["module"]
+        row["imported_by"] = top_level
+    return rows
+
+
+def measure_startup(settings_module=None, python=sys.executable, attempts=1):
+    """
+    Start `attempts` fresh interpreters and return the fastest run as
+    {"seconds": ..., "imports": [...]} (see parse_importtime).
+    """
+    env = dict(os.environ)
+    if settings_module:
+        env["DJANGO_SETTINGS_MODULE"] = settings_module
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [project_dir, env.get("PYTHONPATH")]))
+
+    best = None
+    for _ in range(attempts):
+        child = subprocess.run(
+            [python, "-X", "importtime", "-c", _CHILD],
+            capture_output=True, text=True, env=env, cwd=project_dir, check=True,
+        )
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            result["imports"] = parse_importtime(child.stderr)
+            best = result
+    return best
+
+
+def heaviest_imports(imports, limit=20, key="cumulative_us", top_level_only=False):
+    rows = [row for row in imports if row["depth"] == 0] if top_level_only else imports
+    return sorted(rows, key=lambda row: row[key], reverse=True)[:limit]
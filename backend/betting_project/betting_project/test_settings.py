@@ -0,0 +1,51 @@
+"""
+Settings for running the tests without a MySQL server:
+
+    python manage.py test --settings=betting_project.test_settings
+
+Tests run in parallel, one process per CPU core (--parallel=1 to turn it
+off), each on its own in-memory SQLite copy of the test database.
+
+To keep the test database between runs, point TEST_DB_NAME at a file and
+pass --keepdb: migrations only run when they changed.
+
+    TEST_DB_NAME=/tmp/betting_test.sqlite3 python manage.py test --keepdb --settings=betting_project.test_settings
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import LOGGING
+
+SECRET_KEY = os.environ.get('SECRET_KEY') or "test-secret-key"
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "TEST": {"NAME": os.environ.get('TEST_DB_NAME')},
+    }
+}
+DATABASE_REPLICAS = []
+
+TEST_RUNNER = "betting_project.testing.ParallelDiscoverRunner"
+
+# Hashing with the default PBKDF2 is what makes creating users slow
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Log to the console only, and only what's worth seeing in test output
+LOGGING = {
+    **LOGGING,
+    'handlers': {
+        name: handler
+        for name, handler in LOGGING['handlers'].items()
+        if name not in ('file', 'queue')
+    },
+    'loggers': {
+        **LOGGING['loggers'],
+        '': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'WARNING'),
+            'propagate': True,
+        },
+    },
+}
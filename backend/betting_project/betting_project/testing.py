@@ -0,0 +1,165 @@
+"""
+Test helpers shared by the apps' test suites.
+"""
+import json
+
+from asgiref.sync import async_to_sync
+from django.db import connection, connections, router
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
+
+from .middleware import query_budget
+
+
+def route_names(*urlconf_modules):
+    """
+    Every named route in the given urls modules (format-suffix variants included once).
+    """
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    for module in urlconf_modules:
+        walk(module.urlpatterns)
+    return names
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin: make a request and fail if it runs more queries than its
+    route's budget in settings.QUERY_BUDGETS.
+    """
+
+    def assertWithinQueryBudget(self, method, url, asgi=False, **kwargs):
+        """
+        `asgi` sends the request through the ASGI handler (self.async_client),
+        for views that only serve ASGI requests.
+        """
+        route_name = resolve(url.split("?")[0]).url_name
+        budget = query_budget(method.upper(), route_name)
+        with CaptureQueriesContext(connection) as queries:
+            if asgi:
+                # The async ORM calls run back on this thread, on `connection`
+                response = async_to_sync(self._asgi_request)(method, url, **kwargs)
+            else:
+                response = getattr(self.client, method.lower())(url, **kwargs)
+                # Streaming responses run their queries while being consumed (iterating the
+                # response rather than streaming_content also drains async streams)
+                if getattr(response, "streaming", False):
+                    b"".join(response)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{method.upper()} {route_name} ran {len(queries)} queries, budget is {budget}:\n"
+            + "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        return response
+
+    async def _asgi_request(self, method, url, **kwargs):
+        response = await getattr(self.async_client, method.lower())(url, **kwargs)
+        if getattr(response, "streaming", False):
+            async for _ in response.streaming_content:
+                pass
+        return response
+
+
+def full_table_scans(queryset):
+    """
+    Tables the database plans to read in full for `queryset`, from its
+    EXPLAIN output: SQLite "SCAN <table>", MySQL access type "ALL",
+    PostgreSQL "Seq Scan".
+    """
+    using = queryset.db or router.db_for_read(queryset.model)
+    db = connections[using]
+    sql, params = queryset.query.sql_with_params()
+    scans = []
+    with db.cursor() as cursor:
+        if db.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            for *_, detail in cursor.fetchall():
+                words = detail.split()
+                # "SCAN <table>" (possibly through an index), not "SEARCH <table> USING INDEX ..."
+                if words[0] == "SCAN" and words[1] not in ("CONSTANT", "SUBQUERY"):
+                    scans.append(words[1])
+        elif db.vendor == "mysql":
+            cursor.execute(f"EXPLAIN {sql}", params)
+            columns = [column[0] for column in cursor.description]
+            for row in cursor.fetchall():
+                row = dict(zip(columns, row))
+                if row["type"] == "ALL":
+                    scans.append(row["table"])
+        elif db.vendor == "postgresql":
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            nodes = json.loads(plan) if isinstance(plan, str) else plan
+            nodes = [node["Plan"] for node in nodes]
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan":
+                    scans.append(node["Relation Name"])
+                nodes.extend(node.get("Plans", []))
+        else:
+            raise NotImplementedError(f"No EXPLAIN parser for {db.vendor}")
+    return scans
+
+
+def plan_sorts(queryset):
+    """
+    The sort steps in `queryset`'s plan, i.e. ORDER BY not served by an
+    index: SQLite "USE TEMP B-TREE", MySQL "Using filesort", PostgreSQL
+    "Sort" nodes.
+    """
+    using = queryset.db or router.db_for_read(queryset.model)
+    vendor = connections[using].vendor
+    if vendor == "sqlite":
+        return [line.strip() for line in queryset.explain().splitlines() if "USE TEMP B-TREE" in line]
+    if vendor == "mysql":
+        return [line.strip() for line in queryset.explain().splitlines() if "Using filesort" in line]
+    if vendor == "postgresql":
+        return [line.strip() for line in queryset.explain().splitlines() if line.strip().startswith(("Sort", "->  Sort"))]
+    raise NotImplementedError(f"No EXPLAIN parser for {vendor}")
+
+
+class ExplainMixin:
+    """
+    TestCase mixin: fail if a queryset's plan reads a whole table, or sorts
+    rows that an index should have given in order.
+    Seed enough rows (and ANALYZE) that the planner has a reason to use indexes.
+    """
+
+    def assertNoFullTableScan(self, queryset, msg=None):
+        scans = full_table_scans(queryset)
+        if scans:
+            self.fail(msg or f"Full scan of {', '.join(scans)} for:\n{queryset.query}")
+
+    def assertNoSort(self, queryset, msg=None):
+        sorts = plan_sorts(queryset)
+        if sorts:
+            self.fail(msg or f"Sorted by the database ({'; '.join(sorts)}) for:\n{queryset.query}")
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """
+    The default test runner, but running tests in parallel (one process per
+    core) unless --parallel says otherwise.
+
+    Tests tagged "slow" (wall-clock budgets that a loaded machine can miss)
+    only run when asked for: `manage.py test --tag slow`.
+    """
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel="auto")
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        exclude_tags = set(exclude_tags or ())
+        if "slow" not in (tags or ()):
+            exclude_tags.add("slow")
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
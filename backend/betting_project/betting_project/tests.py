@@ -0,0 +1,654 @@
+import asyncio
+import copy
+import io
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import timedelta
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.utils import OperationalError, load_backend
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from api import streaming
+from api.models import Event, Group
+from django.conf import settings
+from betting_project import metrics, profiling, pubsub
+from betting_project.admin import EstimatedCountPaginator
+from betting_project.startup import measure_startup, parse_importtime
+from betting_project.db import replicas
+from betting_project.log import BackgroundQueueHandler, JsonFormatter, SamplingFilter, logger_levels
+from betting_project.db.pool import ConnectionPool, PoolTimeout, close_pools, pool_stats
+from betting_project.db.routers import ReplicaRouter
+from users.models import CustomUser
+
+# Commands
+# Run All test in this module
+# python manage.py test betting_project
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        options = {"max_size": 2, "timeout": 0.05, "health_check_interval": 0}
+        options.update(kwargs)
+        return ConnectionPool(
+            lambda: sqlite3.connect(":memory:", check_same_thread=False),
+            lambda connection: connection.execute("SELECT 1"),
+            **options,
+        )
+
+    def test_released_connection_is_reused(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+
+        stats = pool.stats()
+        self.assertEqual((stats["created"], stats["reused"], stats["in_use"]), (1, 1, 1))
+
+    def test_waits_for_a_free_connection_then_times_out(self):
+        pool = self.make_pool(max_size=1, timeout=1)
+        connection = pool.acquire()
+        threading.Timer(0.05, pool.release, args=[connection]).start()
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.stats()["waits"], 1)
+        self.assertGreater(pool.stats()["max_wait_seconds"], 0)
+
+        pool.timeout = 0.05
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_unusable_connection_is_replaced(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        connection.close()
+        pool.release(connection)
+
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        replacement.execute("SELECT 1")
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_old_connections_are_recycled(self):
+        clock = FakeClock()
+        pool = self.make_pool(max_lifetime=60, clock=clock)
+        connection = pool.acquire()
+        pool.release(connection)
+        clock.now = 61
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats()["recycled"], 1)
+
+    def test_failed_connect_frees_the_slot(self):
+        def factory():
+            raise sqlite3.OperationalError("unable to open database")
+
+        pool = ConnectionPool(factory, lambda connection: None, max_size=1, timeout=0.05)
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.acquire()
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """
+    The pooled SQLite backend against a temporary database file.
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        settings_dict = copy.deepcopy(connections.settings["default"])
+        settings_dict.update({
+            "ENGINE": "betting_project.db.backends.sqlite3",
+            "NAME": self.path,
+            "POOL": {"MAX_SIZE": 1, "TIMEOUT": 0.05},
+        })
+        self.connection = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, "pool_test")
+
+    def tearDown(self):
+        self.connection.close()
+        close_pools()
+        os.remove(self.path)
+
+    def test_close_returns_connection_to_pool(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        raw = self.connection.connection
+        self.connection.close()
+        self.assertIsNone(self.connection.connection)
+        self.assertEqual(pool_stats()["pool_test"]["idle"], 1)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        self.assertIs(self.connection.connection, raw)
+        self.assertEqual(pool_stats()["pool_test"]["created"], 1)
+
+    def test_exhausted_pool_raises_operational_error(self):
+        self.connection.ensure_connection()
+        other = load_backend(self.connection.settings_dict["ENGINE"]).DatabaseWrapper(
+            self.connection.settings_dict, "pool_test"
+        )
+        with self.assertRaises(OperationalError):
+            other.ensure_connection()
+
+    def test_open_transaction_is_rolled_back_before_reuse(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE pool_check (id integer)")
+        self.connection.set_autocommit(False)
+        with self.connection.cursor() as cursor:
+            cursor.execute("INSERT INTO pool_check VALUES (1)")
+        self.connection.close()
+
+        self.assertTrue(self.connection.get_autocommit())
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM pool_check")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+def add_sqlite_replica(alias):
+    """
+    Register a second SQLite file as a stand-in read replica. It has to exist
+    before the test runner sets up databases, hence at import time.
+    """
+    if alias in connections.settings:
+        return
+    path = os.path.join(tempfile.gettempdir(), f"betting_{alias}_{os.getpid()}.sqlite3")
+    replica = copy.deepcopy(connections.settings[DEFAULT_DB_ALIAS])
+    replica.pop("POOL", None)
+    replica.update({
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "HOST": "",
+        "PORT": "",
+        "USER": "",
+        "PASSWORD": "",
+        "OPTIONS": {},
+        "TEST": {**replica["TEST"], "NAME": path, "MIRROR": None},
+    })
+    connections.settings[alias] = replica
+
+
+add_sqlite_replica("replica")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    "default" and "replica" are separate SQLite files holding different data,
+    so each response shows which database served it. TransactionTestCase,
+    because reads inside a transaction (like TestCase's) always use the primary.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        start = timezone.now() + timedelta(days=1)
+        self.user = CustomUser.objects.create_user(
+            username="bulma", email="bulma@capsule.corp", password="Radar1234", available_funds=150
+        )
+        group = Group.objects.create(name="Capsule Corp", location="West City")
+        self.event = Event.objects.create(
+            group=group, team1="Primary", team2="Other", start_time=start, end_time=start + timedelta(hours=2)
+        )
+
+        # Same rows on the replica, lagging behind: less funds, old team name
+        replica_user = CustomUser.objects.get(pk=self.user.pk)
+        replica_user.available_funds = 100
+        replica_event = Event.objects.get(pk=self.event.pk)
+        replica_event.team1 = "Replica"
+        CustomUser.objects.using("replica").bulk_create([replica_user])
+        Group.objects.using("replica").bulk_create([group])
+        Event.objects.using("replica").bulk_create([replica_event])
+
+        caches[replicas.PIN_CACHE].clear()
+        self.client = APIClient()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_safe_requests_read_from_replica(self):
+        response = self.client.get(reverse("event-all-and-user-events"))
+        self.assertEqual(response.data["all_events"][0]["team1"], "Replica")
+
+        self.authenticate()
+        response = self.client.get(reverse("customuser-me"))
+        self.assertEqual(response.data["available_funds"], "100.00")
+
+    def test_client_reads_its_own_writes(self):
+        self.authenticate()
+        response = self.client.post(
+            reverse("bet-list"),
+            {"user": self.user.id, "event_id": self.event.id, "team_choice": "Team 1", "bet_type": "Win", "bet_amount": 10},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        # Pinned to the primary after the write
+        response = self.client.get(reverse("customuser-me"))
+        self.assertEqual(response.data["available_funds"], "140.00")
+
+        # Other clients aren't
+        self.client.credentials()
+        response = self.client.get(reverse("event-all-and-user-events"))
+        self.assertEqual(response.data["all_events"][0]["team1"], "Replica")
+
+    def test_deposit_credit_pins_user(self):
+        replicas.pin_user_to_primary(self.user.id)
+        self.authenticate()
+        response = self.client.get(reverse("customuser-me"))
+        self.assertEqual(response.data["available_funds"], "150.00")
+
+    def test_router_outside_requests_and_after_writes(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Event), "default")
+
+        token = replicas.begin(use_replicas=True)
+        try:
+            self.assertEqual(router.db_for_read(Event), "replica")
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Event), "default")
+            router.db_for_write(Event)
+            self.assertEqual(router.db_for_read(Event), "default")
+        finally:
+            replicas.end(token)
+
+
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+    def test_replicas_need_a_shared_pin_cache(self):
+        self.assertEqual(replicas.check_pin_cache(), [])
+        with override_settings(DATABASE_REPLICAS=["replica"]):
+            self.assertEqual([error.id for error in replicas.check_pin_cache()], ["betting_project.E001"])
+        shared = {**settings.CACHES, "replica_pins": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://cache:6379/1"
+        }}
+        with override_settings(DATABASE_REPLICAS=["replica"], CACHES=shared):
+            self.assertEqual(replicas.check_pin_cache(), [])
+
+
+class EventPoolCacheCheckTests(SimpleTestCase):
+    def test_a_shared_broker_needs_a_shared_pool_cache(self):
+        self.assertEqual(streaming.check_pool_cache(), [])
+        redis_pubsub = {"BACKEND": "betting_project.pubsub.RedisBackend", "OPTIONS": {"URL": "redis://cache:6379/0"}}
+        with override_settings(PUBSUB=redis_pubsub):
+            self.assertEqual([error.id for error in streaming.check_pool_cache()], ["api.E001"])
+        shared = {**settings.CACHES, "event_pools": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://cache:6379/2"
+        }}
+        with override_settings(PUBSUB=redis_pubsub, CACHES=shared):
+            self.assertEqual(streaming.check_pool_cache(), [])
+
+
+class AsyncMiddlewareTests(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_asgi_chain_needs_no_thread_adapters(self):
+        # Django logs each middleware it has to wrap in async_to_sync
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+
+class LoggingTests(SimpleTestCase):
+    def make_logger(self, handler):
+        logger = logging.getLogger(f"betting_project.tests.{self._testMethodName}")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        return logger
+
+    def test_queue_handler_writes_json_from_background_thread(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JsonFormatter())
+        handler = BackgroundQueueHandler([target])
+        logger = self.make_logger(handler)
+
+        stakes = [10]
+        logger.info("Stakes %s", stakes, extra={"event_id": 7})
+        # Arguments are merged when logging, not when the writer gets to them
+        stakes.append(20)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Settlement failed")
+        handler.stop()
+
+        first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(first["message"], "Stakes [10]")
+        self.assertEqual(first["level"], "INFO")
+        self.assertEqual(first["event_id"], 7)
+        self.assertIn("ValueError: boom", second["exc_info"])
+
+    def test_full_queue_drops_records_instead_of_blocking(self):
+        handler = BackgroundQueueHandler([logging.NullHandler()], queue_size=1)
+        handler.stop()
+        logger = self.make_logger(handler)
+        logger.info("kept")
+        logger.info("dropped")
+        self.assertEqual(handler.dropped, 1)
+
+    def test_sampling_keeps_warnings(self):
+        sampler = SamplingFilter(rate=0)
+        info = logging.LogRecord("bets", logging.DEBUG, "", 0, "bet", (), None)
+        warning = logging.LogRecord("bets", logging.WARNING, "", 0, "bet", (), None)
+        self.assertFalse(sampler.filter(info))
+        self.assertTrue(sampler.filter(warning))
+        self.assertTrue(SamplingFilter(rate=1).filter(info))
+
+    def test_per_bet_lines_are_off_by_default(self):
+        if os.environ.get("LOG_BET_SAMPLE_RATE"):
+            self.skipTest("LOG_BET_SAMPLE_RATE turns them on")
+        self.assertFalse(logging.getLogger("api.settlement.bets").isEnabledFor(logging.DEBUG))
+
+    def test_logger_levels(self):
+        self.assertEqual(
+            logger_levels("api=debug, users.deposits=WARNING,"),
+            {"api": {"level": "DEBUG"}, "users.deposits": {"level": "WARNING"}},
+        )
+
+
+class MetricsTests(SimpleTestCase):
+    def make_metrics(self, directory=None):
+        registry = metrics.Registry(directory)
+        counter = metrics.Counter("deposits_total", "Deposits.", ["outcome"], registry=registry)
+        histogram = metrics.Histogram("latency_seconds", "Latency.", ["route"], buckets=[0.1, 1], registry=registry)
+        return registry, counter, histogram
+
+    def test_exposition_format(self):
+        registry, counter, histogram = self.make_metrics()
+        counter.inc(outcome="failed")
+        counter.inc(2, outcome='say "hi"')
+        histogram.observe(0.05, route="bet-list")
+        histogram.observe(0.5, route="bet-list")
+        histogram.observe(3, route="bet-list")
+
+        self.assertEqual(
+            registry.expose(),
+            "# HELP deposits_total Deposits.\n"
+            "# TYPE deposits_total counter\n"
+            'deposits_total{outcome="failed"} 1.0\n'
+            'deposits_total{outcome="say \\"hi\\""} 2.0\n'
+            "# HELP latency_seconds Latency.\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{route="bet-list",le="0.1"} 1.0\n'
+            'latency_seconds_bucket{route="bet-list",le="1.0"} 2.0\n'
+            'latency_seconds_bucket{route="bet-list",le="+Inf"} 3.0\n'
+            'latency_seconds_sum{route="bet-list"} 3.55\n'
+            'latency_seconds_count{route="bet-list"} 3.0\n',
+        )
+
+    def test_labels_must_match(self):
+        _, counter, _ = self.make_metrics()
+        with self.assertRaises(ValueError):
+            counter.inc(route="bet-list")
+        with self.assertRaises(ValueError):
+            counter.inc()
+
+    def test_threads_record_without_losing_counts(self):
+        registry, counter, _ = self.make_metrics()
+
+        def work():
+            for _ in range(10000):
+                counter.inc(outcome="created")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(registry.collect()[("deposits_total", "", ("created",))], 40000)
+
+    def test_exited_threads_hand_their_shards_on(self):
+        with tempfile.TemporaryDirectory() as directory:
+            registry, counter, _ = self.make_metrics(directory)
+            # One thread per request, as a threaded server runs them
+            for _ in range(50):
+                thread = threading.Thread(target=counter.inc, kwargs={"outcome": "created"})
+                thread.start()
+                thread.join()
+            self.assertEqual(len(registry._shards), 1)
+            self.assertEqual(len(os.listdir(directory)), 1)
+            self.assertEqual(registry.collect()[("deposits_total", "", ("created",))], 50)
+
+    def test_processes_aggregate_through_shared_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Two registries stand in for two worker processes
+            first, first_counter, first_histogram = self.make_metrics(directory)
+            second, second_counter, _ = self.make_metrics(directory)
+            first_counter.inc(outcome="created")
+            # Enough keys to grow the file past its initial size
+            for index in range(2000):
+                first_histogram.observe(0.5, route=f"route-{index}")
+            second_counter.inc(3, outcome="created")
+
+            totals = second.collect()
+            self.assertEqual(totals[("deposits_total", "", ("created",))], 4)
+            self.assertEqual(totals[("latency_seconds", "1.0", ("route-1999",))], 1)
+            self.assertEqual(first.collect(), totals)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+
+class MetricsEndpointTests(TransactionTestCase):
+    def sample(self, line_start):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        for line in response.content.decode().splitlines():
+            if line.startswith(line_start):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    def test_requests_are_timed_per_route(self):
+        count = 'http_request_duration_seconds_count{route="api-root",method="GET"}'
+        before = self.sample(count)
+        self.client.get(reverse("api-root"))
+        self.assertEqual(self.sample(count), before + 1)
+        self.assertGreater(self.sample('http_request_db_seconds_count{route="api-root",method="GET"}'), 0)
+
+    def test_bets_placed_and_settlement(self):
+        organizer = CustomUser.objects.create_user(
+            username="whis", email="whis@beerus.planet", password="Angel12345", available_funds=100
+        )
+        bettor = CustomUser.objects.create_user(
+            username="beerus", email="beerus@beerus.planet", password="Destroy123", available_funds=100
+        )
+        start = timezone.now() + timedelta(days=1)
+        event = Event.objects.create(
+            group=Group.objects.create(name="Universe 7", location="Beerus planet"),
+            organizer=organizer, team1="Goku", team2="Jiren", start_time=start, end_time=start + timedelta(hours=1),
+        )
+        placed = 'bets_placed_total{bet_type="Win"}'
+        before = self.sample(placed)
+        client = APIClient()
+        for user, team in [(organizer, "Team 1"), (bettor, "Team 2")]:
+            client.force_authenticate(user=user)
+            response = client.post(
+                reverse("bet-list"),
+                {"user": user.id, "event_id": event.id, "team_choice": team, "bet_type": "Win", "bet_amount": 10},
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(self.sample(placed), before + 2)
+
+        settled = self.sample("event_settlement_bets_count")
+        two_bets = self.sample('event_settlement_bets_bucket{le="2.0"}')
+        client.force_authenticate(user=organizer)
+        response = client.post(reverse("event-complete-event", args=[event.id]), {"winning_team": "Goku"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(self.sample("event_settlement_bets_count"), settled + 1)
+        self.assertEqual(self.sample('event_settlement_bets_bucket{le="2.0"}'), two_bets + 1)
+
+    @override_settings(METRICS_TOKEN="scrape-me")
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-me")
+        self.assertEqual(response.status_code, 200)
+
+
+class ProfilingTests(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PROFILE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = CustomUser.objects.create_user(
+            username="zeno", email="zeno@omni.king", password="Erase12345", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def test_signed_header_profiles_the_request(self):
+        token = self.client.post(reverse("profile-token")).data["token"]
+        response = self.client.get(reverse("event-all-and-user-events"), HTTP_X_PROFILE=token)
+        name = response["X-Profile-Id"]
+
+        listing = self.client.get(reverse("profile-list")).data
+        self.assertEqual([profile["name"] for profile in listing], [name])
+        self.assertEqual(listing[0]["route"], "event-all-and-user-events")
+        self.assertEqual(listing[0]["method"], "GET")
+
+        response = self.client.get(reverse("profile-detail", args=[name]), {"top": "5"})
+        self.assertIn("function calls", response.content.decode())
+        response = self.client.get(reverse("profile-detail", args=[name]))
+        self.assertEqual(response["Content-Disposition"], f'attachment; filename="{name}"')
+
+    def test_invalid_or_missing_header_is_not_profiled(self):
+        response = self.client.get(reverse("event-all-and-user-events"), HTTP_X_PROFILE="forged:token")
+        self.assertNotIn("X-Profile-Id", response)
+        self.client.get(reverse("event-all-and-user-events"))
+        self.assertEqual(profiling.list_profiles(), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_requests_are_profiled(self):
+        self.client.get(reverse("api-root"))
+        self.assertEqual([profile["route"] for profile in profiling.list_profiles()], ["api-root"])
+
+    def test_staff_only(self):
+        user = CustomUser.objects.create_user(username="goku", email="goku@earth.com", password="Kamehame12")
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.client.get(reverse("profile-list")).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.post(reverse("profile-token")).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StartupTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     PIL._version\n"
+            "import time:       300 |        420 |   PIL\n"
+            "import time:       500 |        920 | validators.img_validators\n"
+        )
+        rows = parse_importtime(output)
+        self.assertEqual(
+            [(row["module"], row["depth"], row["imported_by"]) for row in rows],
+            [("PIL._version", 2, "validators.img_validators"), ("PIL", 1, "validators.img_validators"),
+             ("validators.img_validators", 0, "validators.img_validators")],
+        )
+        self.assertEqual(rows[1]["cumulative_us"], 420)
+
+    def test_optional_dependencies_load_lazily(self):
+        # Heavy optional dependencies load at first use, not at startup
+        imported = {row["module"] for row in measure_startup(settings.SETTINGS_MODULE)["imports"]}
+        self.assertNotIn("PIL", imported)
+        self.assertNotIn("stripe", imported)
+
+    @tag("slow")
+    def test_cold_start_within_budget(self):
+        result = measure_startup(settings.SETTINGS_MODULE, attempts=3)
+        heaviest = sorted(
+            (row for row in result["imports"] if row["depth"] == 0), key=lambda row: row["cumulative_us"], reverse=True
+        )[:10]
+        self.assertLessEqual(
+            result["seconds"],
+            settings.STARTUP_BUDGET_SECONDS,
+            "Cold django.setup() + URLconf took too long; heaviest top-level imports:\n"
+            + "\n".join(f"{row['cumulative_us'] / 1000:8.1f} ms  {row['module']}" for row in heaviest),
+        )
+
+
+class MigrationTests(SimpleTestCase):
+    # makemigrations reads the applied migrations of every database
+    databases = "__all__"
+
+    def test_models_match_migrations(self):
+        # The test settings build the schema from migrations on SQLite, production runs them on MySQL:
+        # keep them free of engine-specific SQL and in step with the models
+        output = io.StringIO()
+        try:
+            call_command("makemigrations", "--check", "--dry-run", stdout=output)
+        except SystemExit:
+            self.fail(f"Models have changes without a migration:\n{output.getvalue()}")
+
+
+class PubSubTests(SimpleTestCase):
+    def setUp(self):
+        self.broker = pubsub.Broker()
+        self.broker._backend = pubsub.LocalBackend(self.broker)
+
+    async def test_publish_from_another_thread(self):
+        subscription = self.broker.subscribe(["event:1"])
+        other = self.broker.subscribe(["event:2"])
+        thread = threading.Thread(target=self.broker.publish, args=("event:1", {"type": "pool"}))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await subscription.get(timeout=1), ("event:1", {"type": "pool"}))
+        self.assertIsNone(await other.get(timeout=0.01))
+        subscription.close()
+        other.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    @override_settings(PUBSUB={"MAX_QUEUED": 2})
+    async def test_slow_subscriber_is_dropped(self):
+        subscription = self.broker.subscribe(["events"])
+        for index in range(3):
+            self.broker.publish("events", {"index": index})
+        await asyncio.sleep(0)
+
+        self.assertEqual(await subscription.get(timeout=1), ("events", {"index": 1}))
+        self.assertIsNone(await subscription.get(timeout=1))
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(self.broker.subscriber_count("events"), 0)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            CustomUser.objects.create_user(username=f"saibaman{index}", email=f"saibaman{index}@nappa.com", password="Saibamen1")
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("ANALYZE")
+        CustomUser.objects.create_user(username="nappa", email="nappa@vegeta.com", password="Bombers123")
+
+    def count(self, queryset):
+        return EstimatedCountPaginator(queryset.order_by("id"), 100).count
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=2)
+    def test_large_tables_use_the_statistics(self):
+        # As of the ANALYZE, without reading the table
+        with self.assertNumQueries(1):
+            self.assertEqual(self.count(CustomUser.objects.all()), 3)
+        # Filtered lists are counted
+        self.assertEqual(self.count(CustomUser.objects.filter(username="nappa")), 1)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=10)
+    def test_small_tables_are_counted(self):
+        self.assertEqual(self.count(CustomUser.objects.all()), 4)
@@ -10,6 +10,8 @@ from rest_framework_simplejwt.views import (
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
@@ -17,6 +19,12 @@ urlpatterns = [
     # simple_jst_endpoints
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # Staff only: profiled requests, see betting_project/profiling.py
+    path("api/profiles/", views.ProfileListView.as_view(), name="profile-list"),
+    path("api/profiles/token/", views.ProfileTokenView.as_view(), name="profile-token"),
+    path("api/profiles/<str:name>", views.ProfileDetailView.as_view(), name="profile-detail"),
+    # Prometheus scrape endpoint
+    path("metrics", views.metrics, name="metrics"),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,73 @@
+import io
+import pstats
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics as metrics_registry
+from . import profiling
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint. When METRICS_TOKEN is set, the scraper must
+    send it as "Authorization: Bearer <token>".
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.REGISTRY.expose(), content_type=CONTENT_TYPE)
+
+
+class ProfileListView(APIView):
+    """
+    Staff only: the stored request profiles, newest first.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(profiling.list_profiles())
+
+
+class ProfileTokenView(APIView):
+    """
+    Staff only: a token to send as the X-Profile header to get requests profiled.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        return Response({
+            "header": "X-Profile",
+            "token": profiling.make_token(request.user),
+            "expires_in": getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600),
+        })
+
+
+class ProfileDetailView(APIView):
+    """
+    Staff only: download a .prof file, or with ?top=N the N functions with
+    the most cumulative time as text.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        path = profiling.profile_path(name)
+        if path is None:
+            raise Http404
+        top = request.query_params.get("top")
+        if not top:
+            return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats("cumulative").print_stats(int(top) if top.isdigit() else 30)
+        return HttpResponse(stream.getvalue(), content_type="text/plain; charset=utf-8")
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from betting_project.admin import EstimatedCountPaginator
+
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from .models import CustomUser
 
@@ -10,7 +12,8 @@ class CustomUserAdmin(UserAdmin):
     form = CustomUserChangeForm
     model = CustomUser
     list_display = ("email", "is_staff", "is_active", "available_funds")
-    list_filter = ("email", "is_staff", "is_active",)
+    # No filter on email: it would list every distinct address in the sidebar
+    list_filter = ("is_staff", "is_active",)
     fieldsets = (
         (None, {"fields": ("username", "email", "password", "profile_picture")}),
         ("Permissions", {"fields": ("is_staff", "is_active", "groups", "user_permissions")}),
@@ -24,8 +27,10 @@ class CustomUserAdmin(UserAdmin):
             )}
         ),
     )
-    search_fields = ("email",)
+    search_fields = ("^email", "^username")
     ordering = ("email",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from betting_project import metrics
+from betting_project.db import replicas
+from . import ledger
+from .models import CustomUser, Deposit
+from .payments import PaymentError, get_payment_client
+
+logger = logging.getLogger(__name__)
+
+# Provider calls run here instead of on the request thread
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="deposits")
+
+# Intent statuses that mean the payment will not go through
+FAILED_INTENT_STATUSES = {"requires_payment_method", "canceled"}
+
+
+def create_deposit(user, amount, payment_method, currency="usd"):
+    """
+    Record a pending deposit and schedule its submission to the payment
+    provider once the surrounding transaction commits.
+    """
+    deposit = Deposit.objects.create(
+        user=user, amount=amount, currency=currency, payment_method=payment_method
+    )
+    transaction.on_commit(lambda: metrics.DEPOSITS.inc(outcome="created"))
+    if getattr(settings, "DEPOSITS_SUBMIT_ASYNC", True):
+        transaction.on_commit(lambda: _executor.submit(_submit_in_thread, deposit.id))
+    else:
+        transaction.on_commit(lambda: submit_deposit(deposit.id))
+    return deposit
+
+
+def _submit_in_thread(deposit_id):
+    try:
+        submit_deposit(deposit_id)
+    except Exception:
+        logger.exception("Submitting deposit %s failed", deposit_id)
+    finally:
+        # The worker thread has its own DB connection; don't leak it
+        close_old_connections()
+
+
+def submit_deposit(deposit_id):
+    """
+    Create the payment intent for a pending deposit.
+
+    The deposit id doubles as the idempotency key, so re-submitting a
+    deposit (e.g. from the reconcile poller) never charges twice.
+    """
+    deposit = Deposit.objects.select_related("user").get(pk=deposit_id)
+    if deposit.status != Deposit.PENDING:
+        return deposit
+
+    try:
+        intent = get_payment_client().create_intent(
+            amount=deposit.amount,
+            currency=deposit.currency,
+            payment_method=deposit.payment_method,
+            description=f"Deposit for user {deposit.user.email}",
+            metadata={"deposit_id": str(deposit.id)},
+            idempotency_key=f"deposit-{deposit.id}",
+        )
+    except PaymentError as e:
+        logger.warning("Payment provider rejected deposit %s: %s", deposit.id, e)
+        mark_failed(deposit.id, str(e))
+        return deposit
+
+    Deposit.objects.filter(pk=deposit.id, status=Deposit.PENDING).update(
+        provider_intent_id=intent["id"], status=Deposit.PROCESSING, updated_at=timezone.now()
+    )
+    apply_intent(intent)
+    return deposit
+
+
+def apply_intent(intent):
+    """
+    Move the deposit behind a payment intent to the state the intent is in.
+    Safe to call any number of times for the same intent.
+    """
+    if intent["status"] == "succeeded":
+        return credit_deposit(intent["id"])
+    if intent["status"] in FAILED_INTENT_STATUSES:
+        error = intent.get("last_payment_error") or {}
+        return mark_failed_by_intent(intent["id"], error.get("message", intent["status"]))
+    return False
+
+
+def credit_deposit(intent_id):
+    """
+    Mark the deposit as succeeded and add it to the user's funds.
+
+    The status change is a conditional UPDATE, so only one caller (webhook,
+    poller or submitter) gets to credit the deposit. The funds change is an
+    F() increment and cannot overwrite a concurrent balance change.
+
+    Returns True if this call credited the deposit.
+    """
+    with transaction.atomic():
+        deposit = (
+            Deposit.objects.filter(provider_intent_id=intent_id)
+            .only("id", "user_id", "amount")
+            .first()
+        )
+        if deposit is None:
+            logger.warning("No deposit found for payment intent %s", intent_id)
+            return False
+        credited = Deposit.objects.filter(
+            pk=deposit.id, status__in=[Deposit.PENDING, Deposit.PROCESSING]
+        ).update(status=Deposit.SUCCEEDED, credited_at=timezone.now(), updated_at=timezone.now())
+        if not credited:
+            return False
+        CustomUser.objects.filter(pk=deposit.user_id).update(
+            available_funds=F("available_funds") + deposit.amount_in_dollars
+        )
+        ledger.record_deposit(deposit)
+    # The user is polling for this; make sure they see the new balance
+    replicas.pin_user_to_primary(deposit.user_id)
+    metrics.DEPOSITS.inc(outcome="succeeded")
+    logger.info("Credited deposit %s to user %s", deposit.id, deposit.user_id)
+    return True
+
+
+def mark_failed(deposit_id, reason):
+    failed = bool(
+        Deposit.objects.filter(
+            pk=deposit_id, status__in=[Deposit.PENDING, Deposit.PROCESSING]
+        ).update(status=Deposit.FAILED, failure_reason=reason[:255], updated_at=timezone.now())
+    )
+    if failed:
+        metrics.DEPOSITS.inc(outcome="failed")
+    return failed
+
+
+def mark_failed_by_intent(intent_id, reason):
+    deposit_id = (
+        Deposit.objects.filter(provider_intent_id=intent_id).values_list("id", flat=True).first()
+    )
+    if deposit_id is None:
+        return False
+    return mark_failed(deposit_id, reason)
+
+
+def reconcile_deposits(older_than=timedelta(seconds=30), limit=500):
+    """
+    Poll the provider for deposits that are still open after `older_than`.
+
+    Covers missed webhooks (processing deposits) and submissions that never
+    happened, e.g. because the process died (pending deposits).
+    Returns a dict of counts by outcome.
+    """
+    cutoff = timezone.now() - older_than
+    client = get_payment_client()
+    counts = {"credited": 0, "failed": 0, "resubmitted": 0, "open": 0}
+
+    stale = Deposit.objects.filter(
+        status__in=[Deposit.PENDING, Deposit.PROCESSING], updated_at__lte=cutoff
+    ).order_by("updated_at")[:limit]
+    for deposit in stale:
+        if deposit.provider_intent_id is None:
+            submit_deposit(deposit.id)
+            counts["resubmitted"] += 1
+            continue
+        try:
+            intent = client.retrieve_intent(deposit.provider_intent_id)
+        except PaymentError as e:
+            logger.warning("Could not retrieve intent for deposit %s: %s", deposit.id, e)
+            counts["open"] += 1
+            continue
+        if intent["status"] == "succeeded":
+            counts["credited"] += int(credit_deposit(intent["id"]))
+        elif intent["status"] in FAILED_INTENT_STATUSES:
+            counts["failed"] += int(apply_intent(intent))
+        else:
+            counts["open"] += 1
+    return counts
@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from .models import LedgerEntry
+
+
+# Writers for LedgerEntry. Call these in the same transaction as the
+# available_funds change they describe.
+
+
+def record(user_id, kind, amount, bet_id=None, deposit_id=None, description=""):
+    return LedgerEntry.objects.create(
+        user_id=user_id,
+        kind=kind,
+        amount=Decimal(amount or 0),
+        bet_id=bet_id,
+        deposit_id=deposit_id,
+        description=description[:255],
+    )
+
+
+def record_many(entries):
+    """
+    Write many unsaved LedgerEntry objects in one INSERT, e.g. the refunds
+    and payouts of a batch of settled events.
+    """
+    return LedgerEntry.objects.bulk_create(entries)
+
+
+def record_stake(bet):
+    return record(bet.user_id, LedgerEntry.STAKE, -Decimal(bet.bet_amount or 0), bet_id=bet.id)
+
+
+def record_refund(bet):
+    return record(bet.user_id, LedgerEntry.REFUND, Decimal(bet.bet_amount or 0), bet_id=bet.id)
+
+
+def record_payout(bet, amount):
+    return record(bet.user_id, LedgerEntry.PAYOUT, amount, bet_id=bet.id)
+
+
+def record_deposit(deposit):
+    return record(
+        deposit.user_id, LedgerEntry.DEPOSIT, deposit.amount_in_dollars, deposit_id=deposit.id
+    )
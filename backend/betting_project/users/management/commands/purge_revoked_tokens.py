@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.token_revocation import revocation_store
+
+
+class Command(BaseCommand):
+    help = "Delete revoked refresh tokens that have expired on their own."
+
+    def handle(self, *args, **options):
+        deleted = revocation_store.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired token revocations"))
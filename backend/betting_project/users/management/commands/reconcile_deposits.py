@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from users.deposits import reconcile_deposits
+
+
+class Command(BaseCommand):
+    help = "Poll the payment provider for deposits that have not been confirmed by a webhook."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=30,
+            help="Only check deposits that have been open for at least this many seconds.",
+        )
+        parser.add_argument("--limit", type=int, default=500, help="Maximum deposits to check per run.")
+
+    def handle(self, *args, **options):
+        counts = reconcile_deposits(
+            older_than=timedelta(seconds=options["older_than"]), limit=options["limit"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(", ".join(f"{outcome}: {count}" for outcome, count in counts.items()))
+        )
@@ -0,0 +1,111 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:13
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+
+
+def backfill_betting_stats(apps, schema_editor):
+    """
+    Build a stats row for every existing user from their bets.
+
+    Payouts were never stored per bet, so amount_won starts at zero for
+    bets settled before this migration.
+    """
+    CustomUser = apps.get_model("users", "CustomUser")
+    BettingStats = apps.get_model("users", "BettingStats")
+    Bet = apps.get_model("api", "Bet")
+
+    totals = {
+        row["user_id"]: row
+        for row in Bet.objects.values("user_id").annotate(
+            lifetime_wagered=Sum("bet_amount"),
+            open_stake=Sum("bet_amount", filter=Q(event__is_complete=False)),
+            amount_lost=Sum("bet_amount", filter=Q(status="Lost")),
+            bets_won=Count("id", filter=Q(status="Won")),
+            bets_lost=Count("id", filter=Q(status="Lost")),
+        )
+    }
+    rows = []
+    for user_id in CustomUser.objects.values_list("id", flat=True).iterator():
+        row = totals.get(user_id, {})
+        rows.append(
+            BettingStats(
+                user_id=user_id,
+                open_stake=row.get("open_stake") or 0,
+                lifetime_wagered=row.get("lifetime_wagered") or 0,
+                amount_lost=row.get("amount_lost") or 0,
+                bets_won=row.get("bets_won") or 0,
+                bets_lost=row.get("bets_lost") or 0,
+            )
+        )
+    BettingStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_remove_event_participants_participant"),
+        ("users", "0006_revokedtoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BettingStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        help_text="The user these stats belong to.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="betting_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "open_stake",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total amount on bets that have not been settled yet.",
+                        max_digits=12,
+                    ),
+                ),
+                (
+                    "lifetime_wagered",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total amount ever staked.",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "amount_won",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total winnings paid out on won bets.",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "amount_lost",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total stake lost on lost bets.",
+                        max_digits=14,
+                    ),
+                ),
+                ("bets_won", models.PositiveIntegerField(default=0)),
+                ("bets_lost", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_betting_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:18
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Seed the ledger with the movements that can be rebuilt from existing rows:
+    a stake per bet and a credit per succeeded deposit. Refunds and payouts
+    made before this migration were not recorded anywhere and are not included.
+    """
+    Bet = apps.get_model("api", "Bet")
+    Deposit = apps.get_model("users", "Deposit")
+    LedgerEntry = apps.get_model("users", "LedgerEntry")
+
+    entries = [
+        LedgerEntry(
+            user_id=user_id,
+            kind="stake",
+            amount=-(bet_amount or 0),
+            bet_id=bet_id,
+            created_at=created_at,
+        )
+        for bet_id, user_id, bet_amount, created_at in Bet.objects.values_list(
+            "id", "user_id", "bet_amount", "created_at"
+        ).iterator()
+    ]
+    entries += [
+        LedgerEntry(
+            user_id=user_id,
+            kind="deposit",
+            amount=Decimal(amount) / 100,
+            deposit_id=deposit_id,
+            created_at=credited_at,
+        )
+        for deposit_id, user_id, amount, credited_at in Deposit.objects.filter(
+            status="succeeded"
+        ).values_list("id", "user_id", "amount", "credited_at")
+    ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_bet_user_created_idx"),
+        ("users", "0008_deposit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("stake", "Stake"),
+                            ("refund", "Refund"),
+                            ("payout", "Payout"),
+                            ("deposit", "Deposit"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="Signed amount: negative when funds leave the user's balance.",
+                        max_digits=12,
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "bet",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The bet this movement belongs to, if any.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="ledger_entries",
+                        to="api.bet",
+                    ),
+                ),
+                (
+                    "deposit",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The deposit this movement belongs to, if any.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="ledger_entries",
+                        to="users.deposit",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="The user whose funds moved.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"], name="ledger_user_created_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
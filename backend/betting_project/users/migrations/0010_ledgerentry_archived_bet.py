@@ -0,0 +1,27 @@
+# Generated by Django 4.2.4 on 2026-10-19 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0020_archive_tables"),
+        ("users", "0009_ledgerentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ledgerentry",
+            name="archived_bet",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The bet this movement belongs to, once it has been archived.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="ledger_entries",
+                to="api.archivedbet",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.dispatch import receiver
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -85,3 +86,223 @@ def delete_associated_files(sender, instance, **kwargs):
 # Event:
 #     - Is attended by -> Many CustomUsers (attendees field)
 #     - Is hosted by -> One Group (group field)
+
+
+class BettingStats(models.Model):
+    """
+    Running betting totals for a user, one row per user.
+
+    The row is kept up to date by bet placement and event settlement
+    (see users/stats.py) so the profile endpoint can return the stats
+    without aggregating over the user's bets.
+    """
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="betting_stats",
+        help_text="The user these stats belong to."
+    )
+    open_stake = models.DecimalField(
+        default=Decimal("0.00"),
+        max_digits=12,
+        decimal_places=2,
+        help_text="Total amount on bets that have not been settled yet."
+    )
+    lifetime_wagered = models.DecimalField(
+        default=Decimal("0.00"),
+        max_digits=14,
+        decimal_places=2,
+        help_text="Total amount ever staked."
+    )
+    amount_won = models.DecimalField(
+        default=Decimal("0.00"),
+        max_digits=14,
+        decimal_places=2,
+        help_text="Total winnings paid out on won bets."
+    )
+    amount_lost = models.DecimalField(
+        default=Decimal("0.00"),
+        max_digits=14,
+        decimal_places=2,
+        help_text="Total stake lost on lost bets."
+    )
+    bets_won = models.PositiveIntegerField(default=0)
+    bets_lost = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def win_rate(self):
+        """
+        Share of settled (won or lost) bets that were won, or None before any settle.
+        """
+        settled = self.bets_won + self.bets_lost
+        if not settled:
+            return None
+        return round(self.bets_won / settled, 4)
+
+    def __str__(self):
+        return f"Betting stats for user {self.user_id}"
+
+
+@receiver(models.signals.post_save, sender=CustomUser)
+def create_betting_stats(sender, instance, created, using, **kwargs):
+    """
+    Give every new user an empty stats row, in the database the user was saved to.
+    """
+    if created:
+        BettingStats.objects.db_manager(using).get_or_create(user=instance)
+
+
+class Deposit(models.Model):
+    """
+    A request to add funds, tracked from submission to the payment provider
+    until the provider confirms or rejects the payment.
+
+    Funds are only credited once, when the deposit moves to "succeeded"
+    (see users/deposits.py).
+    """
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="deposits",
+        help_text="The user whose funds the deposit adds to."
+    )
+    amount = models.PositiveIntegerField(
+        help_text="The deposit amount in cents."
+    )
+    currency = models.CharField(max_length=3, default="usd")
+    payment_method = models.CharField(
+        max_length=255,
+        help_text="The provider's payment method id."
+    )
+    provider_intent_id = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="The provider's payment intent id, set once the deposit is submitted."
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    failure_reason = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    credited_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def amount_in_dollars(self):
+        return Decimal(self.amount) / Decimal(100)
+
+    def __str__(self):
+        return f"Deposit {self.id} of {self.amount_in_dollars} for user {self.user_id} ({self.status})"
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
+class LedgerEntry(models.Model):
+    """
+    One movement of a user's funds: a stake taken for a bet, a refund, a
+    payout or a deposit. Amounts are signed from the user's
+    point of view (stakes are negative, credits positive).
+
+    Entries are append-only and written next to every available_funds
+    change (see users/ledger.py); account statements are read from here.
+    """
+    STAKE = "stake"
+    REFUND = "refund"
+    PAYOUT = "payout"
+    DEPOSIT = "deposit"
+    KIND_CHOICES = [
+        (STAKE, "Stake"),
+        (REFUND, "Refund"),
+        (PAYOUT, "Payout"),
+        (DEPOSIT, "Deposit"),
+    ]
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+        help_text="The user whose funds moved."
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text="Signed amount: negative when funds leave the user's balance."
+    )
+    bet = models.ForeignKey(
+        "api.Bet",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+        help_text="The bet this movement belongs to, if any."
+    )
+    archived_bet = models.ForeignKey(
+        "api.ArchivedBet",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+        help_text="The bet this movement belongs to, once it has been archived."
+    )
+    deposit = models.ForeignKey(
+        Deposit,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+        help_text="The deposit this movement belongs to, if any."
+    )
+    description = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.amount} for user {self.user_id}"
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            # Backs statements: a user's entries in time order
+            models.Index(fields=["user", "created_at"], name="ledger_user_created_idx"),
+        ]
+
+
+class RevokedToken(models.Model):
+    """
+    A refresh token that can no longer be used, identified by its `jti` claim.
+
+    Rows are only needed until the token would have expired on its own;
+    `manage.py purge_revoked_tokens` deletes them after that.
+    """
+    jti = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text="The unique identifier (jti claim) of the revoked token."
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text="When the revoked token expires. The row can be purged after this."
+    )
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,313 @@
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .payments import PaymentClient, PaymentError
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PAYMENT_GATEWAY = {
+    "BASE_URL": "https://api.stripe.com",
+    # Seconds to wait for the TCP/TLS connection, and for each response
+    "CONNECT_TIMEOUT": 2.0,
+    "READ_TIMEOUT": 10.0,
+    # Extra attempts on connection errors, 429 and 5xx (every call is idempotent)
+    "MAX_RETRIES": 2,
+    "BACKOFF_FACTOR": 0.2,
+    # Keep-alive connections per worker process
+    "POOL_MAXSIZE": 10,
+    # Consecutive failed calls that open the breaker, and how long it stays open
+    "BREAKER_FAILURE_THRESHOLD": 5,
+    "BREAKER_RESET_TIMEOUT": 30.0,
+    # Max age of a webhook signature timestamp, in seconds
+    "WEBHOOK_TOLERANCE": 300,
+}
+
+
+def get_gateway_settings():
+    return {**DEFAULT_PAYMENT_GATEWAY, **getattr(settings, "PAYMENT_GATEWAY", {})}
+
+
+class CircuitOpenError(PaymentError):
+    """
+    Raised without calling the provider while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the provider is unhealthy.
+
+    closed    -> calls go through; `failure_threshold` consecutive failures open it.
+    open      -> calls are rejected until `reset_timeout` seconds have passed.
+    half-open -> one trial call goes through; success closes, failure re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Payment provider unavailable (circuit open)")
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError("Payment provider unavailable (circuit half-open)")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Payment provider circuit opened after %s failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class LatencyMetrics:
+    """
+    Call counts and latency percentiles over the most recent `window` calls.
+    """
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.total_seconds += seconds
+            self._recent.append(seconds)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            ordered = sorted(self._recent)
+            calls, errors, rejected, total = self.calls, self.errors, self.rejected, self.total_seconds
+
+        def percentile(p):
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "rejected": rejected,
+            "mean_seconds": total / calls if calls else None,
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "p99_seconds": percentile(0.99),
+        }
+
+
+def _form_encode(data, prefix=None):
+    """
+    Flatten nested dicts the way Stripe expects form fields (metadata[key]=value).
+    """
+    pairs = []
+    for key, value in data.items():
+        name = f"{prefix}[{key}]" if prefix else key
+        if isinstance(value, dict):
+            pairs.extend(_form_encode(value, name))
+        elif isinstance(value, bool):
+            pairs.append((name, "true" if value else "false"))
+        elif value is not None:
+            pairs.append((name, str(value)))
+    return pairs
+
+
+class PaymentGateway:
+    """
+    Persistent, pooled HTTP client for the payment provider's REST API.
+
+    One instance per process reuses keep-alive connections across requests.
+    Every call has connect/read timeouts, bounded retries with backoff (calls
+    carry an Idempotency-Key, so POST retries are safe), goes through a
+    circuit breaker and is timed into `metrics`.
+    """
+
+    def __init__(self, api_key, options=None):
+        self.options = {**get_gateway_settings(), **(options or {})}
+        self.api_key = api_key
+        self.base_url = self.options["BASE_URL"].rstrip("/")
+        self.timeout = (self.options["CONNECT_TIMEOUT"], self.options["READ_TIMEOUT"])
+        self.breaker = CircuitBreaker(
+            self.options["BREAKER_FAILURE_THRESHOLD"], self.options["BREAKER_RESET_TIMEOUT"]
+        )
+        self.metrics = LatencyMetrics()
+
+        retry = Retry(
+            total=self.options["MAX_RETRIES"],
+            connect=self.options["MAX_RETRIES"],
+            read=self.options["MAX_RETRIES"],
+            status=self.options["MAX_RETRIES"],
+            backoff_factor=self.options["BACKOFF_FACTOR"],
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.options["POOL_MAXSIZE"], max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+
+    def request(self, method, path, data=None, idempotency_key=None):
+        """
+        Call the provider and return the decoded JSON body.
+
+        Raises CircuitOpenError without a network call while the breaker is
+        open, and PaymentError for transport failures and error responses.
+        """
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.metrics.reject()
+            raise
+
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                f"{self.base_url}{path}",
+                data=_form_encode(data) if data else None,
+                headers=headers,
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            self.metrics.observe(time.perf_counter() - started, error=True)
+            self.breaker.record_failure()
+            raise PaymentError(f"Payment provider unreachable: {e}") from e
+
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 500 or response.status_code == 429:
+            self.metrics.observe(elapsed, error=True)
+            self.breaker.record_failure()
+            raise PaymentError(f"Payment provider error (HTTP {response.status_code})")
+
+        # 4xx are answers about this payment, not provider health
+        self.metrics.observe(elapsed)
+        self.breaker.record_success()
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise PaymentError("Payment provider returned an invalid response") from e
+        if response.status_code >= 400:
+            raise PaymentError(body.get("error", {}).get("message", f"HTTP {response.status_code}"))
+        return body
+
+    def close(self):
+        self.session.close()
+
+
+def verify_stripe_signature(payload, signature_header, secret, tolerance, now=None):
+    """
+    Check a Stripe-Signature header ("t=<timestamp>,v1=<hmac>,...") against the payload.
+    """
+    if not secret:
+        raise PaymentError("No webhook secret configured")
+    items = [part.split("=", 1) for part in signature_header.split(",") if "=" in part]
+    timestamps = [value for key, value in items if key == "t"]
+    signatures = [value for key, value in items if key == "v1"]
+    if not timestamps or not signatures:
+        raise PaymentError("Malformed signature header")
+    try:
+        timestamp = int(timestamps[0])
+    except ValueError as e:
+        raise PaymentError("Malformed signature header") from e
+    if isinstance(payload, str):
+        payload = payload.encode()
+
+    expected = hmac.new(
+        secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256
+    ).hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise PaymentError("Signature mismatch")
+    if abs((now or time.time()) - timestamp) > tolerance:
+        raise PaymentError("Signature timestamp outside tolerance")
+
+
+class GatewayPaymentClient(PaymentClient):
+    """
+    PaymentClient that talks to Stripe's REST API through a PaymentGateway,
+    instead of the stripe library's global, unpooled default client.
+    """
+
+    def __init__(self, options=None):
+        self.gateway = PaymentGateway(getattr(settings, "STRIPE_SECRET_KEY", None), options)
+
+    def create_intent(self, amount, currency, payment_method, description, metadata, idempotency_key):
+        return self.gateway.request(
+            "POST",
+            "/v1/payment_intents",
+            data={
+                "amount": amount,
+                "currency": currency,
+                "payment_method": payment_method,
+                "confirm": True,
+                "description": description,
+                "metadata": metadata,
+                "return_url": settings.PAYMENT_RETURN_URL,
+            },
+            idempotency_key=idempotency_key,
+        )
+
+    def retrieve_intent(self, intent_id):
+        return self.gateway.request("GET", f"/v1/payment_intents/{intent_id}")
+
+    def parse_webhook(self, payload, signature):
+        verify_stripe_signature(
+            payload,
+            signature,
+            getattr(settings, "STRIPE_WEBHOOK_SECRET", None),
+            self.gateway.options["WEBHOOK_TOLERANCE"],
+        )
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise PaymentError(str(e)) from e
@@ -0,0 +1,188 @@
+import itertools
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class PaymentError(Exception):
+    """
+    Raised by a payment client when the provider rejects or fails a call.
+    """
+
+
+class PaymentClient:
+    """
+    Interface the deposit flow uses to talk to the payment provider.
+
+    Intents are returned as plain dicts with at least "id", "status",
+    "amount" (in cents) and "metadata". Status values follow Stripe's
+    PaymentIntent statuses ("processing", "succeeded", "requires_payment_method", ...).
+    """
+
+    def create_intent(self, amount, currency, payment_method, description, metadata, idempotency_key):
+        raise NotImplementedError
+
+    def retrieve_intent(self, intent_id):
+        raise NotImplementedError
+
+    def parse_webhook(self, payload, signature):
+        """
+        Verify a webhook delivery and return the event as a dict with
+        "type" and "data": {"object": <intent>}.
+        """
+        raise NotImplementedError
+
+
+class StripePaymentClient(PaymentClient):
+    """
+    PaymentClient backed by the Stripe API.
+    """
+
+    def __init__(self):
+        import stripe
+
+        self.stripe = stripe
+        self.api_key = settings.STRIPE_SECRET_KEY
+
+    def create_intent(self, amount, currency, payment_method, description, metadata, idempotency_key):
+        try:
+            intent = self.stripe.PaymentIntent.create(
+                api_key=self.api_key,
+                amount=amount,
+                currency=currency,
+                payment_method=payment_method,
+                confirm=True,
+                description=description,
+                metadata=metadata,
+                return_url=settings.PAYMENT_RETURN_URL,
+                idempotency_key=idempotency_key,
+            )
+        except self.stripe.error.StripeError as e:
+            raise PaymentError(str(e)) from e
+        return intent.to_dict_recursive()
+
+    def retrieve_intent(self, intent_id):
+        try:
+            return self.stripe.PaymentIntent.retrieve(intent_id, api_key=self.api_key).to_dict_recursive()
+        except self.stripe.error.StripeError as e:
+            raise PaymentError(str(e)) from e
+
+    def parse_webhook(self, payload, signature):
+        try:
+            event = self.stripe.Webhook.construct_event(
+                payload, signature, settings.STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, self.stripe.error.SignatureVerificationError) as e:
+            raise PaymentError(str(e)) from e
+        return event.to_dict_recursive()
+
+
+class FakePaymentClient(PaymentClient):
+    """
+    In-process stand-in for Stripe, for local development, tests and
+    offline load tests of the deposit flow.
+
+    Intents are kept in memory. A new intent is "processing" and moves to
+    "succeeded" once `confirm_after` seconds have passed (so the reconcile
+    poller picks it up), or immediately when `settle` is called. Payment
+    methods listed in `declined_payment_methods` fail instead.
+    """
+
+    def __init__(self, confirm_after=0.0, latency=0.0, declined_payment_methods=("pm_card_declined",)):
+        self.confirm_after = confirm_after
+        self.latency = latency
+        self.declined_payment_methods = set(declined_payment_methods)
+        self.intents = {}
+        self._created = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create_intent(self, amount, currency, payment_method, description, metadata, idempotency_key):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            # Same idempotency key returns the same intent, like Stripe does
+            for intent in self.intents.values():
+                if intent["idempotency_key"] == idempotency_key:
+                    return dict(intent)
+            intent = {
+                "id": f"pi_fake_{next(self._ids)}",
+                "object": "payment_intent",
+                "amount": amount,
+                "amount_received": 0,
+                "currency": currency,
+                "payment_method": payment_method,
+                "description": description,
+                "metadata": dict(metadata),
+                "idempotency_key": idempotency_key,
+                "status": "processing",
+            }
+            self.intents[intent["id"]] = intent
+            self._created[intent["id"]] = time.monotonic()
+            if payment_method in self.declined_payment_methods:
+                intent["status"] = "requires_payment_method"
+            return dict(intent)
+
+    def retrieve_intent(self, intent_id):
+        with self._lock:
+            intent = self.intents.get(intent_id)
+            if intent is None:
+                raise PaymentError(f"No such payment_intent: {intent_id}")
+            if intent["status"] == "processing" and time.monotonic() - self._created[intent_id] >= self.confirm_after:
+                self._succeed(intent)
+            return dict(intent)
+
+    def settle(self, intent_id, succeeded=True):
+        """
+        Force an intent to its final state and return the matching webhook event.
+        """
+        with self._lock:
+            intent = self.intents[intent_id]
+            if succeeded:
+                self._succeed(intent)
+            else:
+                intent["status"] = "requires_payment_method"
+            return self.build_event(intent)
+
+    def _succeed(self, intent):
+        intent["status"] = "succeeded"
+        intent["amount_received"] = intent["amount"]
+
+    def build_event(self, intent):
+        event_type = (
+            "payment_intent.succeeded" if intent["status"] == "succeeded" else "payment_intent.payment_failed"
+        )
+        return {"type": event_type, "data": {"object": dict(intent)}}
+
+    def parse_webhook(self, payload, signature):
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise PaymentError(str(e)) from e
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_payment_client():
+    """
+    Return the process-wide payment client named by settings.PAYMENT_CLIENT.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = import_string(settings.PAYMENT_CLIENT)()
+    return _client
+
+
+def reset_payment_client():
+    """
+    Forget the cached client, e.g. after PAYMENT_CLIENT is overridden in tests.
+    """
+    global _client
+    _client = None
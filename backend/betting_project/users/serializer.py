@@ -1,7 +1,11 @@
 from typing import Required
-from .models import CustomUser
+from .models import BettingStats, CustomUser, Deposit
 from rest_framework import serializers
 from django.core.validators import EmailValidator
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .token_revocation import revocation_store
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -9,6 +13,54 @@ class UserSerializer(serializers.ModelSerializer):
         model = CustomUser
         exclude = [ "password"]
 
+
+class BettingStatsSerializer(serializers.ModelSerializer):
+    win_rate = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = BettingStats
+        fields = [
+            "open_stake",
+            "lifetime_wagered",
+            "amount_won",
+            "amount_lost",
+            "bets_won",
+            "bets_lost",
+            "win_rate",
+        ]
+
+
+class UserProfileSerializer(serializers.ModelSerializer):
+    """
+    Fixed, slim projection of the current user for the profile endpoint.
+
+    Unlike UserSerializer it never touches the groups / user_permissions
+    many-to-many fields, and the betting stats come precomputed from the
+    user's BettingStats row.
+    """
+    stats = serializers.SerializerMethodField()
+
+    # Columns loaded for the profile; pass to .only() to skip everything else
+    LOAD_FIELDS = (
+        "id",
+        "username",
+        "email",
+        "profile_picture",
+        "available_funds",
+    )
+
+    class Meta:
+        model = CustomUser
+        fields = ["id", "username", "email", "profile_picture", "available_funds", "stats"]
+        read_only_fields = fields
+
+    def get_stats(self, user):
+        try:
+            betting_stats = user.betting_stats
+        except BettingStats.DoesNotExist:
+            betting_stats = BettingStats(user=user)
+        return BettingStatsSerializer(betting_stats).data
+
 # Serializer for the User model during registration
 class UserSignupSerializer(serializers.ModelSerializer):
     # This field is used for confirming password, it won't be stored in the database
@@ -58,4 +110,44 @@ class UserSignupSerializer(serializers.ModelSerializer):
     #     print(f"Received email: {value}")
     #     result = EmailValidator()(value)
     #     print(f"Validation result: {result}")
-    #     return value
\ No newline at end of file
+    #     return value
+
+class DepositCreateSerializer(serializers.Serializer):
+    amount = serializers.IntegerField(min_value=50, help_text="Amount in cents")
+    source = serializers.CharField(max_length=255, help_text="Payment method id")
+
+
+class DepositSerializer(serializers.ModelSerializer):
+    amount_in_dollars = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Deposit
+        fields = ["id", "amount", "amount_in_dollars", "currency", "status", "failure_reason", "created_at", "credited_at"]
+        read_only_fields = fields
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that rejects revoked refresh tokens and, when
+    ROTATE_REFRESH_TOKENS is on, revokes the old token as it is rotated.
+
+    The revocation check is answered from the in-memory filter of the
+    revocation store, so refresh tokens that were never revoked are
+    accepted without a database lookup.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        jti = refresh[jwt_settings.JTI_CLAIM]
+
+        if revocation_store.is_revoked(jti):
+            raise InvalidToken("Token has been revoked")
+
+        # Capture the old token's expiry before super() rotates it in place
+        expires_at = refresh["exp"]
+        data = super().validate(attrs)
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS and not revocation_store.revoke(jti, expires_at):
+            # Another request rotated this token first
+            raise InvalidToken("Token has been revoked")
+        return data
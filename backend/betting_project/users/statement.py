@@ -0,0 +1,90 @@
+import csv
+
+from django.db.models import Q
+
+from .models import LedgerEntry
+
+
+STATEMENT_HEADER = [
+    "date",
+    "type",
+    "amount",
+    "bet_id",
+    "event",
+    "team_choice",
+    "bet_status",
+    "deposit_id",
+    "description",
+]
+
+
+def iter_ledger_entries(user_id, start=None, end=None, chunk_size=1000):
+    """
+    Yield a user's ledger entries in time order, `chunk_size` rows per query.
+
+    Each chunk is a keyset query on (created_at, id) that continues after the
+    last row of the previous chunk, so memory stays flat however long the
+    history is, and no chunk needs an OFFSET. (QuerySet.iterator() would not
+    help here: the MySQL driver buffers the whole result set client side.)
+    """
+    queryset = (
+        LedgerEntry.objects.filter(user_id=user_id)
+        .select_related("bet__event", "archived_bet__event")
+        .only(
+            "id", "kind", "amount", "created_at", "deposit_id", "description",
+            "bet__id", "bet__team_choice", "bet__status",
+            "bet__event__id", "bet__event__team1", "bet__event__team2",
+            "archived_bet__id", "archived_bet__team_choice", "archived_bet__status",
+            "archived_bet__event__id", "archived_bet__event__team1", "archived_bet__event__team2",
+        )
+        .order_by("created_at", "id")
+    )
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lte=end)
+
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(
+                Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id)
+            )
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+class _Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer
+    produces strings for StreamingHttpResponse instead of buffering.
+    """
+    def write(self, value):
+        return value
+
+
+def statement_csv_lines(entries):
+    """
+    Render ledger entries as CSV lines, header first.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(STATEMENT_HEADER)
+    for entry in entries:
+        # Bets of archived events are in the archive tables (see api/archive.py)
+        bet = entry.bet or entry.archived_bet
+        event = bet.event if bet else None
+        yield writer.writerow([
+            entry.created_at.isoformat(),
+            entry.kind,
+            entry.amount,
+            bet.id if bet else "",
+            f"{event.team1} vs {event.team2}" if event else "",
+            bet.team_choice if bet else "",
+            bet.status if bet else "",
+            entry.deposit_id or "",
+            entry.description,
+        ])
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.db.models import Case, F, Value, When
+
+from .models import BettingStats
+
+
+# Helpers that keep BettingStats in step with bet placement and settlement.
+# Every change is a single UPDATE with F() expressions so concurrent bets and
+# settlements never overwrite each other's totals.
+
+
+def _apply(user_id, **changes):
+    """
+    Apply F() based increments to a user's stats row, creating it if missing.
+    """
+    increments = {field: F(field) + value for field, value in changes.items()}
+    if not BettingStats.objects.filter(user_id=user_id).update(**increments):
+        BettingStats.objects.get_or_create(user_id=user_id)
+        BettingStats.objects.filter(user_id=user_id).update(**increments)
+
+
+def apply_many(changes):
+    """
+    Apply {user_id: {field: increment}} to many users' stats rows in one
+    UPDATE (plus one INSERT for users without a row), e.g. when a batch of
+    events is settled.
+    """
+    if not changes:
+        return
+    existing = set(BettingStats.objects.filter(user_id__in=changes).values_list("user_id", flat=True))
+    BettingStats.objects.bulk_create(
+        [BettingStats(user_id=user_id) for user_id in changes if user_id not in existing], ignore_conflicts=True
+    )
+    increments = {}
+    for field in {field for fields in changes.values() for field in fields}:
+        output_field = BettingStats._meta.get_field(field)
+        whens = [
+            When(user_id=user_id, then=Value(fields[field], output_field=output_field))
+            for user_id, fields in changes.items()
+            if field in fields
+        ]
+        increments[field] = F(field) + Case(*whens, default=Value(0, output_field=output_field))
+    BettingStats.objects.filter(user_id__in=changes).update(**increments)
+
+
+def record_bet_placed(user_id, bet_amount):
+    bet_amount = Decimal(bet_amount or 0)
+    _apply(user_id, open_stake=bet_amount, lifetime_wagered=bet_amount)
+
+
+def record_bet_changed(user_id, old_amount, new_amount):
+    delta = Decimal(new_amount or 0) - Decimal(old_amount or 0)
+    if delta:
+        _apply(user_id, open_stake=delta, lifetime_wagered=delta)
+
+
+def record_bet_removed(user_id, bet_amount):
+    bet_amount = Decimal(bet_amount or 0)
+    _apply(user_id, open_stake=-bet_amount, lifetime_wagered=-bet_amount)
+
+
+def record_bet_refunded(user_id, bet_amount):
+    _apply(user_id, open_stake=-Decimal(bet_amount or 0))
+
+
+def record_bet_won(user_id, bet_amount, winnings):
+    _apply(
+        user_id,
+        open_stake=-Decimal(bet_amount or 0),
+        amount_won=Decimal(winnings),
+        bets_won=1,
+    )
+
+
+def record_bet_lost(user_id, bet_amount):
+    bet_amount = Decimal(bet_amount or 0)
+    _apply(user_id, open_stake=-bet_amount, amount_lost=bet_amount, bets_lost=1)
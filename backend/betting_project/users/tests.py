@@ -1,5 +1,30 @@
-from django.test import TestCase
+import csv
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from decimal import Decimal
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Bet, Event, Group
+from .deposits import reconcile_deposits
+from .models import BettingStats, Deposit, LedgerEntry, RevokedToken
+from .payment_gateway import CircuitBreaker, CircuitOpenError, GatewayPaymentClient, verify_stripe_signature
+from .payments import PaymentError, get_payment_client, reset_payment_client
+from .statement import iter_ledger_entries
+from .token_revocation import BloomFilter, revocation_store
 
 class UsersManagersTests(TestCase):
     def test_create_user(self):
@@ -54,3 +79,404 @@ class UsersManagersTests(TestCase):
         with self.assertRaises(ValueError):
             User.objects.create_superuser(
                 email="super@user.com", password="foo", is_superuser=False)
+
+
+class TokenRevocationTests(TestCase):
+    """
+    Tests for refresh token rotation with the revocation store.
+
+    python manage.py test users.tests.TokenRevocationTests
+    """
+    def setUp(self):
+        revocation_store.reset()
+        self.user = get_user_model().objects.create_user(
+            username="vegeta", email="vegeta@saiyan.com", password="FinalFlash9000"
+        )
+        self.client = APIClient()
+        self.url = reverse("token_refresh")
+
+    def tearDown(self):
+        revocation_store.reset()
+
+    def test_rotation_revokes_old_refresh_token(self):
+        old_refresh = str(RefreshToken.for_user(self.user))
+
+        response = self.client.post(self.url, {"refresh": old_refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_refresh = response.data["refresh"]
+        self.assertTrue(RevokedToken.objects.filter(jti=RefreshToken(old_refresh)["jti"]).exists())
+
+        # Replaying the rotated token is rejected
+        response = self.client.post(self.url, {"refresh": old_refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # The token it was rotated into still works
+        response = self.client.post(self.url, {"refresh": new_refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unrevoked_token_check_does_not_query(self):
+        # Warm the filter, then a never-revoked jti is answered from memory
+        revocation_store.is_revoked("warm-up")
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation_store.is_revoked(str(uuid4())))
+
+    def test_revoke_is_idempotent_and_purged_after_expiry(self):
+        expired = timezone.now() - timedelta(minutes=1)
+        self.assertTrue(revocation_store.revoke("expired-jti", expired))
+        self.assertFalse(revocation_store.revoke("expired-jti", expired))
+        # Expired revocations no longer count and are purged
+        self.assertFalse(revocation_store.is_revoked("expired-jti"))
+        self.assertEqual(revocation_store.purge_expired(), 1)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        jtis = [uuid4().hex for _ in range(1000)]
+        for jti in jtis:
+            bloom.add(jti)
+        self.assertTrue(all(bloom.might_contain(jti) for jti in jtis))
+
+
+class UserProfileTests(TestCase):
+    """
+    Tests for the /api/users/me/ profile and the stats kept behind it.
+
+    python manage.py test users.tests.UserProfileTests
+    """
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(
+            username="bulma", email="bulma@capsule.com", password="DragonRadar1", available_funds=0
+        )
+        self.winner = User.objects.create_user(
+            username="goku", email="goku@earth.com", password="Kamehameha1", available_funds=100
+        )
+        self.loser = User.objects.create_user(
+            username="frieza", email="frieza@planet.com", password="DeathBall99", available_funds=100
+        )
+        self.group = Group.objects.create(name="Capsule Corp", location="West City", description="Tournament")
+        self.event = Event.objects.create(
+            group=self.group,
+            team1="Saiyans",
+            team2="Frieza Force",
+            start_time=timezone.now() + timedelta(hours=1),
+            end_time=timezone.now() + timedelta(hours=3),
+            organizer=self.organizer,
+        )
+        self.client = APIClient()
+
+    def test_me_returns_slim_profile_in_one_query(self):
+        self.client.force_authenticate(user=self.winner)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("customuser-me"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data), {"id", "username", "email", "profile_picture", "available_funds", "stats"}
+        )
+        self.assertIsNone(response.data["stats"]["win_rate"])
+
+    def test_stats_follow_bet_placement_and_settlement(self):
+        for user, team, amount in [(self.winner, "Team 1", "40.00"), (self.loser, "Team 2", "60.00")]:
+            self.client.force_authenticate(user=user)
+            response = self.client.post(
+                reverse("bet-list"),
+                {"user": user.id, "event_id": self.event.id, "team_choice": team, "bet_type": "Win", "bet_amount": amount},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        self.assertEqual(BettingStats.objects.get(user=self.winner).open_stake, Decimal("40.00"))
+
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.post(
+            reverse("event-complete-event", args=[self.event.id]), {"winning_team": "Saiyans"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.winner)
+        winner_stats = self.client.get(reverse("customuser-me")).data["stats"]
+        self.assertEqual(Decimal(winner_stats["open_stake"]), Decimal("0.00"))
+        self.assertEqual(Decimal(winner_stats["lifetime_wagered"]), Decimal("40.00"))
+        self.assertEqual(Decimal(winner_stats["amount_won"]), Decimal("60.00"))
+        self.assertEqual(winner_stats["bets_won"], 1)
+        self.assertEqual(winner_stats["win_rate"], 1.0)
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(user=self.winner).values_list("kind", "amount")),
+            [(LedgerEntry.STAKE, Decimal("-40.00")), (LedgerEntry.PAYOUT, Decimal("60.00"))],
+        )
+
+        self.client.force_authenticate(user=self.loser)
+        loser_stats = self.client.get(reverse("customuser-me")).data["stats"]
+        self.assertEqual(Decimal(loser_stats["open_stake"]), Decimal("0.00"))
+        self.assertEqual(Decimal(loser_stats["amount_lost"]), Decimal("60.00"))
+        self.assertEqual(loser_stats["win_rate"], 0.0)
+
+
+@override_settings(PAYMENT_CLIENT="users.payments.FakePaymentClient", DEPOSITS_SUBMIT_ASYNC=False)
+class DepositTests(TestCase):
+    """
+    Tests for the pending-deposit flow against the fake payment client.
+
+    python manage.py test users.tests.DepositTests
+    """
+    def setUp(self):
+        reset_payment_client()
+        self.user = get_user_model().objects.create_user(
+            username="trunks", email="trunks@future.com", password="BurningAttack1"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        reset_payment_client()
+
+    def deposit(self, amount=2500, source="pm_card_visa"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("stripe-charge"), {"amount": amount, "source": source}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], Deposit.PENDING)
+        return Deposit.objects.get(pk=response.data["id"])
+
+    def test_webhook_credits_deposit_once(self):
+        deposit = self.deposit()
+        self.assertEqual(deposit.status, Deposit.PROCESSING)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.available_funds, Decimal("0.00"))
+
+        event = get_payment_client().settle(deposit.provider_intent_id)
+        for _ in range(2):  # Providers redeliver webhooks; only credit once
+            response = self.client.post(reverse("stripe-webhook"), event, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.available_funds, Decimal("25.00"))
+        response = self.client.get(reverse("stripe-deposit", args=[deposit.id]))
+        self.assertEqual(response.data["status"], Deposit.SUCCEEDED)
+
+    def test_poller_credits_when_webhook_is_missed(self):
+        deposit = self.deposit(amount=1000)
+        counts = reconcile_deposits(older_than=timedelta(0))
+        self.assertEqual(counts["credited"], 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.available_funds, Decimal("10.00"))
+        deposit.refresh_from_db()
+        self.assertEqual(deposit.status, Deposit.SUCCEEDED)
+
+    def test_declined_payment_marks_deposit_failed(self):
+        deposit = self.deposit(source="pm_card_declined")
+        self.assertEqual(deposit.status, Deposit.FAILED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.available_funds, Decimal("0.00"))
+
+
+class FakeStripeServer:
+    """
+    Minimal local stand-in for Stripe's payment_intents REST API.
+
+    `script` is a list of (delay_seconds, status_code) consumed one per
+    request; once empty, requests succeed immediately.
+    """
+    def __init__(self):
+        self.requests = []
+        self.connections = set()
+        self.script = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def log_message(self, *args):
+                pass
+
+            def read_form(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return parse_qs(self.rfile.read(length).decode()) if length else {}
+
+            def reply(self):
+                body = self.read_form()
+                server.connections.add(self.client_address)
+                server.requests.append((self.command, self.path, dict(self.headers), body))
+                delay, code = server.script.pop(0) if server.script else (0, 200)
+                if delay:
+                    time.sleep(delay)
+                if code == 200:
+                    intent_id = self.path.rsplit("/", 1)[-1] if self.command == "GET" else "pi_local_1"
+                    payload = {"id": intent_id, "status": "succeeded", "amount": int(body.get("amount", ["0"])[0])}
+                else:
+                    payload = {"error": {"message": f"fake error {code}"}}
+                data = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = reply
+            do_POST = reply
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@override_settings(STRIPE_SECRET_KEY="sk_test_local", PAYMENT_RETURN_URL="http://localhost:3000/")
+class PaymentGatewayTests(TestCase):
+    """
+    Tests for the pooled payment gateway against a local fake server.
+
+    python manage.py test users.tests.PaymentGatewayTests
+    """
+    def client_for(self, server, **options):
+        options = {"BASE_URL": server.url, "BACKOFF_FACTOR": 0, **options}
+        client = GatewayPaymentClient(options)
+        self.addCleanup(client.gateway.close)
+        return client
+
+    def create(self, client, key="deposit-1"):
+        return client.create_intent(
+            amount=500, currency="usd", payment_method="pm_card_visa",
+            description="test", metadata={"deposit_id": "1"}, idempotency_key=key,
+        )
+
+    def test_calls_reuse_one_pooled_connection(self):
+        with FakeStripeServer() as server:
+            client = self.client_for(server)
+            intent = self.create(client)
+            client.retrieve_intent(intent["id"])
+            client.retrieve_intent(intent["id"])
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(server.connections), 1)
+        method, path, headers, body = server.requests[0]
+        self.assertEqual((method, path), ("POST", "/v1/payment_intents"))
+        self.assertEqual(headers["Authorization"], "Bearer sk_test_local")
+        self.assertEqual(body["metadata[deposit_id]"], ["1"])
+        self.assertEqual(client.gateway.metrics.snapshot()["calls"], 3)
+
+    def test_retries_transient_errors_with_same_idempotency_key(self):
+        with FakeStripeServer() as server:
+            server.script = [(0, 503), (0, 502)]
+            intent = self.create(self.client_for(server, MAX_RETRIES=2))
+
+        self.assertEqual(intent["status"], "succeeded")
+        keys = {headers["Idempotency-Key"] for _, _, headers, _ in server.requests}
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(keys, {"deposit-1"})
+
+    def test_read_timeout_is_bounded(self):
+        with FakeStripeServer() as server:
+            server.script = [(1.0, 200)]
+            client = self.client_for(server, READ_TIMEOUT=0.1, MAX_RETRIES=0)
+            started = time.monotonic()
+            with self.assertRaises(PaymentError):
+                self.create(client)
+            self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(client.gateway.metrics.snapshot()["errors"], 1)
+
+    def test_circuit_opens_and_fails_fast(self):
+        with FakeStripeServer() as server:
+            server.script = [(0, 500)] * 10
+            client = self.client_for(server, MAX_RETRIES=0, BREAKER_FAILURE_THRESHOLD=2, BREAKER_RESET_TIMEOUT=60)
+            for _ in range(2):
+                with self.assertRaises(PaymentError):
+                    client.retrieve_intent("pi_1")
+            with self.assertRaises(CircuitOpenError):
+                client.retrieve_intent("pi_1")
+
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(client.gateway.metrics.snapshot()["rejected"], 1)
+
+    def test_circuit_half_opens_after_reset_timeout(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0])
+        breaker.before_call()
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        now[0] = 31
+        breaker.before_call()  # trial call allowed
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_webhook_signature(self):
+        payload = b'{"type": "payment_intent.succeeded"}'
+        signature = hmac.new(b"whsec_local", b"100." + payload, hashlib.sha256).hexdigest()
+        verify_stripe_signature(payload, f"t=100,v1={signature}", "whsec_local", tolerance=300, now=150)
+        with self.assertRaises(PaymentError):
+            verify_stripe_signature(payload, f"t=100,v1={signature}", "other", tolerance=300, now=150)
+        with self.assertRaises(PaymentError):
+            verify_stripe_signature(payload, f"t=100,v1={signature}", "whsec_local", tolerance=300, now=1000)
+
+
+class AccountStatementTests(TestCase):
+    """
+    Tests for the streamed CSV statement.
+
+    python manage.py test users.tests.AccountStatementTests
+    """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="piccolo", email="piccolo@lookout.com", password="HellzoneGrenade1"
+        )
+        group = Group.objects.create(name="Lookout", location="Sky", description="Sparring")
+        event = Event.objects.create(
+            group=group,
+            team1="Namekians",
+            team2="Saiyans",
+            start_time=timezone.now() + timedelta(hours=1),
+            end_time=timezone.now() + timedelta(hours=2),
+        )
+        bet = Bet.objects.create(user=self.user, event=event, team_choice="Team 1", bet_type="Win", bet_amount=20)
+        now = timezone.now()
+        # Same timestamp for several rows, to exercise the (created_at, id) keyset
+        for kind, amount, days_ago in [
+            (LedgerEntry.DEPOSIT, "50.00", 3),
+            (LedgerEntry.STAKE, "-20.00", 2),
+            (LedgerEntry.REFUND, "20.00", 1),
+            (LedgerEntry.STAKE, "-20.00", 1),
+            (LedgerEntry.PAYOUT, "35.00", 0),
+        ]:
+            LedgerEntry.objects.create(
+                user=self.user,
+                kind=kind,
+                amount=Decimal(amount),
+                bet=None if kind == LedgerEntry.DEPOSIT else bet,
+                created_at=now - timedelta(days=days_ago),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def read_statement(self, **params):
+        response = self.client.get(reverse("user-statement"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        return list(csv.reader(lines))
+
+    def test_streams_entries_in_time_order(self):
+        rows = self.read_statement()
+        self.assertEqual(rows[0][:3], ["date", "type", "amount"])
+        self.assertEqual(
+            [(row[1], row[2]) for row in rows[1:]],
+            [("deposit", "50.00"), ("stake", "-20.00"), ("refund", "20.00"), ("stake", "-20.00"), ("payout", "35.00")],
+        )
+        self.assertEqual(rows[2][4], "Namekians vs Saiyans")
+
+    def test_date_range(self):
+        today = timezone.localdate()
+        rows = self.read_statement(**{"from": (today - timedelta(days=1)).isoformat()})
+        self.assertEqual([row[1] for row in rows[1:]], ["refund", "stake", "payout"])
+
+    def test_reads_in_keyset_chunks(self):
+        # 5 rows in chunks of 2: three queries, no row repeated or skipped
+        with self.assertNumQueries(3):
+            entries = list(iter_ledger_entries(self.user.id, chunk_size=2))
+        self.assertEqual(len({entry.id for entry in entries}), 5)
@@ -0,0 +1,167 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+DEFAULT_TOKEN_REVOCATION = {
+    # Expected number of live (not yet expired) revoked jtis per process.
+    "FILTER_CAPACITY": 100_000,
+    # Target false positive rate. A false positive only costs one indexed lookup.
+    "FILTER_ERROR_RATE": 0.001,
+    # Seconds between incremental syncs of revocations made by other workers.
+    "SYNC_INTERVAL": 5,
+}
+
+
+def get_revocation_settings():
+    """
+    Merge the project's TOKEN_REVOCATION setting over the defaults.
+    """
+    return {**DEFAULT_TOKEN_REVOCATION, **getattr(settings, "TOKEN_REVOCATION", {})}
+
+
+class BloomFilter:
+    """
+    A compact, add-only membership filter.
+
+    `might_contain` never returns False for a value that was added, so a
+    negative answer is authoritative and needs no database lookup. A positive
+    answer may be wrong (at roughly `error_rate`) and has to be confirmed.
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(int(capacity), 1)
+        # Optimal bit count and hash count for the requested error rate
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: derive k positions from two 64 bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationStore:
+    """
+    Revocation list for refresh tokens, keyed by the token's `jti` claim.
+
+    The RevokedToken table is the source of truth. Each process keeps a
+    BloomFilter of the revoked jtis in front of it so that checking a token
+    that was never revoked costs O(1) and no query. The filter is loaded once
+    and then topped up with rows newer than the last one seen, at most every
+    SYNC_INTERVAL seconds.
+
+    `revoke` relies on the unique index on `jti`: revoking an already revoked
+    token fails, which makes rotation safe against concurrent replays even
+    before other workers have synced their filters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_id = 0
+        self._last_sync = 0.0
+
+    def _load(self):
+        """
+        (Re)build the filter from every revocation that has not expired yet.
+        """
+        options = get_revocation_settings()
+        bloom = BloomFilter(options["FILTER_CAPACITY"], options["FILTER_ERROR_RATE"])
+        last_id = RevokedToken.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        live_rows = RevokedToken.objects.filter(id__lte=last_id, expires_at__gt=timezone.now())
+        for jti in live_rows.values_list("jti", flat=True).iterator():
+            bloom.add(jti)
+        self._filter = bloom
+        self._last_id = last_id
+        self._last_sync = time.monotonic()
+
+    def _sync(self):
+        """
+        Add revocations recorded by other processes since the last sync.
+        """
+        new_rows = RevokedToken.objects.filter(id__gt=self._last_id).order_by("id")
+        for pk, jti in new_rows.values_list("id", "jti").iterator():
+            self._filter.add(jti)
+            self._last_id = pk
+        self._last_sync = time.monotonic()
+
+    def _get_filter(self):
+        with self._lock:
+            if self._filter is None:
+                self._load()
+            elif time.monotonic() - self._last_sync >= get_revocation_settings()["SYNC_INTERVAL"]:
+                self._sync()
+            return self._filter
+
+    def is_revoked(self, jti):
+        """
+        Return True if the token with this jti has been revoked and not yet expired.
+        """
+        if not self._get_filter().might_contain(jti):
+            return False
+        # Possible hit: confirm against the indexed table
+        return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+    def revoke(self, jti, expires_at):
+        """
+        Record the jti as revoked until `expires_at`.
+
+        Returns False if the jti was already revoked.
+        """
+        if isinstance(expires_at, (int, float)):
+            expires_at = datetime.fromtimestamp(expires_at, tz=dt_timezone.utc)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        return True
+
+    def purge_expired(self):
+        """
+        Delete revocations whose tokens have expired and rebuild the filter.
+
+        Returns the number of rows deleted.
+        """
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        with self._lock:
+            self._load()
+        return deleted
+
+    def reset(self):
+        """
+        Drop the in-memory filter; it is rebuilt from the table on next use.
+        """
+        with self._lock:
+            self._filter = None
+            self._last_id = 0
+
+
+# One store per process
+revocation_store = RevocationStore()
@@ -2,7 +2,15 @@ from users import views
 from rest_framework import routers
 from django.urls import path, include
 from django.conf import urls
-from .views import UserSignupView, UserViewSet, StripeConfigView, DepositFundsView
+from .views import (
+    UserSignupView,
+    UserViewSet,
+    StripeConfigView,
+    DepositFundsView,
+    AccountStatementView,
+    DepositStatusView,
+    StripeWebhookView,
+)
 
 
 router = routers.DefaultRouter()
@@ -11,9 +19,13 @@ router.register("users", views.UserViewSet)
 
 
 urlpatterns = [
+    # Before the router so "me/statement.csv" is not taken for a user pk
+    path("users/me/statement.csv", AccountStatementView.as_view(), name="user-statement"),
     path("", include(router.urls)),
     path("signup/", UserSignupView.as_view(), name="signup"),
     #Stripe 
     path("stripe/config/", StripeConfigView.as_view(), name="stripe-config"),
-    path("stripe/charge/", DepositFundsView.as_view(), name="stripe-charge")
+    path("stripe/charge/", DepositFundsView.as_view(), name="stripe-charge"),
+    path("stripe/deposits/<int:pk>/", DepositStatusView.as_view(), name="stripe-deposit"),
+    path("stripe/webhook/", StripeWebhookView.as_view(), name="stripe-webhook"),
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 from decimal import Decimal
-from email.policy import HTTP
 import logging
 from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from rest_framework.permissions import (
@@ -10,17 +10,27 @@ from rest_framework.permissions import (
     IsAuthenticated,
 )
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 import logging
 
-from .models import CustomUser
-from .serializer import UserSerializer, UserSignupSerializer
+from .models import CustomUser, Deposit
+from .serializer import (
+    DepositCreateSerializer,
+    DepositSerializer,
+    UserProfileSerializer,
+    UserSerializer,
+    UserSignupSerializer,
+)
 
 from django.conf import settings
 from rest_framework.views import APIView
 from django.db import transaction
-import stripe
+from api.filters import parse_date_bound
+from . import deposits
+from .payments import PaymentError, get_payment_client
+from .statement import iter_ledger_entries, statement_csv_lines
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +71,21 @@ class UserViewSet(viewsets.ViewSet):
         # Return an HTTP response containing the serialized user data.
         return Response(serializer.data)
 
+    # /api/users/me/
+    @action(detail=False, methods=["get"], url_path="me")
+    def me(self, request):
+        """
+        Return the profile of the logged in user: account fields, funds and
+        precomputed betting stats, in a single query.
+        """
+        user = get_object_or_404(
+            CustomUser.objects.select_related("betting_stats").only(
+                *UserProfileSerializer.LOAD_FIELDS, "betting_stats"
+            ),
+            pk=request.user.pk,
+        )
+        return Response(UserProfileSerializer(user).data)
+
 
 # FOR DEBUGGING
 # import pdb
@@ -99,69 +124,94 @@ class StripeConfigView(APIView):
         Returns:
             Response: A DRF Response object containing the Stripe public key.
         """
-        # Retrieve the Stripe publishable key from the project settings
-        stripe_publishable_key = settings.STRIPE_PUBLISHABLE_KEY
-        # Return the Stripe publishable key in the response
-        print(stripe_publishable_key)
+        # Return the Stripe publishable key from the project settings in the response
         return Response({"publicKey": settings.STRIPE_PUBLISHABLE_KEY})
 
 class DepositFundsView(APIView):
     permission_classes = [IsAuthenticated]
     """
-    API view to create a charge using stripe
-    
-    This view handles POST requests to charge a user's card. The amout and source 
-    (card information) are expected in the request data. It updates the user's availabe
-    funds upon successful charge.  
+    API view to deposit funds using stripe
+
+    This view handles POST requests to deposit funds from a user's card. The
+    amount and source (payment method) are expected in the request data. The
+    deposit is recorded as pending and submitted to the payment provider off
+    the request thread; the user's funds are credited when the provider
+    confirms the payment (StripeWebhookView or `manage.py reconcile_deposits`).
     """
     def post(self, request, *args, **kwargs):
-        logger.debug(f"Received deposit request with data: {request.data}")
         """
-            Handles The POST request to create a charge
-            
-            uses Stripe's API to create a charge with the provided amount and source
-            On scuccessful charge, it updates  the user's availabe funds.
+            Handles The POST request to start a deposit
+
         Args:
             request: The HTTP request objec containing the charge details.
         Returns:
-            Response: A Response object w/ a success + 201 HTTP status code
-            or an error message and error-specific HTTP status code. 
+            Response: The pending deposit + 202 HTTP status code, or the
+            validation errors + 400.
         """
-        # Set the Stripe API key
-        stripe.api_key = settings.STRIPE_SECRET_KEY
-        
+        serializer = DepositCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            deposit = deposits.create_deposit(
+                request.user,
+                amount=serializer.validated_data["amount"],
+                payment_method=serializer.validated_data["source"],
+            )
+        logger.info("Deposit %s of %s cents recorded for user %s", deposit.id, deposit.amount, request.user.id)
+        return Response(DepositSerializer(deposit).data, status=status.HTTP_202_ACCEPTED)
+
+
+class AccountStatementView(APIView):
+    """
+    /api/users/me/statement.csv?from=&to=
+
+    Streams the logged in user's fund movements (stakes, refunds, payouts
+    and deposits) as CSV, oldest first. `from` and `to` are optional ISO
+    dates or datetimes. Rows are read in keyset chunks while the response
+    is being sent, so memory use does not grow with the history.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        start = parse_date_bound(request.query_params, "from")
+        end = parse_date_bound(request.query_params, "to", end_of_day=True)
+        entries = iter_ledger_entries(request.user.id, start, end)
+
+        response = StreamingHttpResponse(statement_csv_lines(entries), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="statement.csv"'
+        return response
+
+
+class DepositStatusView(generics.RetrieveAPIView):
+    """
+    Lets the frontend poll a deposit until it has succeeded or failed.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = DepositSerializer
+
+    def get_queryset(self):
+        return Deposit.objects.filter(user=self.request.user)
+
+
+class StripeWebhookView(APIView):
+    """
+    Receives payment intent events from the payment provider and settles
+    the matching deposit. Authenticity is checked by the payment client
+    (Stripe signs each delivery with STRIPE_WEBHOOK_SECRET).
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
         try:
-            # Create a charge using Stripe's API
-            logger.debug(f"Creating payment intent with amount {request.data.get('amount')} and source: {request.data.get('source')}")
-            payment_intent = stripe.PaymentIntent.create(
-                amount=request.data.get("amount"), # amount in cents
-                currency="usd",
-                payment_method=request.data.get("source"), # Payment method ID
-                confirm=True,  # Automically confirm the payment
-                description=f"Deposit for user {request.user.email}",
-                return_url="http://localhost:3000/"
+            event = get_payment_client().parse_webhook(
+                request.body, request.META.get("HTTP_STRIPE_SIGNATURE", "")
             )
-            
-            logger.debug(f"Stripe Payment intent create: {payment_intent}")
-            
-            # Convert the charged amount to dollars(Stripe uses cents)
-            amount_in_dollars = payment_intent["amount_received"] / Decimal(100)
-            
-            # Update user's availabel Funds in a transaction-safe way
-            with transaction.atomic():
-                user = request.user
-                user.available_funds += amount_in_dollars
-                user.save()
-                
-            # Return a success response   
-            logger.debug("Charge Successful, sending response") 
-            return Response({"message": "Charge successful"}, status=status.HTTP_201_CREATED)
-        
-        except stripe.error.StripeError as e: 
-            logger.error(f"Stripe error occoured: {e}")
-            #Handle Stripe-specifice errors
-            # "e" captures the exception instance thrown by Stripe
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            logger.error(f"General error occured: {e}")
-            return Response({"error": "An error occured while processing your request."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except PaymentError as e:
+            logger.warning("Rejected payment webhook: %s", e)
+            return Response({"error": "Invalid webhook"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if event["type"] in ("payment_intent.succeeded", "payment_intent.payment_failed", "payment_intent.canceled"):
+            deposits.apply_intent(event["data"]["object"])
+        # Acknowledge every verified event so the provider stops retrying it
+        return Response(status=status.HTTP_200_OK)
@@ -1,5 +1,4 @@
 from django.core.exceptions import ValidationError
-from PIL import Image
 
 import os
 
@@ -9,6 +8,9 @@ import os
 
 def validate_icon_image_size(image):
     if image:
+        # Pillow is only needed when an image is actually uploaded; don't load it at startup
+        from PIL import Image
+
         with Image.open(image) as img:
             if img.width > 70 or img.height > 70:
                 raise ValidationError(
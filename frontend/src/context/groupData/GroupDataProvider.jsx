@@ -1,5 +1,6 @@
-import React, { createContext, useContext, useEffect, useState } from "react";
+import React, { createContext, useCallback, useContext, useEffect, useState } from "react";
 import useCrud from "../../services/useCrud";
+import useEventStream from "../../services/useEventStream";
 import { useParams } from "react-router-dom";
 
 // === Context Creation ===
@@ -15,6 +16,17 @@ export const useGroupData = () => {
   return context;
 };
 
+// The stream serves at most this many events (MAX_EVENTS in api/views/stream_views.py)
+const MAX_STREAM_EVENTS = 50;
+
+// Live state of one event ({ status, pools, bets }), undefined until the
+// stream sends it; keeps the event in the stream while the caller is mounted
+export const useLiveEvent = (eventId) => {
+  const { liveEvents, watchEvent } = useGroupData();
+  useEffect(() => (eventId ? watchEvent(eventId) : undefined), [eventId, watchEvent]);
+  return eventId ? liveEvents[eventId] : undefined;
+};
+
 // Export the context for use in other components
 export default GroupDataContext;
 
@@ -56,6 +68,51 @@ export const GroupDataProvider = ({ children }) => {
     }
   }, [groupId]);
 
+  // Live pools and status of the events on screen, pushed by the server
+  // instead of refetching on a timer: { [eventId]: { pools, bets, status } }.
+  // Components register the events they show with useLiveEvent; one stream
+  // covers all of them, and none is opened while nothing is registered.
+  const [liveEvents, setLiveEvents] = useState({});
+  const [watchedEvents, setWatchedEvents] = useState({}); // { [eventId]: number of watchers }
+  const [streamAvailable, setStreamAvailable] = useState(true);
+
+  const watchEvent = useCallback((eventId) => {
+    setWatchedEvents((current) => ({ ...current, [eventId]: (current[eventId] || 0) + 1 }));
+    return () =>
+      setWatchedEvents((current) => {
+        const { [eventId]: watchers, ...rest } = current;
+        return watchers > 1 ? { ...rest, [eventId]: watchers - 1 } : rest;
+      });
+  }, []);
+
+  const eventIds = streamAvailable
+    ? Object.keys(watchedEvents).map(Number).sort((a, b) => a - b).slice(0, MAX_STREAM_EVENTS)
+    : [];
+
+  useEventStream(
+    eventIds,
+    (type, data) => {
+      if (type === "reset") {
+        // Fell behind the stream: the reconnect starts with fresh snapshots
+        setLiveEvents({});
+        return;
+      }
+      const update = type === "settled" ? { ...data, status: "settled" } : data;
+      setLiveEvents((current) => ({
+        ...current,
+        [data.event_id]: { ...current[data.event_id], ...update },
+      }));
+      if (type === "settled") {
+        setEvents((current) =>
+          current.map((event) => (event.id === data.event_id ? { ...event, is_complete: true } : event))
+        );
+      }
+    },
+    // The server can't stream (not running the ASGI app): components keep
+    // the state their event was loaded with
+    () => setStreamAvailable(false)
+  );
+
   const fetchAllGroupsData = async () => {
     try {
       const allGroupsData = await fetchData("/groups");
@@ -120,6 +177,8 @@ export const GroupDataProvider = ({ children }) => {
     setGroup,
     updateGroups,
     events,
+    liveEvents,
+    watchEvent,
     members,
     setMembers,
     fetchAllGroupsData
@@ -4,7 +4,7 @@ import AccessTimeIcon from '@mui/icons-material/AccessTime';
 import EventAvailableIcon from '@mui/icons-material/EventAvailable';
 import CheckCircleIcon from '@mui/icons-material/CheckCircle';
 import CompleteEventForm from "./forms/CompleteEventForm";
-import { useGroupData } from "../../context/groupData/GroupDataProvider";
+import { useLiveEvent } from "../../context/groupData/GroupDataProvider";
 
 /**
  * A countdown timer component that displays the time remaining until an event starts or ends.
@@ -17,6 +17,11 @@ const CountDownTimer = ({ event }) => {
 
     const isUserEventOrganizer = parseInt(localStorage.getItem("userId"), 10) === event.organizer
 
+    // Market status pushed by the server, else the one the event was loaded with
+    const liveEvent = useLiveEvent(event.id);
+    const marketStatus = liveEvent?.status ?? event.state;
+    const isSettled = marketStatus === "settled" || marketStatus === "archived" || event.is_complete;
+
     const theme = useTheme(); 
     // State to store the remaining time until the event.
     const [timeLeft, setTimeLeft] = useState({});
@@ -67,13 +72,24 @@ const CountDownTimer = ({ event }) => {
     };
 
     // Effect hook to set up a timer that updates the remaining time every second.
+    // The clock only drives the countdown; once the event is settled (pushed
+    // by the server) there is nothing left to count.
     useEffect(() => {
+        if (isSettled) {
+            setStatus("Settled");
+            setTimeLeft({});
+            return undefined;
+        }
         setTimeLeft(calculateTimeLeft());
         let timer = setInterval(() => {
-            setTimeLeft(calculateTimeLeft());
+            const left = calculateTimeLeft();
+            setTimeLeft(left);
+            if (Object.keys(left).length === 0) {
+                clearInterval(timer); // Ended
+            }
         }, 1000);
         return () => clearInterval(timer);
-    }, [event.start_time, event.end_time]);
+    }, [event.start_time, event.end_time, isSettled]);
 
     /**
      * Renders the time left components.
@@ -81,7 +97,7 @@ const CountDownTimer = ({ event }) => {
      * @returns {Array} An array of JSX elements representing the time left components.
      */
     const renderTimeLeft = () => {
-        if (status === "Ended") {
+        if (status === "Ended" || status === "Settled") {
             return null; // Do not display time units if the event has ended.
         }
     
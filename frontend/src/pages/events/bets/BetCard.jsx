@@ -43,7 +43,7 @@ const BetCard = ({ bet, userData, toggleBetForm, openBetFormId }) => {
           </Grid>
           <Grid item xs={12} sm={6}>
             <Typography variant="subtitle1"  fontWeight="medium" sx={{ color: 'text.primary' }}>
-              Total Pool: <span style={{ fontWeight: 'bold' }}>${totalWinnablePool}</span> - Participants: <span style={{ fontWeight: 'bold' }}>{bet.event.participants_bets_and_winnings.participants_info.length}</span>
+              Total Pool: <span style={{ fontWeight: 'bold' }}>${totalWinnablePool}</span> - Participants: <span style={{ fontWeight: 'bold' }}>{bet.event.participants_bets_and_winnings.participants_count}</span>
             </Typography>
           </Grid>
         </Grid>
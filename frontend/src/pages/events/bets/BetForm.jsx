@@ -15,15 +15,18 @@ import {
 import CustomAlert from "./placeBetBtn/CustomAlert";
 import { useEventData } from "../../../context/eventData/EventDataProvider";
 import { useBetData } from "../../../context/bet/BetDataProvider";
+import useCrud from "../../../services/useCrud";
 
 const BetForm = ({ open, onClose, bet, eventId }) => {
   // Hooks
   const { createBet, updateBet } = useBetData();
   const { event: contextEvent, loading: eventLoading, error: eventError } = useEventData();
+  const { fetchData } = useCrud();
 
   const [errorMessage, setErrorMessage] = useState(null);
   const [betAmountError, setBetAmountError] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [quote, setQuote] = useState(null);
 
   const userId = localStorage.getItem("userId");
   
@@ -50,6 +53,30 @@ const BetForm = ({ open, onClose, bet, eventId }) => {
   // Determine initial event_id: for new bets, use the eventId from params for updates use the bet's nested event id
   const event = bet ? bet.event: contextEvent
 
+  // What the bet would win, from the event's pool totals (GET /events/<id>/quote/)
+  useEffect(() => {
+    const { event_id, team_choice, bet_amount } = betDetails;
+    if (!open || !event_id || !team_choice || !(Number(bet_amount) > 0)) {
+      setQuote(null);
+      return;
+    }
+    let cancelled = false;
+    // Wait for the user to stop typing before asking
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ team: team_choice, amount: bet_amount });
+        const data = await fetchData(`/events/${event_id}/quote/?${params}`);
+        if (!cancelled) setQuote(data);
+      } catch (error) {
+        if (!cancelled) setQuote(null);
+      }
+    }, 300);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [open, betDetails, fetchData]);
+
   // Handlers
   const handleBetSubmission = async () => {
     setIsLoading(true);
@@ -166,7 +193,10 @@ const BetForm = ({ open, onClose, bet, eventId }) => {
           value={betDetails.bet_amount}
           onChange={handleInputChange}
           aria-label="Bet Amount"
-          helperText={betAmountError || "Amount to bet"}
+          helperText={
+            betAmountError ||
+            (quote ? `Potential winnings: $${quote.potential_winning}` : "Amount to bet")
+          }
           sx={{ marginY: 1 }}
         />
       </DialogContent>
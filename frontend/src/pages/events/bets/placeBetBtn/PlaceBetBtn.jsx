@@ -1,57 +1,38 @@
-import React, { useCallback, useEffect, useState } from "react";
+import React, { useCallback } from "react";
 import { Box, IconButton, Tooltip, useTheme } from "@mui/material";
 import AddIcon from '@mui/icons-material/Add'; // For placing a new bet
 import EditIcon from '@mui/icons-material/Edit'; // For editing an existing bet
 import DeleteIcon from '@mui/icons-material/Delete'; // For deleting an existing bet
 import { PlaceBetBtnStyles } from "./placeBetBtnStyles";
 import useCrud from "../../../../services/useCrud";
-import { useGroupData } from "../../../../context/groupData/GroupDataProvider";
+import { useLiveEvent } from "../../../../context/groupData/GroupDataProvider";
+import { useBetData } from "../../../../context/bet/BetDataProvider";
 
 export const PlaceBetBtn = ({ bet, toggleBetForm, eventId}) => {
-  const [currentTime, setCurrentTime] = useState(Date.now());
-
   console.log("testing bet", bet)
 
-  const { updateObject, deleteObject } = useCrud();
-  const { fetchAllAndUserEvents } = useGroupData()
+  const { deleteObject } = useCrud();
+  const { updateBetListData } = useBetData();
   const theme = useTheme();
   const classes = PlaceBetBtnStyles(theme);
-  
-  useEffect(() => {
-    const interval = setInterval(() => {
-      setCurrentTime(Date.now());
-    }, 1000);
-    return () => clearInterval(interval);
-  }, []);
-  
-  // Event time calculations
-  const eventStartTime = new Date(bet?.event?.start_time).getTime();
-  const eventEndTime = new Date(bet?.event?.end_time).getTime();
 
-  // Event status
-  const eventInProgress = currentTime >= eventStartTime && currentTime <= eventEndTime;
-  const eventHasEnded = currentTime > eventEndTime;
+  // Market status pushed by the server when it changes (closed at the start,
+  // settled...), else the one the event was loaded with
+  const liveEvent = useLiveEvent(eventId ?? bet?.event?.id);
+  const marketStatus = liveEvent?.status ?? bet?.event?.state;
+  const beforeStart = Date.now() < new Date(bet?.event?.start_time).getTime();
 
-  // Editability
-  const canEditBet = bet && !eventInProgress && !eventHasEnded;
+  // Editability: bets can change while the market is open
+  const canEditBet = bet && marketStatus === "open" && beforeStart;
 
-  const updateEvent = useCallback(async (updatedEventData) =>{
-    try {
-      await updateObject("/events/", eventId, updatedEventData);
-      fetchAllAndUserEvents()
-    } catch (error) {
-      console.error("Failed to update event:", error);
-    }
-  },[eventId]);
-  
-  const deleteEvent = useCallback(async () =>{
+  const deleteBet = useCallback(async () =>{
     try {
-      await deleteObject("/events/", eventId);
-      fetchAllAndUserEvents();
+      await deleteObject("/bets/", bet.id);
+      updateBetListData();
     } catch (error) { 
-      console.error("Failed to delete event:", error);
+      console.error("Failed to delete bet:", error);
     }
-  }, [eventId])
+  }, [bet])
 
   let buttonElement;
 
@@ -74,7 +55,7 @@ export const PlaceBetBtn = ({ bet, toggleBetForm, eventId}) => {
           </IconButton>
         </Tooltip>
         <Tooltip title="Delete Bet" placement="top">
-          <IconButton onClick={deleteEvent} sx={classes.placeBet}>
+          <IconButton onClick={deleteBet} sx={classes.placeBet}>
             <DeleteIcon />
           </IconButton>
         </Tooltip>
@@ -0,0 +1,53 @@
+import { useEffect, useRef } from "react";
+
+{/*Subscribes to live event updates pushed by the server over
+server-sent events (/api/stream/events/). The stream starts with a
+"snapshot" per event, then sends "pool", "status" and "settled"
+messages as they happen. No stream is opened without eventIds.
+EventSource reconnects on its own when the server ends the stream;
+on "reset" (we fell behind) the caller should drop what it has, the
+reconnect starts with fresh snapshots. When the server can't stream
+(501 under WSGI, e.g. `manage.py runserver`) onUnavailable is called
+once and the stream stays closed.*/}
+
+const useEventStream = (eventIds, onMessage, onUnavailable) => {
+  const BASE_URL = process.env.REACT_APP_BASE_URL;
+  // Keep the latest handlers without reopening the stream on every render
+  const handlerRef = useRef(onMessage);
+  handlerRef.current = onMessage;
+  const unavailableRef = useRef(onUnavailable);
+  unavailableRef.current = onUnavailable;
+  const key = (eventIds || []).join(",");
+
+  useEffect(() => {
+    if (!eventIds || eventIds.length === 0) {
+      return undefined;
+    }
+    const params = new URLSearchParams();
+    eventIds.forEach((id) => params.append("event_id", id));
+    const source = new EventSource(`${BASE_URL}/stream/events/?${params.toString()}`);
+
+    const types = ["snapshot", "pool", "status", "settled", "reset"];
+    const listeners = types.map((type) => {
+      const listener = (message) => handlerRef.current(type, JSON.parse(message.data));
+      source.addEventListener(type, listener);
+      return [type, listener];
+    });
+    // A non-200 answer closes the EventSource for good; network errors reconnect
+    const onError = () => {
+      if (source.readyState === EventSource.CLOSED && unavailableRef.current) {
+        unavailableRef.current();
+      }
+    };
+    source.addEventListener("error", onError);
+
+    return () => {
+      listeners.forEach(([type, listener]) => source.removeEventListener(type, listener));
+      source.removeEventListener("error", onError);
+      source.close();
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [BASE_URL, key]);
+};
+
+export default useEventStream;
@@ -30,6 +30,18 @@ function StripeChargeComponent() {
   const [error, setError] = useState(null);
   const [amount, setAmount] = useState("");
 
+  // Deposits are confirmed asynchronously; poll until the deposit settles
+  const waitForDeposit = async (depositId) => {
+    for (let attempt = 0; attempt < 30; attempt++) {
+      const { data } = await jwtReqAxios.get(`/stripe/deposits/${depositId}/`);
+      if (data.status === "succeeded" || data.status === "failed") {
+        return data;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+    return null;
+  };
+
   const handleSubmit = async (event) => {
     event.preventDefault();
 
@@ -64,9 +76,13 @@ function StripeChargeComponent() {
       if (response.data.error) {
         setError(response.data.error);
       } else {
+        const deposit = await waitForDeposit(response.data.id);
+        if (deposit && deposit.status === "failed") {
+          setError(deposit.failure_reason || "The payment was declined.");
+        }
         fetchUserData(); // Update user data
-        setIsLoading(false);
       }
+      setIsLoading(false);
     } catch (err) {
       setError("An error occurred while processing the payment.");
       setIsLoading(false);